@@ -21,7 +21,8 @@ import time
 import ea_psu_controller
 # more information on https://pypi.org/project/ea-psu-controller/
 
-address = 'USB0::0x0957::0x1798::MY59124127::0::INSTR'
+# DSOX_ADDRESS environment variable overrides the address, e.g. 'SIM::CAN' runs on simulated oscilloscope:
+address = os.environ.get('DSOX_ADDRESS', 'USB0::0x0957::0x1798::MY59124127::0::INSTR')
 """
 Address can be obtained from the device by pressing Utility -> I/O. VISA address will be displayed in
 a new window. Pass it as string when creating the object or create variable like:
@@ -42,6 +43,8 @@ psu.remote_on()
 time.sleep(0.5)
 
 results_path = f'C:\\Users\\glyubeno\\Desktop\\Volvo-Trucks\\Test_plan\\CAN\\VTNA-TestPlan\\2021-Nov\\CAN_BB2\\n40C\\'
+# DSOX_RESULTS_PATH environment variable (ending with path separator) overrides the path:
+results_path = os.environ.get('DSOX_RESULTS_PATH', results_path)
 
 VBATT = [10, 28, 32]
 
@@ -55,61 +58,41 @@ measure_can = keysight_DSOX2000А_3000A.Oscilloscope(address)
 # DC levels for CAN (CAN_H, CAN_L):
 can_levels = 'CAN_Levels.bmp'
 
-# set oscilloscope
-measure_can.init()
 # setup oscilloscope or this particular test
-# setting oscilloscope channels common settings
-# turn required channels ON, keep others OFF:
-measure_can.send(':CHANnel1:DISPlay ON')
-measure_can.send(':CHANnel2:DISPlay ON')
-measure_can.send(':CHANnel3:DISPlay OFF')
-measure_can.send(':CHANnel4:DISPlay OFF')
-# set proper labels on the ON channels and display them:
-measure_can.send(':CHANnel1:LABel "CAN_H"')
-measure_can.send(':CHANnel2:LABel "CAN_L"')
-measure_can.send(':DISPlay:LABel ON')
-
-# setting Y parameters
-# channel 1 specific settings
-measure_can.send(':CHANnel1:SCALe 0.5')  # 500mV/div
-measure_can.send(':CHANnel1:OFFSet 2.5')  # offset with 2.5V to measure full scale
-measure_can.send(':CHANnel1:BWLimit OFF')  # options ON | OFF
-
-# channel 2 specific settings
-measure_can.send(':CHANnel2:SCALe 0.5')  # 500mV/div
-measure_can.send(':CHANnel2:OFFSet 2.5')  # offset with 1V to measure full scale
-measure_can.send(':CHANnel2:BWLimit OFF')  # options ON | OFF
-
-# setting X parameters
-measure_can.send(':TIMebase:MODE MAIN')  # timebase mode: MAIN, WINDow, XY, ROLL
-# set 250ns/div for 1MHz bit time
-measure_can.send(':TIMebase:SCALe 0.00000025')  # 250ns/div; main window horizontal scale
-# set the time reference to the screen center:
-measure_can.send(':TIMebase:REFerence CENTer')  # options: LEFT | CENTer | RIGHt
-
-# set trigger settings
-measure_can.send(':TRIGger:SWEep NORMal')  # set acquisition mode to NORMAL
-measure_can.send(':TRIGger:EDGE:COUPling DC')  # options AC | DC | LFReject
-measure_can.send(':TRIGger:HFReject OFF')  # options: ON | OFF; interferes with LFReject above
-measure_can.send(':TRIGger:NREJect OFF')  # options: ON | OFF
+can_levels_profile = {
+    'channels': {
+        # turn required channels ON, keep others OFF and set proper labels on the ON channels:
+        1: {'DISPlay': 'ON', 'LABel': 'CAN_H', 'SCALe': 0.5, 'OFFSet': 2.5, 'BWLimit': 'OFF'},  # 500mV/div
+        2: {'DISPlay': 'ON', 'LABel': 'CAN_L', 'SCALe': 0.5, 'OFFSet': 2.5, 'BWLimit': 'OFF'},  # 500mV/div
+        3: {'DISPlay': 'OFF'},
+        4: {'DISPlay': 'OFF'},
+    },
+    'display': {'LABel': 'ON'},
+    'timebase': {
+        'MODE': 'MAIN',                 # timebase mode: MAIN, WINDow, XY, ROLL
+        'SCALe': 0.00000025,            # 250ns/div; main window horizontal scale
+        'REFerence': 'CENTer',          # set the time reference to the screen center
+        'POSition': -0.000001,          # offset the display reference point by 1us
+    },
+    'trigger': {
+        'SWEep': 'NORMal',              # set acquisition mode to NORMAL
+        'EDGE:COUPling': 'DC',          # options AC | DC | LFReject
+        'HFReject': 'OFF',              # options: ON | OFF; interferes with LFReject above
+        'NREJect': 'OFF',               # options: ON | OFF
+        'MODE': 'GLITch',               # options EDGE | GLITch | PATTern | TV
+        'GLITch:LEVel': '3,CHANnel1',
+        'GLITch:POLarity': 'POSitive',
+        'GLITch:QUALifier': 'RANGe',
+        'GLITch:RANGe': '1.8us,2.2us',
+    },
+    'measure': ['VTOP CHANnel1', 'VBASe CHANnel1', 'VTOP CHANnel2', 'VBASe CHANnel2'],
+}
 
+# set oscilloscope
+measure_can.init()
+measure_can.apply_profile(can_levels_profile)
 measure_can.send(':RUN')
-
-# set trigger
-# set the correct pattern trigger settings:
-measure_can.send(':TRIGger:MODE GLITch')  # options EDGE | GLITch | PATTern | TV
-measure_can.send(f':TRIGger:GLITch:LEVel 3, CHANnel1')
-# measure_can.send(':TRIGger:GLITch:SOURce CHANnel1')
-measure_can.send(':TRIGger:GLITch:POLarity POSitive')
-measure_can.send(':TRIGger:GLITch:QUALifier RANGe')
-measure_can.send(':TRIGger:GLITch:RANGe 1.8us,2.2us')
-measure_can.send(':TIMebase:POSition -0.000001')  # offset the display reference point by 1us
-
-measure_can.send(':MEASure:CLEar')
-measure_can.send(':MEASure:VTOP CHANnel1')
-measure_can.send(':MEASure:VBASe CHANnel1')
-measure_can.send(':MEASure:VTOP CHANnel2')
-measure_can.send(':MEASure:VBASe CHANnel2')
+measure_can.flush()  # apply the queued settings before stepping the PSU
 
 for vbatt in VBATT:
 
@@ -130,6 +113,7 @@ for vbatt in VBATT:
     measure_can.send(':STOP')
     measure_can.get_screen(can_levels, res_path)  # save oscilloscope screen to image file
     measure_can.send(':RUN')
+    measure_can.flush()
 
 psu.set_voltage(VBATT[1])
 # **************************************************************************
@@ -150,12 +134,13 @@ measure_can.send(':MEASure:PWIDth MATH')
 can_bit_time = 'CAN_DOM_Bit_Time.bmp'
 can_bit_time_log = 'CAN_DOM_Bit_Time.txt'
 
+measure_can.flush()  # apply the queued settings before waiting for the signal
 time.sleep(slp_time)
 # get statistics over 100 measurements
-# this is intentionally built-in for oscilloscopes with no measurement statistics
+# on-scope statistics are used if available, otherwise segmented memory, captured waveforms or polling
 filepath = results_path + can_bit_time_log
 log = open(filepath, 'a')
-log.write(measure_can.get_measurement_statistics('PWIDth', 100))
+log.write(str(measure_can.get_measurement_statistics('PWIDth', 100)))
 log.close()
 
 measure_can.send(':STOP')
@@ -172,10 +157,11 @@ measure_can.send(':MEASure:NWIDth MATH')
 can_bit_time = 'CAN_REC_Bit_Time.bmp'
 can_bit_time_log = 'CAN_REC_Bit_Time.txt'
 
+measure_can.flush()  # apply the queued settings before waiting for the signal
 time.sleep(slp_time)
 filepath = results_path + can_bit_time_log
 log = open(filepath, 'a')
-log.write(measure_can.get_measurement_statistics('NWIDth', 100))
+log.write(str(measure_can.get_measurement_statistics('NWIDth', 100)))
 log.close()
 
 measure_can.send(':STOP')
@@ -9,11 +9,14 @@ import os
 
 # address can be obtained from the device itmeasure_can pressing Utility -> IO. VISA address will be displayed in
 # a new window. Pass it as string when creating the object or create variable like:
-address = 'USB0::0x0957::0x1798::MY59124127::0::INSTR'
+# DSOX_ADDRESS environment variable overrides the address, e.g. 'SIM::CAN_LOOP' runs on simulated oscilloscope:
+address = os.environ.get('DSOX_ADDRESS', 'USB0::0x0957::0x1798::MY59124127::0::INSTR')
 
 # set the filesystem path where the results will be stored:
 # NOTE: double \\ is required to escape the special character \.
 results_path = f'C:\\Users\\glyubeno\\Desktop\\Volvo-Trucks\\Test_plan\\CAN\\VTNA-TestPlan\\2021-Nov\\CAN_BB2\\23C\\'
+# DSOX_RESULTS_PATH environment variable (ending with path separator) overrides the path:
+results_path = os.environ.get('DSOX_RESULTS_PATH', results_path)
 # if path does not exist then create it:
 if os.path.exists(results_path):
     pass
@@ -33,54 +36,39 @@ measure_can = keysight_DSOX2000A_3000A.Oscilloscope(address)
 # Note: The measurement needs to be performed statistically over 100 samples for one speed configuration (for CAN or
 # CAN‐FD, CAN Classic chosen).
 #
-# set oscilloscope
-measure_can.init()
 # setup oscilloscope or this particular test
-# setting oscilloscope channels common settings
-# turn required channels ON, keep others OFF:
-measure_can.send(':CHANnel1:DISPlay ON')
-measure_can.send(':CHANnel2:DISPlay ON')
-measure_can.send(':CHANnel3:DISPlay OFF')
-measure_can.send(':CHANnel4:DISPlay OFF')
-# set proper labels on the ON channels and display them:
-measure_can.send(':CHANnel1:LABel "CAN_TXD"')
-measure_can.send(':CHANnel2:LABel "CAN_RXD"')
-measure_can.send(':DISPlay:LABel ON')
-
-# setting Y parameters
-# channel 1 specific settings
-measure_can.send(':CHANnel1:SCALe 0.5')  # 500mV/div
-measure_can.send(':CHANnel1:OFFSet 1.5')  # offset with 1.5V to measure full scale
-measure_can.send(':CHANnel1:BWLimit ON')  # options ON | OFF
-
-# channel 2 specific settings
-measure_can.send(':CHANnel2:SCALe 0.5')  # 500mV/div
-measure_can.send(':CHANnel2:OFFSet 1.5')  # offset with 1.5V to measure full scale
-measure_can.send(':CHANnel2:BWLimit ON')  # options ON | OFF
-
-# setting X parameters
-measure_can.send(':TIMebase:MODE MAIN')  # timebase mode: MAIN, WINDow, XY, ROLL
-# set 20ns/div for delay time measurement
-measure_can.send(':TIMebase:SCALe 0.00000002')  # 20ns/div; main window horizontal scale
-# set the time reference to the screen center:
-measure_can.send(':TIMebase:REFerence CENTer')  # options: LEFT | CENTer | RIGHt
-measure_can.send(':TIMebase:POSition 0.00000008')  # time interval between the trigger event and the display point
-
-# # set trigger settings
-measure_can.send(':TRIGger:SWEep NORMal')  # set acquisition mode to NORMAL
-measure_can.send(':TRIGger:EDGE:COUPling DC')  # options AC | DC | LFReject
-measure_can.send(':TRIGger:HFReject OFF')  # options: ON | OFF; interferes with LFReject above
-measure_can.send(':TRIGger:NREJect OFF')  # options: ON | OFF
+can_delay_profile = {
+    'channels': {
+        # turn required channels ON, keep others OFF and set proper labels on the ON channels:
+        1: {'DISPlay': 'ON', 'LABel': 'CAN_TXD', 'SCALe': 0.5, 'OFFSet': 1.5, 'BWLimit': 'ON'},  # 500mV/div
+        2: {'DISPlay': 'ON', 'LABel': 'CAN_RXD', 'SCALe': 0.5, 'OFFSet': 1.5, 'BWLimit': 'ON'},  # 500mV/div
+        3: {'DISPlay': 'OFF'},
+        4: {'DISPlay': 'OFF'},
+    },
+    'display': {'LABel': 'ON'},
+    'timebase': {
+        'MODE': 'MAIN',                 # timebase mode: MAIN, WINDow, XY, ROLL
+        'SCALe': 0.00000002,            # 20ns/div for delay time measurement
+        'REFerence': 'CENTer',          # set the time reference to the screen center
+        'POSition': 0.00000008,         # time interval between the trigger event and the display point
+    },
+    'trigger': {
+        'SWEep': 'NORMal',              # set acquisition mode to NORMAL
+        'EDGE:COUPling': 'DC',          # options AC | DC | LFReject
+        'HFReject': 'OFF',              # options: ON | OFF; interferes with LFReject above
+        'NREJect': 'OFF',               # options: ON | OFF
+        'MODE': 'EDGE',
+        'EDGE:SOURce': 'CHANnel1',
+        'EDGE:SLOPe': 'NEGative',
+    },
+}
 
+# set oscilloscope
+measure_can.init()
+measure_can.apply_profile(can_delay_profile)
+measure_can.send(':TRIGger:LEVel:ASETup')
 measure_can.send(':RUN')
 
-# set trigger
-# set the correct pattern trigger settings:
-measure_can.send(':TRIGger:MODE EDGE')
-measure_can.send(':TRIGger:EDGE:SOURce CHANnel1')
-measure_can.send(':TRIGger:EDGE:SLOPe NEGative')
-measure_can.send(f':TRIGger:LEVel:ASETup')
-
 # measure tloop1
 # 2.1 tloop1 between 30% of TxD falling edge to 30% of the RXD falling edge and
 # Note: The measurement needs to be performed statistically over 100 samples
@@ -99,10 +87,10 @@ can_tloop1_time = 'CAN_Tloop1_Time.bmp'
 can_tloop1_time_log = 'CAN_Tloop1_Time.txt'
 
 # get statistics over 100 measurements
-# this is intentionally built-in for oscilloscopes with no measurement statistics
+# on-scope statistics are used if available, otherwise segmented memory, captured waveforms or polling
 filepath = results_path + can_tloop1_time_log
 log = open(filepath, 'a')
-log.write(measure_can.get_measurement_statistics('DELay', 100))
+log.write(str(measure_can.get_measurement_statistics('DELay', 100)))
 log.close()
 
 measure_can.send(':STOP')
@@ -132,10 +120,10 @@ can_tloop2_time = 'CAN_Tloop2_Time.bmp'
 can_tloop2_time_log = 'CAN_Tloop2_Time.txt'
 
 # get statistics over 100 measurements
-# this is intentionally built-in for oscilloscopes with no measurement statistics
+# on-scope statistics are used if available, otherwise segmented memory, captured waveforms or polling
 filepath = results_path + can_tloop2_time_log
 log = open(filepath, 'a')
-log.write(measure_can.get_measurement_statistics('DELay', 100))
+log.write(str(measure_can.get_measurement_statistics('DELay', 100)))
 log.close()
 
 measure_can.send(':STOP')
@@ -179,10 +167,10 @@ measure_can.send(':RUN')
 # can_bit_time_log = 'CAN_34_DOM_Bit_Time.txt'
 #
 # # get statistics over 100 measurements
-# # this is intentionally built-in for oscilloscopes with no measurement statistics
+# # on-scope statistics are used if available, otherwise segmented memory, captured waveforms or polling
 # filepath = results_path + can_bit_time_log
 # log = open(filepath, 'a')
-# log.write(measure_can.get_measurement_statistics('PWIDth', 100))
+# log.write(str(measure_can.get_measurement_statistics('PWIDth', 100)))
 # log.close()
 #
 # measure_can.send(':STOP')
@@ -201,7 +189,7 @@ measure_can.send(':RUN')
 #
 # filepath = results_path + can_bit_time_log
 # log = open(filepath, 'a')
-# log.write(measure_can.get_measurement_statistics('NWIDth', 100))
+# log.write(str(measure_can.get_measurement_statistics('NWIDth', 100)))
 # log.close()
 #
 # measure_can.send(':STOP')
@@ -1,8 +1,12 @@
 """
 This module is an example usage of class I2C. It represents complete I2C bus analysis for the following tests:
 1. test 1
+
+Tests are described as steps of test plan run by `scope_testplan.TestPlanRunner`: steps sharing trigger and timebase
+settings are run together and duration of every phase is reported at the end.
 """
 import keysight_DSOX2000A_3000A
+import scope_testplan
 import sys
 import os
 import time
@@ -35,11 +39,14 @@ import time
 
 # address can be obtained from the device itself pressing Utility -> IO. VISA address will be displayed in
 # a new window. Pass it as string when creating the object or create variable like:
-address = 'USB0::0x0957::0x17A4::MY53280562::0::INSTR'
+# DSOX_ADDRESS environment variable overrides the address, e.g. 'SIM::I2C' runs on simulated oscilloscope:
+address = os.environ.get('DSOX_ADDRESS', 'USB0::0x0957::0x17A4::MY53280562::0::INSTR')
 
 # set the filesystem path where the results will be stored
 # double \\ is required to escape the special character.
 results_path = 'C:\\Users\\user\\Desktop\\Unitary_Tests\\pdoc\\'
+# DSOX_RESULTS_PATH environment variable (ending with path separator) overrides the path:
+results_path = os.environ.get('DSOX_RESULTS_PATH', results_path)
 
 # if path does not exist then create it:
 if os.path.exists(results_path):
@@ -52,268 +59,62 @@ log_file = 'I2C_Measurements.txt'
 
 measure_i2c = keysight_DSOX2000A_3000A.I2C(address)
 
-# **************************************************************************
-# measure DC levels for Master (SCL, SDA) and Slave (SDA at ACK)
-# DC levels for Master (SCL, SDA):
-i2c_levels_master = 'I2C_DC_Levels_master.png'
-# prepare oscilloscope to fetch correct image
-measure_i2c.set_unit_for_i2c()
-measure_i2c.set_meas_signal_levels("master")
-measure_i2c.set_trig_i2c_start()
-
-time.sleep(1)
-# turn on the DUT as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_on()
-time.sleep(1)
-
-measure_i2c.get_trigger()  # poll the oscilloscope until trigger is found
-measure_i2c.get_screen(i2c_levels_master, results_path)  # save oscilloscope screen to image file
-measure_i2c.get_measured_values(log_file, results_path)
-
-# turn off the DUT to prepare it for next test as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_off()
-
-time.sleep(3)
-
-# DC levels for Slave (SDA Low at ACK):
-i2c_levels_slave = 'I2C_DC_Levels_slave.png'
-# prepare oscilloscope to fetch correct image
-measure_i2c.set_unit_for_i2c()
-measure_i2c.set_meas_signal_levels("slave")  # important to mention the slave measurement
-measure_i2c.set_trig_i2c_start()
-
-time.sleep(1)
-# turn on the DUT as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_on()
-time.sleep(1)
-
-measure_i2c.get_trigger()  # poll the oscilloscope until trigger is found
-measure_i2c.get_screen(i2c_levels_slave, results_path)  # save oscilloscope screen to image file
-measure_i2c.get_measured_values(log_file, results_path)
-
-# turn off the DUT to prepare it for next test as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_off()
-
-time.sleep(3)
-# **************************************************************************
-
-# **************************************************************************
-# Measure I2C signal rise/fall times:
-i2c_slew_rate_img = 'I2C_Slew_Rate.png'
-measure_i2c.set_unit_for_i2c()
-measure_i2c.set_meas_rise_fall_times()
-measure_i2c.set_trig_i2c_sda_bit()
-
-time.sleep(1)
-# turn on the DUT as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_on()
-time.sleep(1)
-
-measure_i2c.get_trigger()  # poll the oscilloscope until trigger is found
-measure_i2c.get_screen(i2c_slew_rate_img, results_path)  # save oscilloscope screen to image file
-measure_i2c.get_measured_values(log_file, results_path)
-
-# turn off the DUT to prepare it for next test as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_off()
-
-time.sleep(3)
-# **************************************************************************
-
-# **************************************************************************
-# Measure I2C SCL frequency and High/Low times:
-i2c_scl_freq_img = 'I2C_SCL_Frequency.png'
-measure_i2c.set_unit_for_i2c()
-measure_i2c.set_meas_scl_freq_duty()
-measure_i2c.set_trig_i2c_sda_bit()
-
-time.sleep(1)
-# turn on the DUT as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_on()
-time.sleep(1)
-
-measure_i2c.get_trigger()  # poll the oscilloscope until trigger is found
-measure_i2c.get_screen(i2c_scl_freq_img, results_path)  # save oscilloscope screen to image file
-measure_i2c.get_measured_values(log_file, results_path)
-
-# turn off the DUT to prepare it for next test as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_off()
-
-time.sleep(3)
-# **************************************************************************
-
-# **************************************************************************
-# Measure I2C SDA setup time:
-i2c_sda_set_hold_img = 'I2C_SDA_Setup.png'
-measure_i2c.set_unit_for_i2c()
-measure_i2c.set_meas_sda_setup()
-measure_i2c.set_trig_i2c_sda_bit()
-
-time.sleep(1)
-# turn on the DUT as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_on()
-time.sleep(1)
-
-measure_i2c.get_trigger()  # poll the oscilloscope until trigger is found
-measure_i2c.get_screen(i2c_sda_set_hold_img, results_path)  # save oscilloscope screen to image file
-measure_i2c.get_measured_values(log_file, results_path)
-
-# turn off the DUT to prepare it for next test as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_off()
-
-time.sleep(3)
-# **************************************************************************
-
-# **************************************************************************
-# Measure I2C SDA hold time:
-i2c_sda_set_hold_img = 'I2C_SDA_Hold.png'
-measure_i2c.set_unit_for_i2c()
-measure_i2c.set_meas_sda_hold()
-measure_i2c.set_trig_i2c_sda_bit()
-
-time.sleep(1)
-# turn on the DUT as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_on()
-time.sleep(1)
-
-measure_i2c.get_trigger()  # poll the oscilloscope until trigger is found
-measure_i2c.get_screen(i2c_sda_set_hold_img, results_path)  # save oscilloscope screen to image file
-measure_i2c.get_measured_values(log_file, results_path)
-
-# turn off the DUT to prepare it for next test as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_off()
-
-time.sleep(3)
-# **************************************************************************
-
-# **************************************************************************
-# Measure I2C repeated start setup time:
-i2c_restart_set_hold_img = 'I2C_ReStart_Setup.png'
-measure_i2c.set_unit_for_i2c()
-measure_i2c.set_meas_restart_setup()
-measure_i2c.set_trig_i2c_restart()
-# NOTE: if oscilloscope has Serial BUS trigger package the following can also be used:
-# measure_i2c.set_trig_i2c_restart_sbus()
-
-time.sleep(1)
-# turn on the DUT as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_on()
-time.sleep(1)
-
-measure_i2c.get_trigger()  # poll the oscilloscope until trigger is found
-measure_i2c.get_screen(i2c_restart_set_hold_img, results_path)  # save oscilloscope screen to image file
-measure_i2c.get_measured_values(log_file, results_path)
-
-# turn off the DUT to prepare it for next test as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_off()
-
-time.sleep(3)
-# **************************************************************************
-
-# **************************************************************************
-# Measure I2C repeated start hold time:
-i2c_restart_set_hold_img = 'I2C_ReStart_Hold.png'
-measure_i2c.set_unit_for_i2c()
-measure_i2c.set_meas_restart_hold()
-measure_i2c.set_trig_i2c_restart()
-# NOTE: if oscilloscope has Serial BUS trigger package the following can also be used:
-# measure_i2c.set_trig_i2c_restart_sbus()
-
-time.sleep(1)
-# turn on the DUT as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_on()
-time.sleep(1)
-
-measure_i2c.get_trigger()  # poll the oscilloscope until trigger is found
-measure_i2c.get_screen(i2c_restart_set_hold_img, results_path)  # save oscilloscope screen to image file
-measure_i2c.get_measured_values(log_file, results_path)
-
-# turn off the DUT to prepare it for next test as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_off()
-
-time.sleep(3)
-# **************************************************************************
-
-# **************************************************************************
-# Measure I2C start hold time:
-i2c_start_hold_img = 'I2C_Start_Hold.png'
-measure_i2c.set_unit_for_i2c()
-measure_i2c.set_meas_restart_hold()  # same measurement but on Start condition so this function is applicable
-measure_i2c.set_trig_i2c_start()
-# NOTE: if oscilloscope has Serial BUS trigger package the following can also be used:
-# measure_i2c.set_trig_i2c_restart_sbus()
-
-time.sleep(1)
-
-measure_i2c.get_trigger()  # poll the oscilloscope until trigger is found
-measure_i2c.get_screen(i2c_start_hold_img, results_path)  # save oscilloscope screen to image file
-measure_i2c.get_measured_values(log_file, results_path)
-
-time.sleep(3)
-# **************************************************************************
-
-# **************************************************************************
-# Measure I2C stop setup time:
-i2c_stop_setup_img = 'I2C_Stop_Setup.png'
-measure_i2c.set_unit_for_i2c()
-measure_i2c.set_meas_stop_setup()
-measure_i2c.set_trig_i2c_stop()
-
-time.sleep(1)
-# turn on the DUT as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_on()
-time.sleep(1)
-
-measure_i2c.get_trigger()  # poll the oscilloscope until trigger is found
-measure_i2c.get_screen(i2c_stop_setup_img, results_path)  # save oscilloscope screen to image file
-measure_i2c.get_measured_values(log_file, results_path)
-
-# turn off the DUT to prepare it for next test as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_off()
-
-time.sleep(3)
-# **************************************************************************
-
-# **************************************************************************
-# Measure I2C bus free time:
-i2c_bus_free_img = 'I2C_Bus_Free.png'
-measure_i2c.set_unit_for_i2c()
-measure_i2c.set_meas_i2c_bus_free_time()
-measure_i2c.set_trig_i2c_stop()
-
-time.sleep(1)
-# turn on the DUT as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_on()
-time.sleep(1)
-
-measure_i2c.get_trigger()  # poll the oscilloscope until trigger is found
-measure_i2c.get_screen(i2c_bus_free_img, results_path)  # save oscilloscope screen to image file
-measure_i2c.get_measured_values(log_file, results_path)
-
-# turn off the DUT to prepare it for next test as the communication exists only on boot.
-# If bus is always busy comment the if statement
-# psu.output_off()
-
-time.sleep(3)
-# **************************************************************************
+# turn on the DUT before the trigger as the communication exists only on boot and turn it off after the test,
+# add to the steps below (if bus is always busy leave them out):
+#     'before': lambda scope: psu.output_on(),
+#     'after': lambda scope: psu.output_off(),
+# instead of fixed sleeps wait for a condition, e.g. until the PSU output is settled:
+#     'wait_for': lambda scope, runner: abs(psu.get_voltage() - 28) < 0.1,
+
+
+def log_timing(scope):
+    """All I2C timing parameters from one capture, computed on the computer for every bit in the record."""
+    scope.log_i2c_timing(log_file, results_path, scope.analyze_i2c_timing())
+
+
+steps = [
+    # measure DC levels for Master (SCL, SDA) and Slave (SDA at ACK)
+    {'name': 'DC levels master', 'setup': 'set_unit_for_i2c', 'measure': ('set_meas_signal_levels', 'master'),
+     'trigger': 'set_trig_i2c_start', 'screen': 'I2C_DC_Levels_master.png', 'log': log_file},
+    # important to mention the slave measurement (SDA Low at ACK):
+    {'name': 'DC levels slave', 'setup': 'set_unit_for_i2c', 'measure': ('set_meas_signal_levels', 'slave'),
+     'trigger': 'set_trig_i2c_start', 'screen': 'I2C_DC_Levels_slave.png', 'log': log_file},
+    # Measure I2C signal rise/fall times:
+    {'name': 'Rise/fall times', 'setup': 'set_unit_for_i2c', 'measure': 'set_meas_rise_fall_times',
+     'trigger': 'set_trig_i2c_sda_bit', 'screen': 'I2C_Slew_Rate.png', 'log': log_file},
+    # Measure I2C SCL frequency and High/Low times:
+    {'name': 'SCL frequency', 'setup': 'set_unit_for_i2c', 'measure': 'set_meas_scl_freq_duty',
+     'trigger': 'set_trig_i2c_sda_bit', 'screen': 'I2C_SCL_Frequency.png', 'log': log_file},
+    # Measure I2C SDA setup time:
+    {'name': 'SDA setup time', 'setup': 'set_unit_for_i2c', 'measure': 'set_meas_sda_setup',
+     'trigger': 'set_trig_i2c_sda_bit', 'screen': 'I2C_SDA_Setup.png', 'log': log_file},
+    # Measure I2C SDA hold time:
+    {'name': 'SDA hold time', 'setup': 'set_unit_for_i2c', 'measure': 'set_meas_sda_hold',
+     'trigger': 'set_trig_i2c_sda_bit', 'screen': 'I2C_SDA_Hold.png', 'log': log_file},
+    # Measure I2C repeated start setup time
+    # NOTE: if oscilloscope has Serial BUS trigger package 'set_trig_i2c_restart_sbus' can also be used:
+    {'name': 'ReStart setup time', 'setup': 'set_unit_for_i2c', 'measure': 'set_meas_restart_setup',
+     'trigger': 'set_trig_i2c_restart', 'screen': 'I2C_ReStart_Setup.png', 'log': log_file},
+    # Measure I2C repeated start hold time:
+    {'name': 'ReStart hold time', 'setup': 'set_unit_for_i2c', 'measure': 'set_meas_restart_hold',
+     'trigger': 'set_trig_i2c_restart', 'screen': 'I2C_ReStart_Hold.png', 'log': log_file},
+    # Measure I2C start hold time (same measurement but on Start condition so the function is applicable):
+    {'name': 'Start hold time', 'setup': 'set_unit_for_i2c', 'measure': 'set_meas_restart_hold',
+     'trigger': 'set_trig_i2c_start', 'screen': 'I2C_Start_Hold.png', 'log': log_file},
+    # Measure I2C stop setup time:
+    {'name': 'Stop setup time', 'setup': 'set_unit_for_i2c', 'measure': 'set_meas_stop_setup',
+     'trigger': 'set_trig_i2c_stop', 'screen': 'I2C_Stop_Setup.png', 'log': log_file},
+    # Measure I2C bus free time:
+    {'name': 'Bus free time', 'setup': 'set_unit_for_i2c', 'measure': 'set_meas_i2c_bus_free_time',
+     'trigger': 'set_trig_i2c_stop', 'screen': 'I2C_Bus_Free.png', 'log': log_file},
+    # All I2C timing parameters from one capture, 1ms on screen to capture several bytes:
+    {'name': 'Timing analysis', 'setup': 'set_unit_for_i2c', 'profile': {'timebase': {'SCALe': 0.0001}},
+     'trigger': 'set_trig_i2c_start', 'screen': 'I2C_Timing_Capture.png', 'analysis': log_timing},
+]
+
+# checkpoint file lets interrupted run resume from the first incomplete step (delete it to run all steps again):
+runner = scope_testplan.TestPlanRunner(measure_i2c, results_path, checkpoint=results_path + 'I2C_checkpoint.json')
+runner.run(steps)
 
 del measure_i2c
 sys.exit("Normal termination.")
@@ -0,0 +1,70 @@
+"""
+Benchmark of `waveform_analysis` kernels on synthetic deep-memory records (4 Mpts per channel by default, the record
+length of DSOX3000A). Every kernel must process the whole record in less than `LIMIT` seconds.
+
+Usage: python analysis_benchmark.py [points]
+"""
+import sys
+from time import perf_counter
+import numpy as np
+
+try:
+    from . import waveform_analysis as wa
+except ImportError:     # module used as script from its own directory
+    import waveform_analysis as wa
+
+POINTS = 4_000_000
+LIMIT = 1.0             # [s] per kernel and record
+
+
+def synthetic_signal(points, period=1000, delay=0, rise=20, noise=0.02, seed=0):
+    """
+    Returns (t, x) square wave 0..3.3 V with `period` samples, delayed by `delay` samples, edges smoothed to about
+    `rise` samples and gaussian `noise` [V] added. Sample interval is 1 ns.
+    """
+    rng = np.random.default_rng(seed)
+    n = np.arange(points)
+    x = np.where(((n + delay) % period) < period // 2, 3.3, 0.0)
+    x = np.convolve(x, np.ones(rise) / rise, mode='same') + rng.normal(0, noise, points)
+
+    return n * 1e-9, x
+
+
+def measure(name, function, *args):
+    """Runs `function` on `args` and prints its duration and the number of results. Returns duration [s]."""
+    start = perf_counter()
+    result = function(*args)
+    duration = perf_counter() - start
+    values = result.values() if isinstance(result, dict) else result if isinstance(result, tuple) else (result,)
+    count = sum(np.size(v) for v in values)
+    status = 'OK' if duration < LIMIT else 'SLOW'
+    print(f'{name:<16}{duration * 1000:>10.1f} ms{count:>10} results  {status}')
+
+    return duration
+
+
+def main(points=POINTS):
+    print(f'Generating 2 channels x {points} points.')
+    t, a = synthetic_signal(points)
+    b = synthetic_signal(points, delay=-100, seed=1)[1]
+    low, high = wa.thresholds(a)
+    middle = wa.percent_level(a, 50)
+    edges = wa.find_edges(t, a, low, high)
+
+    durations = [
+        measure('signal_levels', wa.signal_levels, a),
+        measure('find_edges', wa.find_edges, t, a, low, high),
+        measure('crossings', wa.crossings, t, a, middle, 0.3),
+        measure('rise_times', wa.rise_times, edges),
+        measure('pulse_widths', wa.pulse_widths, t, a, middle, 0.3),
+        measure('periods', wa.periods, t, a, middle, 0.3),
+        measure('edge_delays', wa.edge_delays, t, a, b, middle, middle, True, True, 0.3),
+        measure('i2c_timing', wa.i2c_timing, t, a, b),
+    ]
+    print(f'Total {sum(durations):.3f} s, slowest {max(durations):.3f} s (limit {LIMIT} s per kernel).')
+
+    return max(durations) < LIMIT
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main(int(sys.argv[1]) if len(sys.argv) > 1 else POINTS) else 1)
@@ -0,0 +1,56 @@
+"""
+Benchmark of the import time of the modules. Every import is measured in a fresh interpreter (median of `--runs`
+runs) and it is checked whether `pyvisa` was loaded by it. The last line, importing `pyvisa` together with
+`keysight_DSOX2000A_3000A`, is the cost of the module before the transport was imported lazily (paid now on the first
+connection to a real oscilloscope).
+
+Usage: python import_benchmark.py [--runs N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+IMPORTS = (
+    'waveform_analysis',
+    'keysight_DSOX2000A_3000A',
+    'scope_orchestrator',
+    'pyvisa, keysight_DSOX2000A_3000A',
+)
+
+PROBE = """
+import sys
+from time import perf_counter
+start = perf_counter()
+import {modules}
+print(perf_counter() - start, 'pyvisa' in sys.modules)
+"""
+
+
+def measure(modules, runs):
+    """Returns median import time [s] of `modules` in fresh interpreters and whether pyvisa was imported."""
+    times = []
+    loaded = False
+    for _ in range(runs):
+        reply = subprocess.run([sys.executable, '-c', PROBE.format(modules=modules)], capture_output=True, text=True,
+                               check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        times.append(float(reply[0]))
+        loaded = reply[1] == 'True'
+
+    return statistics.median(times), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import time of the modules in fresh interpreters.')
+    parser.add_argument('--runs', type=int, default=10, help='number of runs per import (default 10)')
+    args = parser.parse_args()
+
+    print(f'{"import":<36}{"time [ms]":>11}  pyvisa loaded')
+    for modules in IMPORTS:
+        duration, loaded = measure(modules, args.runs)
+        print(f'{modules:<36}{duration * 1000:>11.1f}  {loaded}')
+
+
+if __name__ == '__main__':
+    main()
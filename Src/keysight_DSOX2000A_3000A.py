@@ -15,9 +15,127 @@ in module `DSOX_I2C_example.py`
 
 Class Power also inherits class Oscilloscope and is considered to provide specific methods for describing PSU
 validation tests.
+
+PyVisa is imported on the first connection to a real oscilloscope (see `scope_connection`), so the module can be
+imported for offline work such as generating documentation or analyzing stored waveforms without loading the VISA
+machinery. `import_benchmark.py` measures the import time.
 """
-import pyvisa as visa
-from time import sleep
+import numpy as np
+import hashlib
+import json
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, sleep, time
+
+try:
+    from . import scope_connection
+    from . import scope_profiles
+    from . import scope_results
+    from . import scope_simulator
+    from . import waveform_analysis
+except ImportError:     # module used as script from its own directory
+    import scope_connection
+    import scope_profiles
+    import scope_results
+    import scope_simulator
+    import waveform_analysis
+
+CACHED_HEADERS = (':CHAN', ':TIM', ':TRIG', ':DISP:LAB', ':SAVE:IMAG', ':ACQ', ':FUNC', ':SBUS', ':MEAS:SOUR',
+                  ':MEAS:STAT')
+"""Command headers (short form, see `scope_simulator.short_form()`) describing instrument settings. Only these are
+kept in `Oscilloscope.state` and skipped by `Oscilloscope.send()` when the value is already in effect. Measurement
+definitions (:MEASure:DEFine) are kept per definition, thresholds per measurement source. Actions such as :RUN or
+adding measurements are never cached."""
+
+UNCACHED_SETTING_HEADERS = (':WAV', ':MARK', ':SEAR', ':DVM', ':MTES')
+"""Command headers (short form) of settings not kept in `Oscilloscope.state`, because the oscilloscope changes them
+on its own (e.g. :WAVeform:POINts with the points mode). Only reset undoes them, so after any of them the deferred reset
+of `Oscilloscope.init()` is always done."""
+
+RESET_HEADERS = ('*RST', ':SYST:PRES')
+"""Commands after which the oscilloscope settings are the known default ones."""
+
+UNKNOWN_STATE_HEADERS = ('*RCL', ':AUT')
+"""Commands after which the oscilloscope settings are not known anymore."""
+
+TriggerEvent = namedtuple('TriggerEvent', ['timestamp', 'wait_time', 'method'])
+"""Result of `Oscilloscope.get_trigger()`: computer time of the trigger detection, wait duration in seconds and
+detection method ('srq' or 'poll')."""
+
+WAVEFORM_PREAMBLE = ('format', 'type', 'points', 'count', 'xincrement', 'xorigin', 'xreference', 'yincrement',
+                     'yorigin', 'yreference')
+"""Fields of :WAVeform:PREamble? reply in order. See `Oscilloscope.get_preamble()`."""
+
+SCREEN_FORMATS = {'.png': 'PNG', '.bmp': 'BMP'}
+"""Image format of :DISPlay:DATA? chosen by `Oscilloscope.get_screen()` for the file name extension."""
+
+DISPLAY_FORMATS = {'BMP24BIT': 'BMP', 'BMP8BIT': 'BMP8bit', 'BMP': 'BMP', 'PNG': 'PNG'}
+"""Format arguments of :DISPlay:DATA? for the values of :SAVE:IMAGe:FORMat."""
+
+BLOCK_CHUNK = 1024 * 1024
+"""Size in bytes of the chunks binary blocks are streamed to file in by `Oscilloscope.read_block()`."""
+
+TRACE_FIELDS = ('start', 'duration', 'direction', 'command', 'bytes', 'retries', 'errors')
+"""Fields of SCPI transaction records kept in `Oscilloscope.trace`: start [s] since `Oscilloscope.enable_trace()`,
+duration [s], direction ('write', 'query' or 'binary'), command string, bytes transferred in both directions, number of
+reconnections (see `scope_connection`) and errors reported by the error queue at the following barrier point (*None*
+if not checked)."""
+
+SETUP_SLOTS = tuple(range(10))
+"""Internal setup registers of the oscilloscope used by `Oscilloscope.use_setup()` (*SAV/*RCL 0..9)."""
+
+TRIGGER_MODES = ('EDGE', 'GLIT', 'PATT', 'TV', 'EBUR', 'OR', 'RUNT', 'SHOL', 'TRAN', 'DEL')
+"""Trigger modes (short form) having their own :TRIGger:<mode>:... settings. Settings of not selected mode have no
+effect."""
+
+STATISTICS_METHODS = ('statistics', 'segmented', 'waveform', 'poll')
+"""Ways `Oscilloscope.get_measurement_statistics()` can take the samples, in the order tried with method 'auto'."""
+
+WAVEFORM_MEASUREMENTS = ('PWID', 'NWID', 'PER', 'FREQ', 'RIS', 'FALL', 'DEL')
+"""Short forms of :MEASure parameters which can be computed over all edges of a captured waveform."""
+
+SEGMENT_MEASUREMENTS = WAVEFORM_MEASUREMENTS + ('VPP', 'VMAX', 'VMIN')
+"""Short forms of :MEASure parameters which can be computed from segmented acquisition (one value per segment for the
+voltage ones)."""
+
+INVALID_MEASUREMENT = 9.9e37
+"""Value returned by the oscilloscope when the measurement cannot be done (e.g. no edge on the screen)."""
+
+
+def write_file(filepath, data):
+    """
+    Writes bytes `data` to file `filepath` and returns the path. Used by the background writer of
+    `Oscilloscope.get_screen()`.
+    """
+    with open(filepath, 'wb') as f:
+        f.write(data)
+
+    return filepath
+
+
+class MeasurementStatistics(namedtuple('MeasurementStatistics', ['min', 'max', 'mean', 'std', 'count', 'method'])):
+    """
+    Result of `Oscilloscope.get_measurement_statistics()`: minimum, maximum, mean value and standard deviation of
+    `count` measurement samples taken by `method` (one of `STATISTICS_METHODS`). Converted to string it gives the
+    text logged by the test scripts.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        return f'Min period: {self.min}s, Max period: {self.max}s, Average period: {self.mean}s \n\n' \
+               f'Results based on {self.count} measurements'
+
+    @classmethod
+    def from_samples(cls, samples, method):
+        """Computes the statistics of measurement `samples` (invalid values are dropped)."""
+        samples = np.asarray(samples, dtype=float)
+        samples = samples[np.abs(samples) < INVALID_MEASUREMENT]
+        if len(samples) == 0:
+            return cls(np.nan, np.nan, np.nan, np.nan, 0, method)
+
+        return cls(float(np.min(samples)), float(np.max(samples)), float(np.mean(samples)), float(np.std(samples)),
+                   len(samples), method)
 
 
 class Oscilloscope:
@@ -26,26 +144,38 @@ class Oscilloscope:
     Also some data logging procedures are introduced in order to ease the data harvesting such as measurements
     with/without data processing, screen capture etc.
     """
-    def init(self):
+    def init(self, force=False):
         """
         Adjust oscilloscope general system parameters not related to measurement functionality.
         Parameters altered in sequence:
         1. set oscilloscope to Factory Default settings
         1. set Default Setup
         1. set image parameters to known values when saving picture
-        """
-        print("Initializing the oscilloscope.\n")
-        # set oscilloscope to its default settings:
-        self.send('*RST')
-        # same as pressing [Save/Recall] > Default/Erase > Factory Default
-        # When you perform a factory default setup, there are no user settings that remain unchanged.
 
-        self.send(':SYSTem:PRESet')
-        # # same as pressing the [Default Setup] key or [Save/Recall] > Default/Erase > Default Setup
-        # # When you perform a default setup, some user settings (like preferences) remain unchanged.
+        **Note:** if the oscilloscope state is already known (see `state`) the reset is deferred to the next barrier
+        point. There the commands sent after `init()` are compared with the settings changed since the last reset:
+        if they cover all of them only the differences are written, otherwise the full reset is done as usual. Settings
+        of `UNCACHED_SETTING_HEADERS` sent since the last reset always need the full reset. Pass `force=True` to always
+        reset.
+        """
+        if self.state_known and self.pipeline and not force and self.recording is None and not self.uncached_settings:
+            print("Updating the oscilloscope setup.\n")
+            self.setup_start = len(self.cmd_queue)
+            self.setup_cmds = []
+            self.setup_keys = set()
+        else:
+            print("Initializing the oscilloscope.\n")
+            # set oscilloscope to its default settings:
+            self.send('*RST')
+            # same as pressing [Save/Recall] > Default/Erase > Factory Default
+            # When you perform a factory default setup, there are no user settings that remain unchanged.
+
+            self.send(':SYSTem:PRESet')
+            # # same as pressing the [Default Setup] key or [Save/Recall] > Default/Erase > Default Setup
+            # # When you perform a default setup, some user settings (like preferences) remain unchanged.
 
         # basic settings:
-        self.send(':SAVE:IMAGe:FORMat BMP24bit')
+        self.send(':SAVE:IMAGe:FORMat PNG')     # options: PNG | BMP24bit | BMP8bit
         self.send(':SAVE:IMAGe:FACTors OFF')
         self.send(':SAVE:IMAGe:INKSaver OFF')
         self.send(':SAVE:IMAGe:PALette COLor')
@@ -57,20 +187,229 @@ class Oscilloscope:
         `cmd_str` can be any command correctly compiled from Keysight Command Expert tool in the format
         ':SAVE:IMAGe:PALette COLor' (with the ' to note it is type string).
 
-        **Note:** there is a built-in retry for 3 times if oscilloscope does not receive the command first time.
-        But this needs a bit more elaboration as SCPI interface has no acknowledge or feedback at all. The retry
-        mechanism is implemented by polling *operation complete* bit which might not be the best way. If any strange
-        behavior is observed with this method please report to: glyubeno@visteon.com.
+        **Pipelined mode (default):** commands are not written immediately but queued in `cmd_queue`. Consecutive
+        commands are joined with ';' into one write and synchronized with a single *OPC? at the next barrier point.
+        Barrier points are `flush()` itself, every `query()` and every method reading data from the oscilloscope.
+        Call `flush()` explicitly when the settings must be in effect before something outside the oscilloscope
+        happens (DUT power-up, sleep while waiting for signal etc.).
+
+        Set `pipeline` to *False* to write and synchronize every command on its own.
+
+        **Note:** SCPI interface has no acknowledge for commands. Instead of retrying blindly the error queue
+        (:SYSTem:ERRor?) is read at every barrier and reported. See `flush()`.
+
+        **Shadow cache:** settings sent to the oscilloscope are kept in `state`. A setting command whose value is
+        already in effect is skipped. See `CACHED_HEADERS` for which commands are considered settings.
+
+        Returns *True* if the command is written (or queued), *False* if skipped.
         """
-        self.unit.write(cmd_str)
-        for retry in range(3):
-            self.unit.write(cmd_str)
-            sleep(0.5)
-            if int(self.unit.query('*OPC?')) == 1:
-                # print(f'CMD {cmd_str} sent at {retry} try.')
+        if self.recording is not None:
+            self.recording.append(cmd_str)    # see record_setup()
+            return True
+
+        header, args = self.split_cmd(cmd_str)
+        key = self.state_key(header, args)
+        if self.setup_cmds is not None:
+            self.setup_cmds.append(cmd_str)
+            self.setup_keys.add(key)
+
+        if key is not None and key in self.state and self.same_args(self.state[key], args):
+            return False    # setting already in effect
+
+        self.update_state(header, args)
+        self.cmd_queue.append(cmd_str)
+        if not self.pipeline:
+            self.flush()
+
+        return True
+
+    @staticmethod
+    def split_cmd(cmd_str):
+        """
+        Splits command `cmd_str` in normalized (upper case short form, see `scope_simulator.short_form()`) header and
+        its arguments. For example ':CHANnel1:OFFSet 1.5' returns (':CHAN1:OFFS', '1.5').
+        """
+        header, _, args = cmd_str.strip().partition(' ')
+        args = ','.join(a.strip() for a in args.split(','))
+
+        return scope_simulator.short_form(header), args
+
+    @staticmethod
+    def normalize_args(args):
+        """
+        Returns arguments `args` in form comparing equal for the same setting: numbers by value (e.g. '1', '1.0' and
+        '+1.000000E+00' give '1.0'), keywords in short form (e.g. 'CHANnel1' and 'CHAN1' give 'CHAN1'). Quoted strings
+        are kept as they are.
+        """
+        normalized = []
+        for arg in args.split(','):
+            value = None if arg.startswith(('"', "'")) else scope_simulator.to_float(arg, None)
+            if value is not None:
+                normalized.append(repr(value))
+            elif arg.startswith(('"', "'")) or not arg.isalnum():
+                normalized.append(arg)
+            else:
+                normalized.append(scope_simulator.short_form(arg)[1:])
+
+        return ','.join(normalized)
+
+    def same_args(self, cached, args):
+        """Returns *True* if arguments `args` set the same value as `cached` ones (see `normalize_args()`)."""
+        return cached == args or self.normalize_args(cached) == self.normalize_args(args)
+
+    def state_key(self, header, args):
+        """
+        Returns key of the setting in the shadow cache `state` for command split by `split_cmd()`, or *None* if the
+        command is not a cached setting. Measurement definitions are kept per definition, thresholds per current
+        :MEASure:SOURce.
+        """
+        if not args:
+            return None
+        if header == ':MEAS:DEF':
+            definition = self.normalize_args(args.split(',')[0])
+            if definition != 'THR':
+                return f':MEAS:DEF {definition}'
+            source = self.state.get(':MEAS:SOUR')
+            return f':MEAS:DEF THR {self.normalize_args(source)}' if source else None
+        if header.startswith(CACHED_HEADERS):
+            return header
+
+        return None
+
+    def update_state(self, header, args):
+        """
+        Updates the shadow cache `state` with command split by `split_cmd()`. Reset commands clear the cache and
+        mark the state as known, commands like *RCL or :AUToscale mark it unknown.
+        """
+        key = self.state_key(header, args)
+        if header in RESET_HEADERS:
+            self.state.clear()
+            self.uncached_settings.clear()
+            self.state_known = True
+        elif header in UNKNOWN_STATE_HEADERS:
+            self.state.clear()
+            self.state_known = False
+        elif header.startswith(':TRIG:LEV:ASET'):
+            # trigger levels are set by the oscilloscope itself:
+            for key in [k for k in self.state if k.startswith(':TRIG') and 'LEV' in k]:
+                del self.state[key]
+        elif header.startswith(':MEAS:') and not header.startswith((':MEAS:SOUR', ':MEAS:DEF', ':MEAS:STAT')):
+            # measurement given with its sources changes the measurement source as well:
+            sources = [a for a in args.split(',') if a.upper().startswith(('CHAN', 'FUNC', 'MATH'))]
+            if sources:
+                self.state[':MEAS:SOUR'] = ','.join(sources)
+        elif key is not None:
+            self.state[key] = args
+        elif args and header.startswith(UNCACHED_SETTING_HEADERS):
+            self.uncached_settings.add(header)
+
+    def resolve_setup(self):
+        """
+        Decides on the reset deferred by `init()`. If commands sent since `init()` do not cover all settings changed
+        since the last reset the queue is replaced by full reset followed by all these commands.
+        """
+        trig_mode = self.normalize_args(self.state.get(':TRIG:MODE', 'EDGE'))
+        # settings of other trigger modes are checked again when their mode gets selected:
+        uncovered = [h for h in set(self.state) - self.setup_keys
+                     if not (h.startswith(':TRIG:') and h.split(':')[2] in TRIGGER_MODES
+                             and h.split(':')[2] != trig_mode)]
+        if uncovered:
+            print("Oscilloscope setup cannot be reached by update. Initializing the oscilloscope.\n")
+            self.cmd_queue = self.cmd_queue[:self.setup_start] + ['*RST', ':SYSTem:PRESet'] + self.setup_cmds
+            self.state.clear()
+            for cmd_str in self.cmd_queue:
+                self.update_state(*self.split_cmd(cmd_str))
+
+        self.setup_cmds = None
+
+    def flush(self):
+        """
+        Barrier point of the pipelined `send()`. Writes all queued commands joined with ';' (split in chunks not
+        longer than `max_batch_len` characters), waits once for *operation complete* and checks the SCPI error queue.
+
+        Returns list of error strings reported by the oscilloscope (empty list if all commands were accepted).
+        Errors are also printed in the console and kept in `last_errors`.
+        """
+        if self.setup_cmds is not None:
+            self.resolve_setup()
+        if not self.cmd_queue:
+            return []
+
+        batch = []
+        batch_len = 0
+        for cmd_str in self.cmd_queue:
+            # in compound command each command must start from the root of the command tree:
+            if not cmd_str.startswith((':', '*')):
+                cmd_str = ':' + cmd_str
+            if batch and batch_len + len(cmd_str) + 1 > self.max_batch_len:
+                self.traced('write', ';'.join(batch), self.unit.write, ';'.join(batch))
+                batch = []
+                batch_len = 0
+            batch.append(cmd_str)
+            batch_len += len(cmd_str) + 1
+        self.traced('write', ';'.join(batch), self.unit.write, ';'.join(batch))
+        sent = self.cmd_queue
+        self.cmd_queue = []
+
+        self.traced('query', '*OPC?', self.unit.query, '*OPC?')
+        self.last_errors = self.get_errors()
+        if self.trace is not None:
+            # errors belong to the batches written since the previous barrier point:
+            for record in reversed(self.trace):
+                if record['direction'] == 'write':
+                    if record['errors'] is not None:
+                        break
+                    record['errors'] = self.last_errors
+        if self.last_errors:
+            print(f'CMD batch {sent} failed with errors: {self.last_errors}')
+            # settings of the failed commands are not known:
+            self.state.clear()
+            self.state_known = False
+
+        return self.last_errors
+
+    def probe(self, *commands):
+        """
+        Checks whether the oscilloscope accepts `commands` (e.g. settings of optional features like segmented memory).
+        Commands queued before are flushed first, so their errors are reported by that flush and are not taken for
+        errors of the probe. The probed commands are written together, followed by *OPC? and reading the error queue.
+
+        Returns list of errors of the probed commands (empty list if all were accepted), kept in `last_errors` as
+        well. Settings of rejected probe are removed from the shadow cache, the other cached settings stay valid.
+        """
+        self.flush()
+        cmd_str = ';'.join(commands)
+        self.traced('write', cmd_str, self.unit.write, cmd_str)
+        self.traced('query', '*OPC?', self.unit.query, '*OPC?')
+        self.last_errors = self.get_errors()
+        if self.trace is not None:
+            for record in reversed(self.trace):
+                if record['direction'] == 'write':
+                    record['errors'] = self.last_errors
+                    break
+        for command in commands:
+            header, args = self.split_cmd(command)
+            if not self.last_errors:
+                self.update_state(header, args)
+            else:
+                self.state.pop(self.state_key(header, args), None)
+
+        return self.last_errors
+
+    def get_errors(self):
+        """
+        Reads the oscilloscope SCPI error queue until it is empty (`+0,"No error"`).
+        Returns list of the error strings as reported by the oscilloscope, e.g. `-113,"Undefined header"`.
+        """
+        errors = []
+        # error queue of DSOX2000A/3000A is 30 entries deep; limit the loop in case of communication issues:
+        for e in range(30):
+            error = self.traced('query', ':SYSTem:ERRor?', self.unit.query, ':SYSTem:ERRor?').strip()
+            if int(error.split(',')[0]) == 0:
                 break
-            elif retry == 2:
-                print(f'CMD {cmd_str} failed {retry} times!')
+            errors.append(error)
+
+        return errors
 
     def query(self, cmd_str):
         """
@@ -81,49 +420,287 @@ class Oscilloscope:
 
         Method returns the oscilloscope reply as string. Type casting is required if math or other data processing
         of the result is required.
+
+        **Note:** query is a barrier point for the pipelined `send()`: queued commands are flushed first.
         """
-        report = self.unit.query(cmd_str)
+        self.flush()
+        for command in cmd_str.split(';'):     # compound query may select measurement sources as well
+            if command.strip().upper().startswith((':MEAS', 'MEAS')):
+                self.update_state(*self.split_cmd(command))
+        report = self.traced('query', cmd_str, self.unit.query, cmd_str)
         """Document instance variable `report` post-variable"""
 
         return report
 
-    def get_screen(self, filename, path):
+    def query_all(self, queries):
+        """
+        Queries all `queries` (list of query strings) joined with ';' into compound queries of up to `max_batch_len`
+        characters, so usually in one round trip, and returns list of the replies (stripped strings) in the same
+        order. If the compound reply does not split into one field per query, the queries of the batch are repeated
+        one by one.
+        """
+        replies = []
+        batch = []
+        for cmd_str in list(queries) + [None]:
+            if batch and (cmd_str is None or len(';'.join(batch + [cmd_str])) > self.max_batch_len):
+                fields = self.query(';'.join(batch)).strip().split(';')
+                if len(fields) != len(batch):
+                    fields = [self.query(q).strip() for q in batch]
+                replies += [field.strip() for field in fields]
+                batch = []
+            if cmd_str is not None:
+                batch.append(cmd_str)
+
+        return replies
+
+    def traced(self, direction, cmd_str, call, *args, **kwargs):
+        """
+        Performs I/O operation `call(*args, **kwargs)` of SCPI transaction `cmd_str` and returns its result. When
+        tracing is enabled (see `enable_trace()`) the transaction is recorded in `trace`, otherwise the call is only
+        passed through.
+        """
+        if self.trace is None:
+            return call(*args, **kwargs)
+
+        record = {'start': perf_counter() - self.trace_origin, 'duration': 0.0, 'direction': direction,
+                  'command': cmd_str, 'bytes': len(cmd_str) + 1, 'retries': 0, 'errors': None}
+        self.trace.append(record)
+        retries = getattr(self.unit, 'retries', 0)
+        try:
+            reply = call(*args, **kwargs)
+        except Exception as e:
+            record['errors'] = [repr(e)]
+            raise
+        finally:
+            record['duration'] = perf_counter() - self.trace_origin - record['start']
+            record['retries'] = getattr(self.unit, 'retries', 0) - retries
+        if isinstance(reply, int):     # streamed replies return the number of bytes read
+            record['bytes'] += reply
+        elif direction != 'write':
+            record['bytes'] += reply.nbytes if isinstance(reply, np.ndarray) else len(reply)
+
+        return reply
+
+    def enable_trace(self, size=100000):
+        """
+        Starts recording of all SCPI transactions into ring buffer `trace` keeping the last `size` records with
+        fields `TRACE_FIELDS`. Tracing is off by default and costs one check per transaction then.
+        """
+        self.trace = deque(maxlen=size)
+        self.trace_origin = perf_counter()
+
+    def disable_trace(self):
+        """Stops recording of SCPI transactions and drops the records."""
+        self.trace = None
+
+    def export_trace(self, filepath, chrome=False):
+        """
+        Writes the records of `trace` into file `filepath` as JSON lines, or in Chrome trace event format if
+        `chrome` is *True* (open it in chrome://tracing or https://ui.perfetto.dev).
+        """
+        records = list(self.trace or [])
+        with open(filepath, 'w') as f:
+            if chrome:
+                events = [{'name': r['command'], 'cat': r['direction'], 'ph': 'X', 'ts': r['start'] * 1e6,
+                           'dur': r['duration'] * 1e6, 'pid': 1, 'tid': 1,
+                           'args': {'bytes': r['bytes'], 'retries': r['retries'], 'errors': r['errors']}}
+                          for r in records]
+                json.dump({'traceEvents': events, 'otherData': {'instrument': self.idn}}, f)
+            else:
+                for record in records:
+                    f.write(json.dumps(record) + '\n')
+
+    def trace_summary(self, top=10):
+        """
+        Prints `top` commands of `trace` by cumulative time. Commands are grouped by direction and header, compound
+        commands written by `flush()` as 'write batch'.
+
+        Returns list of (command, count, total time [s], bytes) sorted by total time.
+        """
+        totals = {}
+        for record in self.trace or []:
+            if ';' in record['command']:
+                name = f'{record["direction"]} batch'
+            else:
+                name = f'{record["direction"]} {self.split_cmd(record["command"])[0]}'
+            count, duration, size = totals.get(name, (0, 0.0, 0))
+            totals[name] = (count + 1, duration + record['duration'], size + record['bytes'])
+
+        summary = sorted(((name, *values) for name, values in totals.items()), key=lambda v: v[2], reverse=True)
+        print(f'{"command":<40}{"count":>8}{"total [ms]":>12}{"mean [ms]":>11}{"bytes":>12}')
+        for name, count, duration, size in summary[:top]:
+            print(f'{name[:39]:<40}{count:>8}{duration * 1000:>12.2f}{duration * 1000 / count:>11.3f}{size:>12}')
+
+        return summary[:top]
+
+    def get_screen(self, filename, path, img_format=None, palette=None, background=False):
         """
         As the name suggests this method fetches the image displayed on the oscilloscope screen and writes it down
         to a file with `filename` at local directory under `path` both supplied as arguments. Method checks if the
         operation is complete before closing the file on the computer.
-        """
-        # query the image type and palette if previously set:
-        img_format = self.query(':SAVE:IMAGe:FORMat?')
-        img_palette = self.query(':SAVE:IMAGe:PALette?')
 
-        filepath = path + filename
-        screenshot = open(filepath, 'wb')
+        Image format is given by the `filename` extension (see `SCREEN_FORMATS`, compressed PNG is much smaller to
+        transfer than BMP), otherwise by `img_format` ('PNG', 'BMP' or palette-reduced 'BMP8bit') or the
+        :SAVE:IMAGe:FORMat setting. `palette` ('COLor' or 'GRAYscale') defaults to the :SAVE:IMAGe:PALette setting.
+        Settings known from `state` are not queried.
+
+        The image is streamed from the oscilloscope directly to the file. With `background=True` the image is read
+        into memory and written to the file by a background worker, so the next test can start immediately; see
+        `wait_images()`. When `image_store` is set the image is added to the store instead (see `scope_images`).
+        The path is kept in `last_image` and logged with the results of the next `log_measures()`.
 
-        # query the unit's video buffer, transfer it as binary stream in bytes and record it into the opened file:
-        screenshot.write(self.unit.query_binary_values(f':DISPlay:DATA? {img_format[0:(len(img_format)-1)]},'
-                                                       f'{img_palette[0:(len(img_palette)-1)]}', datatype='s',
-                                                       container=bytes))
-        self.unit.query('*OPC?')
-        screenshot.close()
+        Returns path of the written (or stored) image, with `background=True` its `concurrent.futures.Future`.
+        """
+        filepath = path + filename
+        if img_format is None:
+            img_format = SCREEN_FORMATS.get(os.path.splitext(filename)[1].lower())
+        if img_format is None:
+            img_format = self.image_setting(':SAVE:IMAG:FORM')
+        img_format = DISPLAY_FORMATS.get(img_format.upper(), img_format)
+        if palette is None:
+            palette = self.image_setting(':SAVE:IMAG:PAL')
+        self.flush()
+
+        # query the unit's video buffer, transfer it as binary stream in bytes and record it into the file:
+        cmd_str = f':DISPlay:DATA? {img_format},{palette}'
+        if background or self.image_store is not None:
+            image = self.traced('binary', cmd_str, self.unit.query_binary_values, cmd_str, datatype='s',
+                                container=bytes)
+            self.traced('query', '*OPC?', self.unit.query, '*OPC?')
+            write = write_file if self.image_store is None else self.image_store.add
+            if not background:
+                self.last_image = write(filepath, image)
+                return self.last_image
+            if self.image_writer is None:
+                self.image_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='screenshot')
+            self.pending_images.append(self.image_writer.submit(write, filepath, image))
+            self.last_image = self.pending_images[-1]
+            return self.last_image
+
+        with open(filepath, 'wb') as screenshot:
+            self.traced('binary', cmd_str, self.read_block, cmd_str, screenshot)
+            self.traced('query', '*OPC?', self.unit.query, '*OPC?')
+        self.last_image = filepath
+
+        return filepath
+
+    def image_setting(self, header):
+        """Returns image setting `header` (e.g. ':SAVE:IMAG:FORM') from `state` if known, otherwise queries it."""
+        if header in self.state:
+            return self.state[header]
+
+        return self.query(f'{header}?').strip()
+
+    def read_block(self, cmd_str, stream, chunk_size=BLOCK_CHUNK):
+        """
+        Writes query `cmd_str` and copies its binary block reply (IEEE 488.2 definite length block) to binary file
+        object `stream` in chunks of `chunk_size` bytes, without building the whole reply in memory. Returns number
+        of bytes copied.
+        """
+        self.unit.write(cmd_str)
+        header = self.unit.read_bytes(2)
+        if header[:1] != b'#' or not header[1:2].isdigit() or header[1:2] == b'0':
+            raise ValueError(f'{cmd_str}: reply is not a definite length block (header {header}).')
+        length = int(self.unit.read_bytes(int(header[1:2])))
+        remaining = length + 1     # the block is followed by termination character
+        while remaining > 0:
+            chunk = self.unit.read_bytes(min(chunk_size, remaining))
+            remaining -= len(chunk)
+            stream.write(chunk if remaining > 0 else chunk[:-1])
+
+        return length
+
+    def wait_images(self):
+        """
+        Waits until all screenshots handed to the background worker by `get_screen()` are written. Errors of the
+        writes are raised here.
+        """
+        pending, self.pending_images = self.pending_images, []
+        for future in pending:
+            future.result()
 
-    def get_trigger(self):
+    def get_trigger(self, timeout=None, single=False, use_srq=True, poll_min=0.01, poll_max=0.5):
         """
         This method in practice halts the script until Trigger Event Register bit (or TER) is set. If this bit is set
         it means trigger event specified is found. When found *STOP* command is send
 
-        **Note:** TER polling interval is fixed to 1s.
+        Arguments:
+        * `timeout` - maximal wait time in seconds, *None* waits forever. `TimeoutError` is raised when elapsed.
+        * `single` - clear old trigger event and arm the oscilloscope with :SINGle before waiting.
+        * `use_srq` - wait for VISA service request generated by the TRG bit of the status byte (*SRE 1) instead of
+        polling. If the VISA backend does not support events, polling is used and SRQ is not tried again.
+        * `poll_min`, `poll_max` - TER polling interval in seconds starts at `poll_min` and doubles up to `poll_max`.
+
+        Returns `TriggerEvent` with the (computer) time the trigger was found, wait duration in seconds and the way
+        it was detected ('srq' or 'poll').
         """
-        while True:
-            unit_triggered = int(self.query(':TER?'))
-            if unit_triggered == 1:
-                print("scope triggered!!")
-                break
-            sleep(1)
+        if single:
+            self.query(':TER?')     # read trigger event register to clear old event
+            self.send(':SINGle')
+        self.flush()
+
+        start = time()
+        method = 'poll'
+        unit_triggered = int(self.query(':TER?'))
+        if unit_triggered != 1 and use_srq and self.srq_supported is not False:
+            unit_triggered = self.wait_srq(start, timeout)
+            method = 'srq'
+        if unit_triggered != 1:
+            method = 'poll'
+            poll_interval = poll_min
+            while True:
+                unit_triggered = int(self.query(':TER?'))
+                if unit_triggered == 1:
+                    break
+                if timeout is not None and time() - start > timeout:
+                    raise TimeoutError(f'Trigger not found in {timeout} s.')
+                sleep(poll_interval)
+                poll_interval = min(2 * poll_interval, poll_max)
 
-        print(unit_triggered)
+        print("scope triggered!!")
+        event = TriggerEvent(time(), time() - start, method)
         self.send(':STOP')
 
+        return event
+
+    def wait_srq(self, start, timeout):
+        """
+        Waits for service request raised by trigger event (TRG bit of the status byte enabled by *SRE 1) until
+        `timeout` seconds after `start` elapse. Used by `get_trigger()`.
+
+        Returns 1 if the oscilloscope triggered, 0 on timeout and *None* if the VISA backend does not support
+        service request events (`srq_supported` is set to *False* then). Simulated oscilloscope does not raise
+        events; PyVisa is not imported for it.
+        """
+        visa = scope_connection.loaded_visa()
+        if visa is None:    # resource was not opened by pyvisa
+            self.srq_supported = False
+            return None
+        event_type = visa.constants.EventType.service_request
+        try:
+            self.unit.enable_event(event_type, visa.constants.EventMechanism.queue)
+        except (visa.errors.VisaIOError, NotImplementedError, AttributeError):
+            self.srq_supported = False
+            return None
+
+        self.srq_supported = True
+        self.unit.write('*SRE 1')
+        unit_triggered = 0
+        try:
+            while unit_triggered != 1:
+                remaining = 1.0 if timeout is None else timeout - (time() - start)
+                if remaining <= 0:
+                    break
+                # wait in chunks of 1 s and check TER in between in case service request was missed:
+                self.unit.wait_on_event(event_type, int(1000 * min(remaining, 1.0)), capture_timeout=True)
+                unit_triggered = int(self.unit.query(':TER?'))
+        finally:
+            self.unit.write('*SRE 0')
+            self.unit.read_stb()    # clear the service request
+            self.unit.disable_event(event_type, visa.constants.EventMechanism.queue)
+
+        return unit_triggered
+
     def channel_to_str(self, channel_id=1):
         """
         Accepts `channel_id` as integer value and returns the precise name as per Keysight specification.
@@ -132,6 +709,196 @@ class Oscilloscope:
         """
         return self.channel_map.get(channel_id)
 
+    def source_to_str(self, source=1):
+        """
+        Like `channel_to_str()` but accepts also waveform sources given as string, e.g. 'MATH' or 'FUNCtion', which
+        are returned as they are.
+        """
+        if isinstance(source, str):
+            return source
+
+        return self.channel_to_str(source)
+
+    def get_preamble(self):
+        """
+        Queries :WAVeform:PREamble? of the current waveform source and returns it as dictionary with keys listed in
+        `WAVEFORM_PREAMBLE`. Values are converted to numbers.
+        """
+        values = self.query(':WAVeform:PREamble?').strip().split(',')
+        preamble = {}
+        for key, value in zip(WAVEFORM_PREAMBLE, values):
+            preamble[key] = float(value) if key.startswith(('x', 'y')) else int(float(value))
+
+        return preamble
+
+    def set_waveform_format(self, points=None, word_format=True):
+        """
+        Prepares :WAVeform transfer format: WORD (16 bit, MSB first, unsigned) if `word_format` or BYTE otherwise.
+        Record length is the maximal available (:WAVeform:POINts:MODE MAXimum, raw acquisition memory when the
+        oscilloscope is stopped) or `points` if given.
+        """
+        self.send(f':WAVeform:FORMat {"WORD" if word_format else "BYTE"}')
+        if word_format:
+            self.send(':WAVeform:BYTeorder MSBFirst')
+        self.send(':WAVeform:UNSigned ON')
+        self.send(':WAVeform:POINts:MODE MAXimum')
+        self.send(f':WAVeform:POINts {points if points else "MAXimum"}')
+
+    def read_waveform_data(self, word_format=True):
+        """
+        Transfers :WAVeform:DATA? of the current source as binary block directly into NumPy array of raw (unscaled)
+        sample codes. Format must match the one set by `set_waveform_format()`.
+        """
+        self.flush()
+        return self.traced('binary', ':WAVeform:DATA?', self.unit.query_binary_values, ':WAVeform:DATA?',
+                           datatype='H' if word_format else 'B', is_big_endian=True, container=np.array)
+
+    @staticmethod
+    def scale_waveform(data, preamble):
+        """Converts raw sample codes `data` to voltages using the y values of `preamble`."""
+        return (data - preamble['yreference']) * preamble['yincrement'] + preamble['yorigin']
+
+    @staticmethod
+    def waveform_time(preamble, num_points):
+        """Returns array of `num_points` sample times [s] relative to the trigger using the x values of `preamble`."""
+        return (np.arange(num_points) - preamble['xreference']) * preamble['xincrement'] + preamble['xorigin']
+
+    def get_waveform(self, channel_id=1, points=None, word_format=True):
+        """
+        Fetches the samples of waveform `channel_id` (channel number or 'MATH') displayed on the oscilloscope.
+
+        Transfer is done in binary WORD (or BYTE if `word_format` is *False*) format in one :WAVeform:DATA? query read
+        directly into NumPy array. Stop the acquisition (:STOP or `get_trigger()`) before calling this method to
+        get the full acquisition memory, or limit the record by `points`.
+
+        Returns tuple of NumPy arrays (time [s], voltage [V]).
+        """
+        self.set_waveform_format(points, word_format)
+        self.send(f':WAVeform:SOURce {self.source_to_str(channel_id)}')
+        preamble = self.get_preamble()
+        data = self.read_waveform_data(word_format)
+
+        return self.waveform_time(preamble, len(data)), self.scale_waveform(data, preamble)
+
+    def get_waveforms(self, sources=(1, 2), points=None, word_format=True):
+        """
+        Fetches waveforms of all `sources` (channel numbers and/or 'MATH') from the same acquisition.
+
+        The acquisition is stopped once (:STOP), transfer format is set once and the sources are read back to back
+        without re-arming, so all the data come from the same trigger event. The oscilloscope stays stopped, send
+        :RUN to continue.
+
+        Returns dictionary with key 'time' holding the common time array [s] and one voltage array per source keyed
+        as given in `sources`. Source with different horizontal record (e.g. MATH with other number of points) is
+        interpolated to the common time.
+        """
+        self.send(':STOP')
+        self.set_waveform_format(points, word_format)
+
+        waveforms = {}
+        x_axis = None
+        for source in sources:
+            self.send(f':WAVeform:SOURce {self.source_to_str(source)}')
+            preamble = self.get_preamble()
+            data = self.read_waveform_data(word_format)
+            voltage = self.scale_waveform(data, preamble)
+            if x_axis is None:
+                x_axis = (len(data), preamble['xincrement'], preamble['xorigin'], preamble['xreference'])
+                waveforms['time'] = self.waveform_time(preamble, len(data))
+            elif x_axis != (len(data), preamble['xincrement'], preamble['xorigin'], preamble['xreference']):
+                voltage = np.interp(waveforms['time'], self.waveform_time(preamble, len(data)), voltage)
+            waveforms[source] = voltage
+
+        return waveforms
+
+    def acquire_segments(self, count, timeout=None, poll_min=0.01, poll_max=0.5):
+        """
+        Captures `count` trigger events back to back into segmented memory (:ACQuire:MODE SEGMented) with single
+        :SINGle and waits until all segments are acquired or `timeout` seconds elapse (`TimeoutError`).
+
+        Returns number of segments acquired or *None* if the oscilloscope rejects segmented mode (e.g. option
+        not licensed; `segmented_supported` is set to *False* then). Oscilloscope stays in segmented mode, send
+        :ACQuire:MODE RTIMe to return to normal acquisition.
+        """
+        if self.probe(':ACQuire:MODE SEGMented', f':ACQuire:SEGMented:COUNt {count}'):
+            self.segmented_supported = False
+            return None
+        self.segmented_supported = True
+
+        self.send(':SINGle')
+        self.flush()
+        start = time()
+        poll_interval = poll_min
+        # Run bit (8) of the operation status condition register is cleared when the last segment is acquired:
+        while int(self.query(':OPERegister:CONDition?')) & 8:
+            if timeout is not None and time() - start > timeout:
+                raise TimeoutError(f'{count} segments not acquired in {timeout} s.')
+            sleep(poll_interval)
+            poll_interval = min(2 * poll_interval, poll_max)
+
+        return int(self.query(':WAVeform:SEGMented:COUNt?'))
+
+    def get_segment_times(self, segments):
+        """
+        Returns array of trigger time tags [s] of segments 1 to `segments` relative to the first one. Segment index
+        and time tag queries are joined into compound queries, so many segments cost a few round trips.
+        """
+        tags = []
+        # one segment takes about 50 characters of the compound query:
+        step = max(1, self.max_batch_len // 50)
+        for first in range(1, segments + 1, step):
+            last = min(first + step, segments + 1) - 1
+            cmd_str = ';'.join(f':ACQuire:SEGMented:INDex {i};:WAVeform:SEGMented:TTAG?'
+                               for i in range(first, last + 1))
+            tags.extend(float(tag) for tag in self.query(cmd_str).strip().split(';'))
+            # compound query changed the segment index behind the shadow cache:
+            self.update_state(':ACQ:SEGM:IND', str(last))
+
+        return np.array(tags)
+
+    def get_segments(self, sources=(1,), count=100, points=None, word_format=True, timeout=None):
+        """
+        Captures `count` trigger events in segmented memory (see `acquire_segments()`) and downloads all segments
+        of all `sources` (channel numbers and/or 'MATH').
+
+        Segments are transferred in one :WAVeform:DATA? block per source when the oscilloscope supports
+        :WAVeform:SEGMented:ALL, otherwise segment by segment. `RuntimeError` is raised if segmented acquisition is
+        not available.
+
+        Returns dictionary with key 'time' holding sample times [s] relative to the trigger (common for all segments),
+        key 'timestamps' holding trigger times [s] of the segments relative to the first one and one 2-D array
+        (segment, sample) of voltages per source keyed as given in `sources`.
+        """
+        segments = self.acquire_segments(count, timeout)
+        if segments is None:
+            raise RuntimeError(f'Segmented acquisition not available: {self.last_errors}')
+        self.set_waveform_format(points, word_format)
+
+        waveforms = {'timestamps': self.get_segment_times(segments)}
+        if self.segments_all_supported is not False:
+            self.segments_all_supported = not self.probe(':WAVeform:SEGMented:ALL ON')
+
+        for source in sources:
+            self.send(f':WAVeform:SOURce {self.source_to_str(source)}')
+            if self.segments_all_supported:
+                preamble = self.get_preamble()
+                data = self.read_waveform_data(word_format).reshape(segments, -1)
+            else:
+                rows = []
+                for i in range(1, segments + 1):
+                    self.send(f':ACQuire:SEGMented:INDex {i}')
+                    if i == 1:
+                        preamble = self.get_preamble()
+                    rows.append(self.read_waveform_data(word_format))
+                data = np.vstack(rows)
+            waveforms.setdefault('time', self.waveform_time(preamble, data.shape[1]))
+            waveforms[source] = self.scale_waveform(data, preamble)
+
+        if self.segments_all_supported:
+            self.send(':WAVeform:SEGMented:ALL OFF')
+
+        return waveforms
+
     def set_channel_scale(self, expected_voltage, channel_id=1):
         """
         **This method is not yet completed!** Its main idea is to implement a kind of channel auto-scale based on the
@@ -149,66 +916,393 @@ class Oscilloscope:
         self.send(f':{channel}:SCALe {v_per_div}')               # 250mV/div
         self.send(f':{channel}:OFFSet {offset}')                 # offset with 1V to measure full scale
 
-    def get_measurement_statistics(self, meas_param, num_samples):
+    def apply_profile(self, profile):
+        """
+        Applies setup `profile` described in module `scope_profiles`. Argument can be the profile dictionary or
+        the list of commands already compiled by `scope_profiles.compile_profile()`.
+
+        Only the commands changing current oscilloscope settings are written (see shadow cache in `send()`), so
+        moving between similar setups costs a few writes. Call `init()` before if a clean setup is required.
+
+        Returns number of commands actually written.
+        """
+        if isinstance(profile, dict):
+            profile = scope_profiles.compile_profile(profile)
+
+        return sum(1 for cmd_str in profile if self.send(cmd_str))
+
+    def record_setup(self, build):
+        """
+        Calls function `build` (e.g. a lambda calling few *set* methods) without writing anything to the oscilloscope
+        and returns list of the commands it sends. Queries done by `build` are still executed.
+        """
+        self.flush()
+        self.recording = []
+        try:
+            build()
+        finally:
+            commands = self.recording
+            self.recording = None
+
+        return commands
+
+    def use_setup(self, name, build, slots_file='dsox_setup_slots.json'):
+        """
+        Applies setup built by function `build` using the oscilloscope internal setup registers as cache. Example:
+
+        my_scope.use_setup('i2c_levels_master', lambda: (my_scope.set_unit_for_i2c(),
+        my_scope.set_meas_signal_levels('master'), my_scope.set_trig_i2c_start()))
+
+        The commands sent by `build` are recorded (see `record_setup()`) and hashed. The first time setup `name` is
+        used the commands are written and the result is saved with *SAV in one of `SETUP_SLOTS`. Next time, if the
+        hash is unchanged, the setup is restored with single *RCL.
+
+        Mapping of instrument ID and setup name to hash and slot is kept in JSON file `slots_file` so repeated runs
+        on the same bench skip the setup. When all slots are used the least recently used one is overwritten.
+
+        **Note:** if the registers are overwritten from the front panel the file does not know it. Delete the file
+        to rebuild all setups.
+
+        Returns the setup hash.
+        """
+        commands = self.record_setup(build)
+        setup_hash = hashlib.sha1('\n'.join(commands).encode()).hexdigest()
+
+        slots = {}
+        if os.path.exists(slots_file):
+            with open(slots_file, 'r') as f:
+                slots = json.load(f)
+        bench = slots.setdefault(self.idn, {})
+        entry = bench.get(name)
+
+        if entry is not None and entry['hash'] == setup_hash:
+            print(f'Recalling setup "{name}" from slot {entry["slot"]}.\n')
+            self.send(f'*RCL {entry["slot"]}')
+            # recalled settings are the recorded ones:
+            self.state.clear()
+            for cmd_str in commands:
+                self.update_state(*self.split_cmd(cmd_str))
+        else:
+            if entry is not None:
+                slot = entry['slot']
+            else:
+                used = {e['slot']: e['used'] for e in bench.values()}
+                free = [s for s in SETUP_SLOTS if s not in used]
+                slot = free[0] if free else min(used, key=used.get)
+                for other in [n for n, e in bench.items() if e['slot'] == slot]:
+                    del bench[other]
+            print(f'Saving setup "{name}" to slot {slot}.\n')
+            for cmd_str in commands:
+                self.send(cmd_str)
+            self.send(f'*SAV {slot}')
+            entry = {'hash': setup_hash, 'slot': slot}
+            bench[name] = entry
+
+        self.flush()
+        entry['used'] = time()
+        with open(slots_file, 'w') as f:
+            json.dump(slots, f, indent=4)
+
+        return setup_hash
+
+    def get_measurement_statistics(self, meas_param, num_samples, method='auto', timeout=None):
         """
         **How it works:**
 
-        Poll the oscilloscope 'num_samples' times to obtain measurement results.
-        Return min, max and average values in a single string for logging into file.
+        Collects at least `num_samples` samples of measurement `meas_param` (e.g. 'PWIDth', 'DELay', 'VPP') and
+        returns their `MeasurementStatistics` (min, max, mean, std, count). `method` selects how the samples are taken
+        ('auto' tries them in the order of `STATISTICS_METHODS`):
+
+        * 'statistics' - on-scope measurement statistics: counters are reset (:MEASure:STATistics:RESet) and read in
+        one :MEASure:RESults? query when `num_samples` acquisitions were measured. Used only when `meas_param` is the
+        only measurement on the screen, as the results do not tell which record belongs to it; otherwise the other
+        methods are used. Not used again if the oscilloscope rejects the commands (`statistics_supported`).
+        * 'segmented' - `num_samples` trigger events are captured in segmented memory with one arm and downloaded
+        in one transfer (see `get_segments()`), the measurement is computed by `waveform_analysis` over all edges
+        of every segment. Only parameters listed in `SEGMENT_MEASUREMENTS`; not used again if segmented mode is not
+        available (`segmented_supported`).
+        * 'waveform' - the measurement is computed by `waveform_analysis` over all edges of captured waveforms of the
+        measurement sources, so one deep-memory capture gives hundreds of samples. Only parameters listed in
+        `WAVEFORM_MEASUREMENTS`.
 
-        This method is intentionally designed for oscilloscopes with no measurement statistics.
+        Methods 'segmented' and 'waveform' use thresholds and delay edges read from the :MEASure:DEFine settings.
+        * 'poll' - the measurement is queried `num_samples` times (for oscilloscopes with no measurement statistics).
+
+        `TimeoutError` is raised when the samples are not collected in `timeout` seconds (default *None* waits
+        forever).
 
         **Notes:**
         1. meas_param must be already set up before calling this method. Otherwise the query will not provide
         meaningful data.
+        1. methods 'segmented' and 'waveform' measure every pulse in the record, not only the one selected by the
+        trigger.
         1. for detailed list and syntax of meas_param please refer to Keysight Command Expert tool.
-        1. returned value can be logged into text file or printed in the terminal
+        1. returned value converted with `str()` can be logged into text file or printed in the terminal
         """
-        measures = []
+        name = meas_param.split(':')[-1].upper()
+        if method == 'auto':
+            method = self.statistics_method(name)
+        if method not in STATISTICS_METHODS:
+            raise ValueError(f'Unknown statistics method "{method}". Valid methods: {STATISTICS_METHODS}.')
+
+        if method == 'statistics':
+            statistics = self.read_statistics(num_samples, timeout)
+            if statistics is not None:
+                return statistics
+            # on-scope statistics not supported or not only of meas_param, try the other methods:
+            return self.get_measurement_statistics(meas_param, num_samples, self.statistics_method(name, False),
+                                                   timeout)
+        if method == 'segmented':
+            statistics = self.segmented_statistics(name, num_samples, timeout)
+            if statistics is not None:
+                return statistics
+            return self.get_measurement_statistics(meas_param, num_samples, 'auto', timeout)
+        if method == 'waveform':
+            return self.waveform_statistics(name, num_samples, timeout)
+
+        start = time()
+        samples = []
         # take num_samples measurement results:
         for m in range(num_samples):
-            sample = self.query(f':MEASure:{meas_param}?')
-            simple = float(sample[1:(len(sample))])
-            measures.append(simple)
-            while True:
-                if int(self.unit.query('*OPC?')) == 1:
-                    break
+            samples.append(float(self.query(f':MEASure:{meas_param}?')))
+            if timeout is not None and time() - start > timeout:
+                raise TimeoutError(f'{m + 1} of {num_samples} samples of {meas_param} taken in {timeout} s.')
+
+        return MeasurementStatistics.from_samples(samples, 'poll')
+
+    def statistics_method(self, name, statistics=True):
+        """
+        Returns the first method of `STATISTICS_METHODS` usable for measurement `name` (upper case short form).
+        Method 'statistics' is skipped if `statistics` is *False*. Used by `get_measurement_statistics()`.
+        """
+        if statistics and self.statistics_supported is not False:
+            return 'statistics'
+        if self.segmented_supported is not False and name.startswith(SEGMENT_MEASUREMENTS):
+            return 'segmented'
+
+        return 'waveform' if name.startswith(WAVEFORM_MEASUREMENTS) else 'poll'
+
+    def read_statistics(self, num_samples, timeout, poll_min=0.05, poll_max=1.0):
+        """
+        Resets on-scope measurement statistics and waits until the displayed measurement counted `num_samples`
+        acquisitions. Used by `get_measurement_statistics()`.
 
-        sum_bit_times = 0.0
-        # sum the measurement samples to prepare the averaging:
-        for s in range(len(measures)):
-            sum_bit_times = sum_bit_times + measures[s]
+        Returns `MeasurementStatistics` or *None* if the oscilloscope does not support the statistics
+        (`statistics_supported` is set to *False* then) or more than one measurement is displayed (the results do not
+        identify the measurement asked for).
+        """
+        commands = (':MEASure:STATistics ON', ':MEASure:STATistics:RESet', ':RUN')
+        if self.statistics_supported:
+            # support is known, commands are pipelined with the next query:
+            for cmd_str in commands:
+                self.send(cmd_str)
+        elif self.probe(*commands):
+            self.statistics_supported = False
+            return None
+        self.statistics_supported = True
+
+        start = time()
+        poll_interval = poll_min
+        while True:
+            # with statistics ON each measurement reports: label, current, min, max, mean, std dev, count
+            fields = self.query(':MEASure:RESults?').strip().split(',')
+            if len(fields) > 7:
+                return None
+            count = int(float(fields[6])) if len(fields) == 7 else 0
+            if count >= num_samples:
+                break
+            if timeout is not None and time() - start > timeout:
+                raise TimeoutError(f'{count} of {num_samples} measurements done in {timeout} s.')
+            sleep(poll_interval)
+            poll_interval = min(2 * poll_interval, poll_max)
+
+        minimum, maximum, mean, std = (float(f) for f in fields[2:6])
+        return MeasurementStatistics(minimum, maximum, mean, std, count, 'statistics')
+
+    def scale_queries(self, sources):
+        """
+        Returns list of vertical scale queries of `sources` given as channel numbers or names as returned by
+        :MEASure:SOURce? (e.g. 'CHAN1'), *None* for sources without vertical scale (e.g. WMEM1).
+        """
+        queries = []
+        for source in sources:
+            name = self.source_to_str(source).upper()
+            node = name if name.startswith('CHAN') else 'FUNCtion' if name.startswith(('MATH', 'FUNC')) else None
+            queries.append(None if node is None else f':{node}:SCALe?')
 
-        avg_bit_time = sum_bit_times / len(measures)
+        return queries
 
-        return f'Min period: {min(measures)}s, Max period: {max(measures)}s, Average period: {avg_bit_time}s \n\n' \
-               f'Results based on {num_samples} measurements'
+    def min_amplitudes(self, sources):
+        """
+        Returns list of minimal amplitudes [V] of signals with levels and edges (see
+        `waveform_analysis.MIN_AMPLITUDE_DIVISIONS`) for `sources` (see `scale_queries()`). Vertical scales of all
+        sources are read with one compound query; sources without vertical scale get 0.0.
+        """
+        queries = self.scale_queries(sources)
+        scales = iter(self.query_all([q for q in queries if q is not None]))
+
+        return [0.0 if q is None else float(next(scales)) * waveform_analysis.MIN_AMPLITUDE_DIVISIONS for q in queries]
+
+    def measure_thresholds(self, source, x):
+        """
+        Returns measurement thresholds (upper, middle, lower) in volts defined on the oscilloscope for `source`
+        (e.g. 'CHAN1' as returned by :MEASure:SOURce?). Thresholds in percent are related to top and base of the
+        captured signal `x`; they are NaN (no edges are found) if its amplitude is below
+        `waveform_analysis.MIN_AMPLITUDE_DIVISIONS` of the vertical scale (read in the same compound query).
+        """
+        self.send(f':MEASure:SOURce {source}')
+        scale_query = self.scale_queries([source])[0]
+        replies = self.query_all([':MEASure:DEFine? THResholds'] + ([scale_query] if scale_query else []))
+        reply = replies[0].split(',')
+        if reply[0].upper().startswith('ABS'):
+            return tuple(float(v) for v in reply[1:4])
+        percent = (float(v) for v in reply[1:4]) if reply[0].upper().startswith('PERC') else (90, 50, 10)
+        min_amplitude = float(replies[1]) * waveform_analysis.MIN_AMPLITUDE_DIVISIONS if scale_query else 0.0
+
+        return tuple(waveform_analysis.percent_level(x, p, min_amplitude) for p in percent)
+
+    def measure_sources(self):
+        """Returns list of the current measurement sources as reported by :MEASure:SOURce?, e.g. ['CHAN1', 'CHAN2']."""
+        return [s for s in self.query(':MEASure:SOURce?').strip().split(',') if s.upper() != 'NONE']
+
+    def measure_setup(self, sources, waveforms):
+        """
+        Reads thresholds (see `measure_thresholds()`) of all measurement `sources` using captured `waveforms` and
+        delay edge directions (rising_a, rising_b) from :MEASure:DEFine. Keeps the measurement sources as they were.
+        Returns (thresholds, delay_edges).
+        """
+        thresholds = [self.measure_thresholds(source, waveforms[source]) for source in sources]
+        self.send(f':MEASure:SOURce {",".join(sources)}')
+        # delay edges are defined as <edge number> with sign of the slope, e.g. -1,-1:
+        delay_edges = tuple(int(e) > 0 for e in self.query(':MEASure:DEFine? DELay').strip().split(','))
+
+        return thresholds, delay_edges
+
+    @staticmethod
+    def compute_measurement(name, t, a, b, thresholds, delay_edges):
+        """
+        Computes measurement `name` (upper case, one of `SEGMENT_MEASUREMENTS`) over all edges of waveform `a` (and
+        `b` for delay) sampled at times `t` with `thresholds` and `delay_edges` read by `measure_setup()`.
+        Voltage measurements give single value. Returns array of the measured values.
+        """
+        upper, middle, lower = thresholds[0]
+        hysteresis = upper - lower
+        if name.startswith(('PWID', 'NWID')):
+            return waveform_analysis.pulse_widths(t, a, middle, hysteresis, name.startswith('P'))
+        if name.startswith('PER'):
+            return waveform_analysis.periods(t, a, middle, hysteresis)
+        if name.startswith('FREQ'):
+            return 1 / waveform_analysis.periods(t, a, middle, hysteresis)
+        if name.startswith('RIS'):
+            return waveform_analysis.rise_times(waveform_analysis.find_edges(t, a, lower, upper))
+        if name.startswith('FALL'):
+            return waveform_analysis.fall_times(waveform_analysis.find_edges(t, a, lower, upper))
+        if name.startswith('DEL'):
+            upper_b, middle_b, lower_b = thresholds[-1]
+            return waveform_analysis.edge_delays(t, a, b, middle, middle_b, delay_edges[0], delay_edges[-1],
+                                                 min(hysteresis, upper_b - lower_b))
+        if name.startswith('VPP'):
+            return np.array([np.ptp(a)])
+        if name.startswith('VMAX'):
+            return np.array([np.max(a)])
+        if name.startswith('VMIN'):
+            return np.array([np.min(a)])
+
+        raise ValueError(f'Measurement "{name}" cannot be computed from waveform. '
+                         f'Valid measurements: {SEGMENT_MEASUREMENTS}.')
+
+    def segmented_statistics(self, name, num_samples, timeout):
+        """
+        Computes measurement `name` (upper case, one of `SEGMENT_MEASUREMENTS`) over `num_samples` segments captured
+        from the current :MEASure:SOURce, then returns to normal acquisition. Used by `get_measurement_statistics()`.
+
+        Returns `MeasurementStatistics` or *None* if segmented acquisition is not available.
+        """
+        if not name.startswith(SEGMENT_MEASUREMENTS):
+            raise ValueError(f'Measurement "{name}" cannot be computed from waveform. '
+                             f'Valid measurements: {SEGMENT_MEASUREMENTS}.')
+        sources = self.measure_sources()
+        try:
+            segments = self.get_segments(sources, num_samples, timeout=timeout)
+        except RuntimeError:
+            return None
+        thresholds, delay_edges = self.measure_setup(sources, {s: segments[s][0] for s in sources})
+
+        samples = []
+        for i in range(len(segments['timestamps'])):
+            samples.extend(self.compute_measurement(name, segments['time'], segments[sources[0]][i],
+                                                    segments[sources[-1]][i], thresholds, delay_edges))
+        self.send(':ACQuire:MODE RTIMe')
+        self.send(':RUN')
+
+        return MeasurementStatistics.from_samples(samples, 'segmented')
+
+    def waveform_statistics(self, name, num_samples, timeout):
+        """
+        Computes measurement `name` (upper case, one of `WAVEFORM_MEASUREMENTS`) over all edges of the waveforms
+        captured from the current :MEASure:SOURce. Captures are repeated with :SINGle until `num_samples` samples
+        are collected, then the acquisition is started again. Used by `get_measurement_statistics()`.
+        """
+        if not name.startswith(WAVEFORM_MEASUREMENTS):
+            raise ValueError(f'Measurement "{name}" cannot be computed from waveform. '
+                             f'Valid measurements: {WAVEFORM_MEASUREMENTS}.')
+        sources = self.measure_sources()
+        start = time()
+        setup = None
+        samples = []
+        while len(samples) < num_samples:
+            remaining = None if timeout is None else timeout - (time() - start)
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(f'{len(samples)} of {num_samples} samples of {name} taken in {timeout} s.')
+            self.get_trigger(remaining, single=True)
+            waveforms = self.get_waveforms(sources)
+            if setup is None:
+                setup = self.measure_setup(sources, waveforms)
+            samples.extend(self.compute_measurement(name, waveforms['time'], waveforms[sources[0]],
+                                                    waveforms[sources[-1]], *setup))
+
+        self.send(':RUN')
+
+        return MeasurementStatistics.from_samples(samples, 'waveform')
 
     def log_measures(self, filename, path, results):
         """
         Reports measured values in plain text file. file name provided as input variable `filename` and the path to
-        write to is provided as `path`.
-        """
-        filepath = path + filename
-        log = open(filepath, 'a')
+        write to is provided as `path`. Returns dictionary of measurement label to the value (string).
 
-        # write test title in the log file and then remove it not to be send to oscilloscope:
-        test_title = results['Test title']
-        log.write(f'{test_title}\n\n')
+        When `results_sink` is set the values are written to it as typed records instead (see `scope_results`) and
+        `filename`, `path` are not used. Path of the screenshot taken since the previous log (see `last_image`; stored
+        image of `image_store`) is logged with the values, so every result can be traced to its image.
+        """
+        # remove test title from the queries not to be send to oscilloscope:
+        test_title = results.pop('Test title')
         print(f'{test_title}\n')   # show test title in console. Remove if not necessary
-        results.pop('Test title')
-
-        # poll the oscilloscope results with the rest queries:
-        for i in results.keys():
-            value = self.query(f'{results[i]}')
-            log.write(f'{i}: {value}')
-            print(f'{i}: {value}')    # show results in console. Remove if not necessary
 
-        log.write('\n\n')   # add two empty lines to separate next test results
-        log.close()
+        # poll the oscilloscope results with the rest queries, joined in one compound query:
+        values = dict(zip(results.keys(), self.query_all(list(results.values()))))
+        for i in values.keys():
+            print(f'{i}: {values[i]}\n')    # show results in console. Remove if not necessary
+        # background write of the screenshot returns the stored path when done:
+        image = self.last_image.result() if hasattr(self.last_image, 'result') else self.last_image
+        self.last_image = None
+
+        if self.results_sink is not None:
+            timestamp = time()
+            for i in values.keys():
+                self.results_sink.write(test_title, i, values[i], scope_results.measurement_unit(results[i]),
+                                        timestamp, self.idn, image or '')
+        else:
+            with open(path + filename, 'a') as log:
+                log.write(f'{test_title}\n\n')
+                if image:
+                    log.write(f'Image: {image}\n')
+                log.write(''.join(f'{i}: {values[i]}\n' for i in values.keys()))
+                log.write('\n\n')   # add two empty lines to separate next test results
         results.clear()    # flush the query buffer
 
-    def __init__(self, address):
+        return values
+
+    def __init__(self, address, rm=None, pool=None):
         """
         Oscilloscope address can be obtained from the device itself pressing Utility -> IO.
         VISA address will be displayed in a new window. Pass it as string when creating the object or create variable.
@@ -222,10 +1316,69 @@ class Oscilloscope:
 
         **Note:** oscilloscope provides the address on the screen in decimal numbers! Conversion to hex is required before
         passing the argument here!
+
+        Addresses starting with 'SIM::' (e.g. 'SIM::I2C') open simulated oscilloscope of module `scope_simulator`
+        so scripts can run without hardware. Other VISA backend can be passed as resource manager `rm`.
+
+        The connection is taken from connection `pool` (process-wide `scope_connection.POOL` by default) which reuses
+        the session opened for `address` by earlier objects and reconnects stale sessions. Use the object as context
+        manager or call `close()` to release the connection.
         """
-        rm = visa.ResourceManager()
-        self.unit = rm.open_resource(address)
-        print(self.query('*IDN?'))
+        self.pipeline = True
+        """`pipeline` enables the pipelined `send()` mode (default *True*)."""
+        self.cmd_queue = []
+        """`cmd_queue` holds the commands sent in pipelined mode and not yet written to the oscilloscope."""
+        self.max_batch_len = 1024
+        """`max_batch_len` is maximal length in characters of a single compound command written by `flush()`."""
+        self.last_errors = []
+        """`last_errors` keeps the SCPI errors reported at the last barrier point."""
+        self.state = {}
+        """`state` is shadow cache of the oscilloscope settings: dictionary of normalized command header to the
+        arguments sent since the last reset. See `send()`."""
+        self.state_known = False
+        """`state_known` is *True* when the oscilloscope was reset by this object and `state` describes all settings
+        different from the default ones."""
+        self.uncached_settings = set()
+        """`uncached_settings` are headers of `UNCACHED_SETTING_HEADERS` sent since the last reset."""
+        self.setup_cmds = None
+        """`setup_cmds` collects the commands sent after `init()` while the decision on reset is deferred."""
+        self.setup_keys = set()
+        self.setup_start = 0
+        self.recording = None
+        """`recording` collects the commands instead of sending them while `record_setup()` runs."""
+        self.srq_supported = None
+        """`srq_supported` tells if VISA service request events work with this connection (*None* = not tried)."""
+        self.trace = None
+        """`trace` is ring buffer of SCPI transaction records (see `TRACE_FIELDS`), *None* when tracing is off."""
+        self.trace_origin = 0.0
+        self.results_sink = None
+        """`results_sink` is `scope_results.ResultsSink` receiving the values of `log_measures()`, *None* appends
+        them to text files."""
+        self.image_store = None
+        """`image_store` is `scope_images.ImageStore` keeping the screenshots of `get_screen()`, *None* writes them
+        to the given files."""
+        self.image_writer = None
+        """`image_writer` is the background worker writing screenshots of `get_screen()` (created on first use)."""
+        self.pending_images = []
+        self.last_image = None
+        """`last_image` is path (or `Future` of background write) of the last screenshot of `get_screen()`, named
+        with the results of the next `log_measures()`."""
+        self.statistics_supported = None
+        """`statistics_supported` tells if the oscilloscope provides measurement statistics (*None* = not tried)."""
+        self.segmented_supported = None
+        """`segmented_supported` tells if segmented memory acquisition is available (*None* = not tried)."""
+        self.segments_all_supported = None
+        """`segments_all_supported` tells if all segments can be transferred in one block (*None* = not tried)."""
+
+        self.pool = pool or scope_connection.POOL
+        """`pool` is the `scope_connection.ConnectionPool` providing the connection."""
+        self.unit = self.pool.open(address, rm)
+        """`unit` is the pooled `scope_connection.Session` of the oscilloscope, *None* after `close()`."""
+        self.rm = self.unit.rm
+        """`rm` is the VISA resource manager the oscilloscope is opened with."""
+        self.idn = self.query('*IDN?').strip()
+        """`idn` is the oscilloscope identification string (*IDN?), used to key data kept per instrument."""
+        print(self.idn)
 
         self.channel_map = {
             1: 'CHANnel1',
@@ -237,6 +1390,28 @@ class Oscilloscope:
         oscilloscope as argument in commands. Extracting data from this dictionary is handled in `channel_to_str()`
         method."""
 
+    def close(self):
+        """
+        Writes screenshots and commands still waiting in the queue and releases the connection to the pool. The
+        session stays open for the next object of the same address until the pool is closed (see `scope_connection`).
+        """
+        try:
+            if self.image_writer is not None:
+                self.image_writer.shutdown(wait=True)
+                self.image_writer = None
+                self.wait_images()
+        finally:
+            if self.unit is not None:
+                self.flush()    # do not lose commands still waiting in the queue
+                self.unit.close()
+                self.unit = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
     def __del__(self):
         """
         Destructor call. Put this at the end of each script or phase where oscilloscope connection needs
@@ -246,8 +1421,7 @@ class Oscilloscope:
         # at the end of test session disconnect oscilloscope:
         # self.unit.clear()
         try:
-            self.unit.close()
-            self.rm.close()
+            self.close()
         except Exception as e:
             pass
 
@@ -262,7 +1436,7 @@ class I2C(Oscilloscope):    # assume CH1 = SCL, CH2 = SDA
     The official I2C specification can be found here: https://www.nxp.com/docs/en/application-note/AN10216.pdf
     """
 
-    def __init__(self, address):
+    def __init__(self, address, rm=None, pool=None):
         """
         Connection example:
 
@@ -276,7 +1450,7 @@ class I2C(Oscilloscope):    # assume CH1 = SCL, CH2 = SDA
 
         **ToDo:** parametrize methods to be useful for other I2C modes
         """
-        super().__init__(address)
+        super().__init__(address, rm, pool)
 
         # set bit time for glitch trigger:
         self.i2c_speed = 100000       # [Hz]
@@ -295,6 +1469,9 @@ class I2C(Oscilloscope):    # assume CH1 = SCL, CH2 = SDA
         # provide trigger level
         self.trig_lvl = 1       # [V]
 
+        # compile oscilloscope setup once, it is applied before every test:
+        self.i2c_setup = scope_profiles.compile_profile(scope_profiles.I2C_PROFILE)
+
         # prepare oscilloscope queries to get the results in a text log file
         # use dictionary in order to allow labels for the log file readability
         self.results = {}   # Note: dictionary type does not allow duplicate entries.
@@ -314,55 +1491,8 @@ class I2C(Oscilloscope):    # assume CH1 = SCL, CH2 = SDA
          """
         # set oscilloscope
         self.init()
-        # setup oscilloscope or this particular test
-        # setting oscilloscope channels common settings
-        # turn required channels ON, keep others OFF:
-        self.send(':CHANnel1:DISPlay ON')
-        self.send(':CHANnel2:DISPlay ON')
-        self.send(':CHANnel3:DISPlay OFF')
-        self.send(':CHANnel4:DISPlay OFF')
-        # set proper labels on the ON channels and display them:
-        self.send(':CHANnel1:LABel "VC_I2C_SCL"')
-        self.send(':CHANnel2:LABel "VC_I2C_SDA"')
-        self.send(':DISPlay:LABel ON')
-
-        # setting Y parameters
-        # channel 1 specific settings
-        # self.send(':CHANnel1:SCALe 0.25')                       # 250mV/div
-        self.send(':CHANnel1:SCALe 1')                       # 250mV/div
-        # self.send(':CHANnel1:OFFSet 0.875')                     # offset with 1V to measure full scale
-        self.send(':CHANnel1:OFFSet 0')                     # offset with 1V to measure full scale
-        # self.send(':CHANnel1:BWLimit ON')                       # options ON | OFF
-        self.send(':CHANnel1:BWLimit OFF')                       # options ON | OFF
-
-        # channel 2 specific settings
-        # self.send(':CHANnel2:SCALe 0.25')                       # 250mV/div
-        self.send(':CHANnel2:SCALe 1')                       # 250mV/div
-        # self.send(':CHANnel2:OFFSet 0.875')                     # offset with 1V to measure full scale
-        self.send(':CHANnel2:OFFSet 3.5')                     # offset with 1V to measure full scale
-        # self.send(':CHANnel2:BWLimit ON')                       # options ON | OFF
-        self.send(':CHANnel2:BWLimit OFF')                       # options ON | OFF
-
-        # make sure lower, middle, upper measurement are 30%, 50%, 70% for each used channel:
-        self.send(':MEASure:SOURce CHANnel1')
-        self.send(':MEASure:DEFine THResholds,PERCent,70,50,30')
-        self.send(':MEASure:SOURce CHANnel2')
-        self.send(':MEASure:DEFine THResholds,PERCent,70,50,30')
-
-        # setting X parameters
-        self.send(':TIMebase:MODE MAIN')                        # timebase mode: MAIN, WINDow, XY, ROLL
-        # set 250ns/div for 1MHz bit time
-        # self.send(':TIMebase:SCALe 0.00000025')                 # units/div [sec]; main window horizontal scale
-        self.send(':TIMebase:SCALe 0.0000025')                 # 100kHz units/div [sec]; main window horizontal scale
-        # set the time reference to one division from the left side of the screen:
-        self.send(':TIMebase:REFerence RIGHt')                  # options: LEFT | CENTer | RIGHt
-
-        # set trigger settings
-        self.send(':TRIGger:SWEep NORMal')                      # set acquisition mode to NORMAL
-        self.send(':TRIGger:EDGE:COUPling DC')                  # options AC | DC | LFReject
-        self.send(':TRIGger:HFReject OFF')                      # options: ON | OFF; interferes with LFReject above
-        # self.send(':TRIGger:NREJect ON')                        # options: ON | OFF
-        self.send(':TRIGger:NREJect OFF')                        # options: ON | OFF
+        # setup oscilloscope or this particular test as described in scope_profiles.I2C_PROFILE
+        self.apply_profile(self.i2c_setup)
 
         self.send(':RUN')
 
@@ -744,73 +1874,71 @@ class I2C(Oscilloscope):    # assume CH1 = SCL, CH2 = SDA
         *path* syntax example: results_path = 'C:\\Desktop\\Test_plan\\DV_Tests\\201_LIGHTSENSOR\\I2C\\'
 
         **Note:** double backslash is required as hierarchy separator!
+
+        Returns dictionary of measurement label to the value (string). With `results_sink` set the values are written
+        to the sink, see `log_measures()`.
+        """
+        return self.log_measures(filename, path, self.results)
+
+    def analyze_i2c_timing(self, waveforms=None):
+        """
+        Computes all I2C timing parameters (rise/fall times, frequency, tHIGH/tLOW, tSU;DAT, tHD;DAT, tSU;STA,
+        tHD;STA, tSU;STO and tBUF) on the computer for every bit found in one capture of SCL (CH1) and SDA (CH2).
+        See `waveform_analysis.i2c_timing()` for the definitions. Thresholds are 30%/70% as for the set_meas methods.
+
+        `waveforms` is the result of `get_waveforms((1, 2))`; if not provided the current acquisition is fetched.
+        Trigger a long enough (deep memory) record first, e.g. `set_unit_for_i2c()`, wider timebase,
+        `set_trig_i2c_start()` and `get_trigger()`. One capture then replaces the whole set of set_meas tests and
+        gives distribution of every parameter instead of single value. Line with amplitude below
+        `waveform_analysis.MIN_AMPLITUDE_DIVISIONS` of its vertical scale (idle bus) has no edges.
+
+        Returns dictionary of parameter name to NumPy array of all measured values.
+        """
+        if waveforms is None:
+            waveforms = self.get_waveforms((1, 2))
+
+        return waveform_analysis.i2c_timing(waveforms['time'], waveforms[1], waveforms[2],
+                                            min_amplitude=self.min_amplitudes((1, 2)))
+
+    def log_i2c_timing(self, filename, path, timing, test_title='I2C Timing Analysis'):
+        """
+        Reports `timing` returned by `analyze_i2c_timing()` in plain text file `filename` at `path` as number of
+        occurrences and min/mean/max value of every parameter.
         """
         filepath = path + filename
         log = open(filepath, 'a')
 
-        # write test title in the log file and then remove it not to be send to oscilloscope:
-        test_title = self.results['Test title']
         log.write(f'{test_title}\n\n')
         print(f'{test_title}\n')   # show test title in console. Remove if not necessary
-        self.results.pop('Test title')
-
-        # poll the oscilloscope results with the rest queries:
-        for i in self.results.keys():
-            # query the unit's video buffer, transfer it as binary stream in bytes and record it into the opened file:
-            value = self.query(f'{self.results[i]}')
-            log.write(f'{i}: {value}')
-            print(f'{i}: {value}')    # show results in console. Remove if not necessary
+        for name, values in timing.items():
+            if len(values):
+                line = f'{name}: min {np.min(values):.6e}, mean {np.mean(values):.6e}, max {np.max(values):.6e} ' \
+                       f'({len(values)} values)\n'
+            else:
+                line = f'{name}: not found in the capture\n'
+            log.write(line)
+            print(line, end='')    # show results in console. Remove if not necessary
 
         log.write('\n\n')   # add two empty lines to separate next test results
         log.close()
-        self.results.clear()    # flush the query buffer
 
 
 class Power(Oscilloscope):     # generic measurements with oscilloscope
-    def __init__(self, address):
-        super().__init__(address)
+    def __init__(self, address, rm=None, pool=None):
+        super().__init__(address, rm, pool)
 
         # prepare oscilloscope queries to get the results in a text log file
         # use dictionary in order to allow labels for the log file readability
         self.results = {}   # Note: dictionary type does not allow duplicate entries.
 
+        # compile oscilloscope setup once, it is applied before every measurement:
+        self.v_meas_setup = scope_profiles.compile_profile(scope_profiles.POWER_V_MEAS_PROFILE)
+
     def set_unit_v_meas(self):
         # set oscilloscope
         self.init()
-        # setup oscilloscope or this particular test
-        # setting oscilloscope channels common settings
-        # turn required channels ON, keep others OFF:
-        self.send(':CHANnel1:DISPlay ON')
-        self.send(':CHANnel2:DISPlay OFF')
-        self.send(':CHANnel3:DISPlay OFF')
-        self.send(':CHANnel4:DISPlay OFF')
-        # set proper labels on the ON channels and display them:
-        self.send(':CHANnel1:LABel "V_OUT"')
-        self.send(':DISPlay:LABel ON')
-
-        # # setting Y parameters
-        # channel 1 specific settings
-        self.send(':CHANnel1:COUPling DC')                      # options AC | DC
-
-        # channel 2 specific settings
-        self.send(':CHANnel2:COUPling DC')                      # options AC | DC
-
-        # channel 3 specific settings
-        self.send(':CHANnel3:COUPling DC')                      # options AC | DC
-
-        # channel 4 specific settings
-        self.send(':CHANnel4:COUPling DC')                      # options AC | DC
-
-        # setting X parameters
-        self.send(':TIMebase:MODE MAIN')                        # timebase mode: MAIN, WINDow, XY, ROLL
-        # set 250ns/div for 1MHz bit time
-        self.send(':TIMebase:SCALe 0.050')                      # units/div [sec]; main window horizontal scale
-        # set the time reference to one division from the left side of the screen:
-        self.send(':TIMebase:REFerence LEFT')                   # options: LEFT | CENTer | RIGHt
-
-        # setting acquisition mode
-        self.send(':TRIGger:SWEep AUTO')                        # options: AUTO | NORMal
-        self.send(':ACQuire:TYPE HRESolution')                  # options: NORMal | AVERage | HRESolution | PEAK
+        # setup oscilloscope or this particular test as described in scope_profiles.POWER_V_MEAS_PROFILE
+        self.apply_profile(self.v_meas_setup)
 
         # clear trigger event register
         # ToDo: implement better way of clearing TER bit in status register to avoid warning "local variable not used"
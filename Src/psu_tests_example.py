@@ -1,22 +1,35 @@
+"""
+This module is an example usage of class Power. It measures DC level and AC ripple of the PMIC input voltage at every
+DUT supply voltage of `VBATT`.
+
+The voltages are swept by `scope_sweep.VoltageSweep`: the PSU ramps to the next voltage while the screenshots of the
+previous one are logged and the PSU output is considered settled when its measured voltage is stable, so no fixed
+sleeps are needed. Screenshots of every voltage are written to the results path with the voltage in the file name.
+"""
 import Src.keysight_DSOX2000A_3000A as keysight_DSOX2000А_3000A
-import sys
+import Src.scope_results as scope_results
+import Src.scope_sweep as scope_sweep
 import os
 import time
 
-rc_psu_available = True     # if EA-PS 2042-10 B remote controlled PSU is available
+VBATT = [10, 28, 32]            # declare DUT Vmin, Vtyp and Vmax test voltages
 
-if rc_psu_available:
-
-    VBATT = [10, 28, 32]            # declare DUT Vmin, Vtyp and Vmax test voltages
+# EA-PS 2042-10 B remote controlled PSU is used unless DSOX_MANUAL_PSU environment variable is '1', then the operator
+# sets the voltages when asked:
+rc_psu_available = os.environ.get('DSOX_MANUAL_PSU', '0') != '1'
 
-    import ea_psu_controller
-    # more information on https://pypi.org/project/ea-psu-controller/
+if rc_psu_available:
+    try:
+        import ea_psu_controller
+        # more information on https://pypi.org/project/ea-psu-controller/
+    except ImportError:
+        raise ImportError('Remote controlled PSU needs ea_psu_controller (pip install ea-psu-controller), '
+                          'set DSOX_MANUAL_PSU=1 to set the voltages by hand.') from None
 
     ps_com_port = 'COM3'
     """
     ToDo: Update script to automatically find the COM port number.
     """
-    out_voltage = 0
     ps_name = ea_psu_controller.PsuEA.PSU_DEVICE_LIST_WIN
     print(f'Power Supply name: {ps_name}')
     print(f'Connecting to  {ps_com_port}')
@@ -30,17 +43,18 @@ if rc_psu_available:
 
     psu.set_voltage(VBATT[1])
 else:
-    while True:
-        i = input("Turn OFF PSU. Press 'y' (then hit Enter) when ready.")
-        if i == 'y':
-            break
+    # operator sets the voltages when asked:
+    psu = scope_sweep.ManualPsu()
 
 # address can be obtained from the device itself pressing Utility -> IO. VISA address will be displayed in
 # a new window. Pass it as string when creating the object or create variable like:
-address = 'USB0::0x0957::0x1798::MY59124127::0::INSTR'
+# DSOX_ADDRESS environment variable overrides the address, e.g. 'SIM::DC' runs on simulated oscilloscope:
+address = os.environ.get('DSOX_ADDRESS', 'USB0::0x0957::0x1798::MY59124127::0::INSTR')
 
 # set the filesystem path where the results will be stored:
 results_path = 'C:\\Test_Results\\PSU_PMIC\\'   # double \\ is required to escape the special character.
+# DSOX_RESULTS_PATH environment variable (ending with path separator) overrides the path:
+results_path = os.environ.get('DSOX_RESULTS_PATH', results_path)
 # if path does not exist then create it:
 if os.path.exists(results_path):
     pass
@@ -53,40 +67,32 @@ log_file = 'SMPS_Measurements.txt'
 
 measure_ps = keysight_DSOX2000А_3000A.Power(address)
 
-# turn on the DUT as the communication exists only on boot.
-# If bus is always busy comment the if statement
-psu.output_on()
-for vbatt in VBATT:
 
+def dc_measured(scope, runner):
+    # no trigger is suitable for DC voltage: wait until the oscilloscope has valid result instead of fixed sleep
+    return scope_results.measurement_value(scope.query(scope.results['V_DC'])) is not None
+
+
+steps = [
     # **************************************************************************
-    # measure DC voltage level
-    # set file name for the record:
-    img_name = f'VDC_{dut_sample_point}_{vbatt}V.png'
-    psu.set_voltage(vbatt)
-    time.sleep(2)
-    # prepare oscilloscope to fetch correct image
-    measure_ps.set_unit_v_meas()
-    measure_ps.set_meas_dc(5)          # expect around 5V at PMIC input
-    time.sleep(2)                      # wait 2s to obtain measurement as no trigger is suitable for DC voltage
-    measure_ps.get_screen(img_name, results_path)
-    measure_ps.log_measures(log_file, results_path, measure_ps.results)
+    # measure DC voltage level, expect around 5V at PMIC input:
+    {'name': 'V_DC', 'setup': 'set_unit_v_meas', 'measure': ('meas_dc', 1), 'wait_for': dc_measured,
+     'screen': f'VDC_{dut_sample_point}_{{voltage}}V.png', 'log': log_file},
     # **************************************************************************
     # while DUT up and running do the AC voltage measurement at the same point
     # to determine the ripple voltage at the same time.
     # Hint: passive probe with ground spring or active probe is better to be used
-
-    # set file name for the record:
-    img_name = f'VAC_{dut_sample_point}_{vbatt}V.png'
-
-    measure_ps.set_unit_v_meas()
-    measure_ps.set_meas_ac(5)
-    time.sleep(3)
-    measure_ps.get_trigger()
-    time.sleep(1)
-    measure_ps.get_screen(img_name, results_path)
-    time.sleep(1)
-    measure_ps.log_measures(log_file, results_path, measure_ps.results)
+    # set_meas_ac sets the edge trigger at the expected voltage too, wait only waits for the trigger:
+    {'name': 'V_AC', 'setup': 'set_unit_v_meas', 'measure': ('set_meas_ac', 5), 'wait': True,
+     'screen': f'VAC_{dut_sample_point}_{{voltage}}V.png', 'log': log_file},
     # **************************************************************************
+]
 
+# turn on the DUT as the communication exists only on boot.
+if rc_psu_available:
+    psu.output_on()
 
+sweep = scope_sweep.VoltageSweep(psu, measure_ps, VBATT, steps, results_path)
+sweep.run()
 
+del measure_ps
@@ -0,0 +1,83 @@
+"""
+This module provides asyncio client `AsyncOscilloscope` for the classes of `keysight_DSOX2000A_3000A`.
+
+All methods of the wrapped `Oscilloscope` (or `I2C`, `Power`) object are exposed as awaitables. The blocking VISA
+calls run on a dedicated single thread executor of the instrument, so calls to one instrument keep their order
+while the event loop is free to process data of the previous test, control the PSU or talk to other instruments.
+Example:
+
+    async def main():
+        scope = await AsyncOscilloscope.connect('USB0::0x0957::0x17A4::MY53280562::0::INSTR', I2C)
+        await scope.set_unit_for_i2c()
+        await scope.set_trig_i2c_start()
+        trigger = asyncio.ensure_future(scope.get_trigger(timeout=10))
+        write_report(previous_results)      # runs while waiting for the trigger
+        await trigger
+        await scope.get_screen('I2C_Start.png', results_path)
+        await scope.close()
+
+    asyncio.run(main())
+
+**Note:** cancelling an awaited call does not interrupt the blocking call already running in the executor thread,
+use the `timeout` arguments of the wrapped methods instead.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from . import keysight_DSOX2000A_3000A as dsox
+except ImportError:     # module used as script from its own directory
+    import keysight_DSOX2000A_3000A as dsox
+
+
+class AsyncOscilloscope:
+    """
+    Asyncio wrapper of oscilloscope object `scope`. Any method of `scope` called on this object returns coroutine
+    running the method on the instrument executor, e.g. `await async_scope.query('*IDN?')`. Other attributes are
+    returned as they are.
+    """
+
+    def __init__(self, scope, executor=None):
+        self.scope = scope
+        """`scope` is the wrapped `keysight_DSOX2000A_3000A.Oscilloscope` object."""
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='dsox')
+        """`executor` runs the blocking calls of this instrument one after another."""
+
+    @classmethod
+    async def connect(cls, address, scope_class=dsox.Oscilloscope, rm=None):
+        """
+        Opens oscilloscope at `address` as `scope_class` object (`Oscilloscope`, `I2C` or `Power`) on a new
+        instrument executor and returns its `AsyncOscilloscope`.
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dsox')
+        scope = await asyncio.get_running_loop().run_in_executor(executor, scope_class, address, rm)
+
+        return cls(scope, executor)
+
+    async def call(self, method, *args, **kwargs):
+        """Runs `method(*args, **kwargs)` (any blocking callable, e.g. a lambda using `scope`) on the executor."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor,
+                                                                functools.partial(method, *args, **kwargs))
+
+    def __getattr__(self, name):
+        attribute = getattr(self.scope, name)
+        if not callable(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def method(*args, **kwargs):
+            return await self.call(attribute, *args, **kwargs)
+
+        return method
+
+    async def close(self):
+        """Writes commands still queued in `scope`, releases the connection and stops the executor."""
+        await self.call(self.scope.close)
+        self.executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
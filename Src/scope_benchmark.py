@@ -0,0 +1,171 @@
+"""
+Benchmark of the automation overhead: drives `keysight_DSOX2000A_3000A.I2C`, `Power` and
+`Oscilloscope.get_measurement_statistics()` against the simulated oscilloscope of `scope_simulator` with modelled
+link latency and bandwidth, and reports wall time, number of commands, I/O operations and bytes transferred for every
+phase of the test flows:
+
+* `setup` - oscilloscope setup up to the barrier point (`flush()`)
+* `trigger` - waiting for the trigger event
+* `measure_log` - querying the measurement results and writing them to the log file
+* `screenshot` - screen image transfer and writing
+* `statistics/<method>` - 20 samples of a delay measurement by each statistics method
+
+Results are saved as JSON. When a baseline file from an earlier run is given, phases needing more I/O operations
+(round trips) or commands than the baseline are reported as regressions and the script exits with status 1. Wall times
+are only reported, as they depend on the machine. `scope_benchmark_baseline.json` holds the reference run with the
+default settings:
+
+    python scope_benchmark.py --baseline scope_benchmark_baseline.json
+
+Usage: python scope_benchmark.py [--link usb|lan] [--latency s] [--bandwidth bytes/s] [--save file] [--baseline file]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+try:
+    from . import keysight_DSOX2000A_3000A as dsox
+except ImportError:     # module used as script from its own directory
+    import keysight_DSOX2000A_3000A as dsox
+
+LINKS = {
+    'usb': {'latency': 0.0005, 'transfer_rate': 8e6},
+    'lan': {'latency': 0.002, 'transfer_rate': 4e6},
+}
+"""Modelled links: `latency` [s] of every I/O operation and `transfer_rate` [bytes/s] of binary blocks."""
+
+STATISTICS_SAMPLES = 20
+
+IO_COUNTERS = ('commands', 'writes', 'reads', 'bytes_written', 'bytes_read')
+
+
+class PhaseTimer:
+    """Collects wall time and I/O counters of the simulated instrument for named phases of test flows."""
+
+    def __init__(self):
+        self.phases = {}
+
+    def measure(self, phase, scope, action, *args):
+        """Runs `action(*args)` and adds its duration and I/O counters of `scope` to `phase`."""
+        before = dict(scope.unit.io_stats)
+        start = perf_counter()
+        action(*args)
+        duration = perf_counter() - start
+        entry = self.phases.setdefault(phase, dict({'time': 0.0, 'runs': 0}, **{c: 0 for c in IO_COUNTERS}))
+        entry['time'] += duration
+        entry['runs'] += 1
+        for counter in IO_COUNTERS:
+            entry[counter] += scope.unit.io_stats[counter] - before[counter]
+
+
+def i2c_flow(timer, address, path):
+    """Three tests of `DSOX_I2C_example.py`: setup, trigger, measurement with log and screenshot each."""
+    scope = dsox.I2C(address)
+    tests = [
+        ('I2C_Slew_Rate.png', lambda: (scope.set_unit_for_i2c(), scope.set_meas_rise_fall_times(),
+                                       scope.set_trig_Nth_edge(1))),
+        ('I2C_SCL_Frequency.png', lambda: (scope.set_unit_for_i2c(), scope.set_meas_scl_freq_duty(),
+                                           scope.set_trig_Nth_edge(1))),
+        ('I2C_SDA_Setup.png', lambda: (scope.set_unit_for_i2c(), scope.set_meas_sda_setup(),
+                                       scope.set_trig_i2c_start())),
+    ]
+    for image, setup in tests:
+        timer.measure('i2c/setup', scope, lambda: (setup(), scope.flush()))
+        timer.measure('i2c/trigger', scope, scope.get_trigger)
+        timer.measure('i2c/screenshot', scope, scope.get_screen, image, path)
+        timer.measure('i2c/measure_log', scope, scope.get_measured_values, 'I2C_Measurements.txt', path)
+    del scope
+
+
+def power_flow(timer, address, path):
+    """DC voltage test of `psu_tests_example.py` for three supply voltages."""
+    scope = dsox.Power(address)
+    for vbatt in (10, 28, 32):
+        timer.measure('power/setup', scope, lambda: (scope.set_unit_v_meas(), scope.meas_dc(1), scope.flush()))
+        timer.measure('power/screenshot', scope, scope.get_screen, f'V_DC_{vbatt}V.png', path)
+        timer.measure('power/measure_log', scope, scope.log_measures, 'V_DC.txt', path, scope.results)
+    del scope
+
+
+def statistics_flow(timer, address):
+    """Delay statistics of `CAN_Tests_Setup4.py` taken by every method of `STATISTICS_METHODS`."""
+    scope = dsox.Oscilloscope(address)
+    scope.init()
+    scope.apply_profile({'timebase': {'SCALe': 2e-6, 'REFerence': 'CENTer'},
+                         'thresholds': {1: (35, 30, 25), 2: (35, 30, 25)}})
+    scope.send(':MEASure:CLEar')
+    scope.send(':MEASure:DEFine DELay,-1,-1')
+    scope.send(':MEASure:DELay CHANnel1,CHANnel2')
+    scope.flush()
+    for method in dsox.STATISTICS_METHODS:
+        timer.measure(f'statistics/{method}', scope, scope.get_measurement_statistics, 'DELay', STATISTICS_SAMPLES,
+                      method)
+    del scope
+
+
+def report(phases, baseline=None):
+    """Prints table of `phases`, compared with `baseline` phases if given. Returns list of regressed phases."""
+    regressions = []
+    print(f'{"phase":<24}{"time [ms]":>11}{"runs":>6}{"commands":>10}{"writes":>8}{"reads":>8}'
+          f'{"bytes out":>11}{"bytes in":>11}')
+    for phase, entry in phases.items():
+        line = f'{phase:<24}{entry["time"] * 1000:>11.1f}{entry["runs"]:>6}{entry["commands"]:>10}' \
+               f'{entry["writes"]:>8}{entry["reads"]:>8}{entry["bytes_written"]:>11}{entry["bytes_read"]:>11}'
+        old = (baseline or {}).get(phase)
+        if old is not None:
+            round_trips = entry['writes'] + entry['reads']
+            old_round_trips = old['writes'] + old['reads']
+            line += f'  ({round_trips - old_round_trips:+d} I/O, {(entry["time"] - old["time"]) * 1000:+.1f} ms)'
+            if round_trips > old_round_trips or entry['commands'] > old['commands']:
+                regressions.append(phase)
+                line += '  REGRESSION'
+        print(line)
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of test flows against simulated oscilloscope.')
+    parser.add_argument('--link', choices=LINKS, default='usb', help='modelled link (default usb)')
+    parser.add_argument('--latency', type=float, help='latency of every I/O operation [s], overrides the link')
+    parser.add_argument('--bandwidth', type=float, help='binary transfer rate [bytes/s], overrides the link')
+    parser.add_argument('--points', type=int, default=100000, help='acquisition record length')
+    parser.add_argument('--save', default='scope_benchmark.json', help='file to save the results to')
+    parser.add_argument('--baseline', help='results of an earlier run to check regressions against')
+    args = parser.parse_args()
+
+    link = dict(LINKS[args.link])
+    if args.latency is not None:
+        link['latency'] = args.latency
+    if args.bandwidth is not None:
+        link['transfer_rate'] = args.bandwidth
+    options = f'::latency={link["latency"]}::transfer_rate={link["transfer_rate"]}::points={args.points}'
+    print(f'Link: latency {link["latency"] * 1000} ms, bandwidth {link["transfer_rate"] / 1e6} MB/s.')
+
+    timer = PhaseTimer()
+    with tempfile.TemporaryDirectory() as path:
+        path += os.sep
+        i2c_flow(timer, 'SIM::I2C' + options, path)
+        power_flow(timer, 'SIM::DC' + options, path)
+    statistics_flow(timer, 'SIM::CAN_LOOP' + options)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['phases']
+    regressions = report(timer.phases, baseline)
+
+    with open(args.save, 'w') as f:
+        json.dump({'link': link, 'points': args.points, 'phases': timer.phases}, f, indent=4)
+    print(f'Results saved to {args.save}.')
+    if regressions:
+        print(f'Round trip regressions in: {", ".join(regressions)}')
+
+    return not regressions
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
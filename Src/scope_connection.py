@@ -0,0 +1,245 @@
+"""
+This module provides the pooled connection layer used by `keysight_DSOX2000A_3000A.Oscilloscope`.
+
+`ConnectionPool` keeps one resource manager per process (one for real instruments and one for simulated 'SIM::'
+addresses of `scope_simulator`) and one open `Session` per VISA address. Creating oscilloscope objects repeatedly,
+e.g. new `I2C` object for every test, then reuses the open session instead of enumerating the VISA stack and opening
+the instrument again.
+
+`Session` is used in place of the pyvisa resource (`Oscilloscope.unit`). When an I/O operation fails because the
+session became stale (lost USB/LAN connection, invalidated session) it reopens the instrument. Timeout alone does not
+mean stale session (e.g. long :WAVeform:DATA? or *OPC? after slow operation): the session is checked by device clear
+and *IDN? query first and reopened only if the check fails too, otherwise the timeout is raised. Complete query
+transactions (`RETRY_CALLS`) are repeated after reconnection, up to `ConnectionPool.max_retries` times, so long soak
+runs survive USB hiccups. Other operations (writes and reads of a transaction started by a write, e.g. a binary block
+read in chunks) cannot be repeated on the fresh session on their own: the error is raised after the reconnection
+and the caller repeats the whole transaction. Queries clearing a register (`REGISTER_QUERIES`) are never repeated,
+as the lost reply may have cleared the event. Number of reconnections is kept in `Session.retries` and shown in the
+transaction trace of the oscilloscope.
+
+Sessions released by the oscilloscope objects stay open in the pool and are closed by `ConnectionPool.close()`, at the
+latest at the interpreter exit for the process-wide pool `POOL`. The pool is also a context manager:
+
+    with ConnectionPool() as pool:
+        scope = keysight_DSOX2000A_3000A.I2C(address, pool=pool)
+        ...
+    # all sessions and resource managers of the pool are closed here
+
+PyVisa is imported by `import_visa()` when the first real instrument is opened, simulated instruments work without it.
+"""
+import atexit
+import sys
+import threading
+
+try:
+    from . import scope_simulator
+except ImportError:     # module used as script from its own directory
+    import scope_simulator
+
+RETRY_CALLS = ('query', 'query_binary_values', 'query_ascii_values')
+"""Methods of the resource which are complete transactions (command and its reply) repeated after reconnection."""
+
+REGISTER_QUERIES = ('*ESR?', ':TER?', ':SYST:ERR?', ':OPER:EVEN?', ':MTES:EVEN?', ':OVLR?')
+"""Queries (short form, see `scope_simulator.short_form()`) reading and clearing a register or queue, not repeated
+after reconnection."""
+
+STALE_ERRORS = ('error_connection_lost', 'error_io', 'error_invalid_object')
+"""Names of VISA status codes (`pyvisa.constants.StatusCode`) of I/O errors after which the session is reopened."""
+
+
+def import_visa():
+    """Imports `pyvisa` on first use and returns the module."""
+    import pyvisa
+
+    return pyvisa
+
+
+def loaded_visa():
+    """
+    Returns `pyvisa` module if it was already imported (by opening a real instrument), *None* otherwise. Resources
+    of a process without pyvisa loaded are simulated ones, so VISA specific features can be skipped without
+    importing it.
+    """
+    return sys.modules.get('pyvisa')
+
+
+def is_stale(error):
+    """Returns *True* if exception `error` of an I/O operation means the session has to be reopened."""
+    visa = loaded_visa()    # errors of pyvisa can only come after it was imported
+    if visa is not None:
+        if isinstance(error, visa.errors.VisaIOError):
+            return error.error_code in [getattr(visa.constants.StatusCode, name) for name in STALE_ERRORS]
+        if isinstance(error, visa.errors.InvalidSession):
+            return True
+
+    return isinstance(error, ConnectionError)
+
+
+def is_timeout(error):
+    """Returns *True* if exception `error` of an I/O operation is a timeout."""
+    visa = loaded_visa()
+    if visa is not None and isinstance(error, visa.errors.VisaIOError):
+        return error.error_code == visa.constants.StatusCode.error_timeout
+
+    return isinstance(error, TimeoutError)
+
+
+def clears_register(cmd_str):
+    """Returns *True* if query `cmd_str` (may be compound) contains one of `REGISTER_QUERIES`."""
+    return any(scope_simulator.short_form(command.strip().split(' ')[0]) in REGISTER_QUERIES
+               for command in str(cmd_str).split(';') if command.strip())
+
+
+class Session:
+    """
+    Open instrument session of `ConnectionPool`. Attributes and methods of the pyvisa resource are available on the
+    session object; method calls failing on stale session reconnect, queries (`RETRY_CALLS` except
+    `REGISTER_QUERIES`) are repeated then.
+    Attributes set on the session (e.g. `timeout`) are set on the resource and restored after reconnection.
+    """
+
+    def __init__(self, pool, address, rm):
+        self.__dict__.update(pool=pool, address=address, rm=rm, resource=None, retries=0, users=0, settings={},
+                             closed=False)
+        self.open()
+
+    def open(self):
+        """Opens the resource of `address` and applies the attributes set on the session."""
+        self.resource = self.rm.open_resource(self.address)
+        for name, value in self.settings.items():
+            setattr(self.resource, name, value)
+
+    def reconnect(self, error):
+        """Closes stale resource (failing `error`) and opens it again."""
+        print(f'{self.address}: {type(error).__name__} ({error}), reconnecting.')
+        self.retries += 1
+        try:
+            self.resource.close()
+        except Exception:
+            pass
+        self.open()
+        self.resource.clear()
+
+    def responds(self):
+        """Returns *True* if the instrument answers *IDN? after device clear (session is not stale)."""
+        try:
+            self.resource.clear()
+            self.resource.query('*IDN?')
+        except Exception:
+            return False
+
+        return True
+
+    def call(self, name, *args, **kwargs):
+        """
+        Calls method `name` of the resource. On stale session it reconnects and repeats the call if it is one of
+        `RETRY_CALLS` and does not clear a register, other calls raise the error after the reconnection. Timeout of
+        responding instrument is raised without reconnection.
+        """
+        if self.closed:
+            raise ConnectionError(f'{self.address}: session was closed with its connection pool.')
+        attempt = 0
+        while True:
+            try:
+                return getattr(self.resource, name)(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.pool.max_retries:
+                    raise
+                if not is_stale(e) and not (is_timeout(e) and not self.responds()):
+                    raise
+                attempt += 1
+                self.reconnect(e)
+                if name not in RETRY_CALLS or (args and clears_register(args[0])):
+                    raise
+
+    def __getattr__(self, name):
+        attribute = getattr(self.resource, name)
+        if not callable(attribute):
+            return attribute
+
+        def method(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+
+        return method
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            self.__dict__[name] = value
+        else:
+            self.settings[name] = value
+            setattr(self.resource, name, value)
+
+    def close(self):
+        """Releases the session back to the pool; it stays open for the next user of the address."""
+        self.pool.release(self)
+
+
+class ConnectionPool:
+    """Process-wide pool of instrument sessions keyed by VISA address, see module description."""
+
+    def __init__(self, max_retries=2):
+        self.max_retries = max_retries
+        """`max_retries` is maximal number of reconnections for one I/O operation."""
+        self.rm = None
+        """`rm` is the VISA resource manager of real instruments, created on first connection."""
+        self.sim_rm = None
+        """`sim_rm` is the resource manager of simulated instruments ('SIM::' addresses)."""
+        self.sessions = {}
+        """`sessions` is dictionary of (address, resource manager) to open `Session`."""
+        self.lock = threading.Lock()
+
+    def resource_manager(self, address):
+        """Returns the pool resource manager for `address`, creating it on first use."""
+        if address.upper().startswith(scope_simulator.SIM_PREFIX):
+            if self.sim_rm is None:
+                self.sim_rm = scope_simulator.SimulatedResourceManager()
+            return self.sim_rm
+        if self.rm is None:
+            self.rm = import_visa().ResourceManager()
+        return self.rm
+
+    def open(self, address, rm=None):
+        """
+        Returns session of `address`, opening it with resource manager `rm` (pool one if *None*) unless already open.
+        """
+        with self.lock:
+            key = (address, None if rm is None else id(rm))
+            session = self.sessions.get(key)
+            if session is None:
+                session = Session(self, address, rm if rm is not None else self.resource_manager(address))
+                self.sessions[key] = session
+            session.users += 1
+
+            return session
+
+    def release(self, session):
+        """Marks one user of `session` as finished. The session stays open for reuse."""
+        with self.lock:
+            session.users = max(session.users - 1, 0)
+
+    def close(self):
+        """Closes all sessions and the resource managers created by the pool."""
+        with self.lock:
+            for session in self.sessions.values():
+                session.closed = True
+                try:
+                    session.resource.close()
+                except Exception as e:
+                    print(f'{session.address}: closing failed: {e}')
+            self.sessions.clear()
+            for rm in (self.sim_rm, self.rm):
+                if rm is not None:
+                    rm.close()
+            self.rm = None
+            self.sim_rm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+
+POOL = ConnectionPool()
+"""Process-wide pool used by the oscilloscope objects unless other pool is passed."""
+atexit.register(POOL.close)
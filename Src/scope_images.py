@@ -0,0 +1,121 @@
+"""
+This module provides content-addressed store of oscilloscope screenshots for long sweeps which capture many
+near-identical screens.
+
+`ImageStore` hashes every image (SHA-256) and keeps each unique image only once as `<hash>.<extension>` in its
+directory. Every capture is recorded in the reference log `refs.jsonl` of the directory (JSON lines with the fields of
+`REF_FIELDS`), so each name used by a test script (e.g. 'C:\\results\\28V\\CAN_Levels.png') can be resolved to
+the stored image. Oscilloscope objects use the store for `Oscilloscope.get_screen()` when it is assigned to
+`Oscilloscope.image_store`:
+
+    measure_can.image_store = scope_images.ImageStore(results_path + 'images\\')
+    stored = measure_can.get_screen('CAN_Levels.png', res_path)     # path of the stored image
+
+With `perceptual=True` the image is also compared with the last stored one after blanking `ignore` regions (by default
+the measurement readouts, see `READOUT_REGIONS`). When no more than `tolerance` part of the pixels differ, the capture
+references the last stored image instead of storing a new one. The perceptual comparison needs Pillow, which is
+imported only then.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from time import time
+
+import numpy as np
+
+REF_FIELDS = ('time', 'name', 'sha256', 'file', 'kind')
+"""Fields of the reference log records: computer time of the capture, name of the capture given by the test script,
+SHA-256 of the image, stored file name and kind of the capture ('new', 'duplicate' or 'similar')."""
+
+READOUT_REGIONS = ((0, 420, 800, 480),)
+"""Regions (left, top, right, bottom) in pixels of the 800x480 screen with the measurement readouts, ignored by the
+perceptual comparison."""
+
+PIXEL_TOLERANCE = 16
+"""Difference of gray levels (0..255) from which a pixel counts as changed in the perceptual comparison."""
+
+
+def screen_pixels(data, ignore=READOUT_REGIONS):
+    """Decodes image `data` (bytes of PNG or BMP) to array of gray levels with `ignore` regions blanked."""
+    from PIL import Image   # optional dependency, needed for the perceptual comparison only
+
+    pixels = np.array(Image.open(io.BytesIO(data)).convert('L'), dtype=np.int16)
+    for left, top, right, bottom in ignore:
+        pixels[top:bottom, left:right] = 0
+
+    return pixels
+
+
+class ImageStore:
+    """
+    Content-addressed image store in directory `path` (created if missing), see module description. `perceptual`
+    enables the comparison with the last stored image, `ignore` and `tolerance` tune it.
+    """
+
+    def __init__(self, path, perceptual=False, ignore=READOUT_REGIONS, tolerance=0.001):
+        if perceptual:
+            try:
+                import PIL
+            except ImportError:
+                raise ImportError('Perceptual comparison of images needs Pillow (pip install Pillow).') from None
+        self.path = path
+        """`path` is the store directory."""
+        self.perceptual = perceptual
+        self.ignore = ignore
+        self.tolerance = tolerance
+        self.refs_path = os.path.join(path, 'refs.jsonl')
+        """`refs_path` is the reference log file."""
+        self.counts = {'new': 0, 'duplicate': 0, 'similar': 0}
+        """`counts` is number of captures of each kind added by this object."""
+        self.last = None
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def add(self, name, data):
+        """
+        Stores image `data` (bytes) captured as `name` unless the same (or with `perceptual`, similar) image is
+        already stored, records the reference and returns path of the stored image.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        stored = digest + (os.path.splitext(name)[1].lower() or '.img')
+        with self.lock:
+            if os.path.exists(os.path.join(self.path, stored)):
+                kind = 'duplicate'
+            else:
+                kind = 'new'
+                pixels = screen_pixels(data, self.ignore) if self.perceptual else None
+                if pixels is not None and self.last is not None and self.similar(pixels, self.last[1]):
+                    kind = 'similar'
+                    stored = self.last[0]
+                else:
+                    temp_path = os.path.join(self.path, stored + '.tmp')
+                    with open(temp_path, 'wb') as f:
+                        f.write(data)
+                    os.replace(temp_path, os.path.join(self.path, stored))  # never leave partial image under its hash
+                    if pixels is not None:
+                        self.last = (stored, pixels)
+            self.counts[kind] += 1
+            with open(self.refs_path, 'a') as refs:
+                refs.write(json.dumps(dict(zip(REF_FIELDS, (time(), name, digest, stored, kind)))) + '\n')
+
+        return os.path.join(self.path, stored)
+
+    def similar(self, pixels, other):
+        """Returns *True* if no more than `tolerance` part of `pixels` differs from `other` (see `PIXEL_TOLERANCE`)."""
+        if pixels.shape != other.shape:
+            return False
+
+        return np.mean(np.abs(pixels - other) > PIXEL_TOLERANCE) <= self.tolerance
+
+    def references(self):
+        """Returns dictionary of capture name to path of the stored image, the last capture of each name wins."""
+        refs = {}
+        if os.path.exists(self.refs_path):
+            with open(self.refs_path, 'r') as f:
+                for line in f:
+                    record = json.loads(line)
+                    refs[record['name']] = os.path.join(self.path, record['file'])
+
+        return refs
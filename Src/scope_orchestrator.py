@@ -0,0 +1,150 @@
+"""
+This module runs one test plan on several oscilloscopes of `keysight_DSOX2000A_3000A` in parallel.
+
+Each bench (oscilloscope) is driven by its own thread, all connections are taken from one connection pool of
+`scope_connection` sharing one VISA resource manager. Test plan is any function `plan(scope, bench)` taking the
+connected oscilloscope object and its `Bench` description; its return value is collected per bench. When the plan
+returns dictionaries of measurement label to value (e.g. returned by `Oscilloscope.get_measured_values()`) they can
+be merged to one table comparing the benches. Example:
+
+    benches = [Bench('bench1', 'USB0::0x0957::0x17A4::MY53280562::0::INSTR', I2C),
+               Bench('bench2', 'USB0::0x0957::0x17A4::MY53280733::0::INSTR', I2C)]
+
+    def plan(scope, bench):
+        scope.set_unit_for_i2c()
+        scope.set_meas_rise_fall_times()
+        scope.set_trig_Nth_edge(1)
+        scope.get_trigger()
+        return scope.get_measured_values(f'{bench.name}_I2C_Measurements.txt', results_path)
+
+    with Orchestrator(benches) as orchestrator:
+        results = orchestrator.run(plan)
+    write_results(results_path + 'I2C_benches.txt', results)
+
+Throughput then scales with the number of benches, as the threads mostly wait for the instruments.
+
+**Note:** errors raised by the plan on one bench are printed and kept in `Orchestrator.errors`, the other benches
+continue.
+"""
+import traceback
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from . import keysight_DSOX2000A_3000A as dsox
+    from . import scope_connection
+except ImportError:     # module used as script from its own directory
+    import keysight_DSOX2000A_3000A as dsox
+    import scope_connection
+
+
+class Bench(namedtuple('Bench', ['name', 'address', 'scope_class'])):
+    """Oscilloscope of one test bench: `name` used in results, VISA `address` and `scope_class` to open it with."""
+    __slots__ = ()
+
+    def __new__(cls, name, address, scope_class=dsox.Oscilloscope):
+        return super().__new__(cls, name, address, scope_class)
+
+
+class Orchestrator:
+    """
+    Opens oscilloscopes of `benches` (list of `Bench` or tuples with the same fields) from connection `pool`
+    (process-wide `scope_connection.POOL` by default) and runs test plans on all of them in parallel, one thread per
+    bench. Resource manager `rm` replaces the one of the pool.
+
+    **Note:** every bench needs its own oscilloscope address. Benches with the same address would share one pooled
+    session and interleave their transactions from different threads, so `ValueError` is raised for them.
+    """
+
+    def __init__(self, benches, rm=None, pool=None):
+        self.benches = [Bench(*bench) for bench in benches]
+        names = [bench.name for bench in self.benches]
+        if len(set(names)) != len(names):
+            raise ValueError(f'Bench names must be unique, got {names}.')
+        addresses = [bench.address.upper() for bench in self.benches]
+        shared = sorted({address for address in addresses if addresses.count(address) > 1})
+        if shared:
+            raise ValueError(f'Bench addresses must be unique, {shared} used by several benches.')
+        self.rm = rm
+        self.pool = pool or scope_connection.POOL
+        self.scopes = {}
+        """`scopes` is dictionary of bench name to its connected oscilloscope object."""
+        self.errors = {}
+        """`errors` is dictionary of bench name to the exception raised by connecting or the last `run()` on the
+        bench."""
+
+    def connect(self):
+        """Opens the oscilloscopes of all benches not connected yet, in parallel."""
+        def open_scope(bench):
+            self.scopes[bench.name] = bench.scope_class(bench.address, self.rm, self.pool)
+
+        self.run_benches(open_scope, [bench for bench in self.benches if bench.name not in self.scopes])
+
+    def run(self, plan, *args):
+        """
+        Runs `plan(scope, bench, *args)` on all benches in parallel and returns dictionary of bench name to the value
+        returned by the plan. Benches where the plan raised an error are left out of the results (see `errors`).
+        """
+        self.connect()
+        self.errors = {name: e for name, e in self.errors.items() if name not in self.scopes}    # connection errors
+        results = {}
+
+        def run_plan(bench):
+            results[bench.name] = plan(self.scopes[bench.name], bench, *args)
+
+        self.run_benches(run_plan, [bench for bench in self.benches if bench.name in self.scopes])
+
+        return {bench.name: results[bench.name] for bench in self.benches if bench.name in results}
+
+    def run_benches(self, function, benches):
+        """Calls `function(bench)` for all `benches` in parallel threads, recording errors in `errors`."""
+        def guarded(bench):
+            try:
+                function(bench)
+            except Exception as e:
+                print(f'{bench.name}: {type(e).__name__}: {e}')
+                traceback.print_exc()
+                self.errors[bench.name] = e
+
+        if not benches:
+            return
+        with ThreadPoolExecutor(max_workers=len(benches), thread_name_prefix='bench') as executor:
+            list(executor.map(guarded, benches))
+
+    def close(self):
+        """Releases the connections of all oscilloscopes to the pool."""
+        for name in list(self.scopes):
+            scope = self.scopes.pop(name)
+            try:
+                scope.close()
+            except Exception as e:
+                print(f'{name}: closing failed: {e}')
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+
+def merge_results(results):
+    """
+    Merges `results` of `Orchestrator.run()` where every bench returned dictionary of label to value. Returns
+    dictionary of label to dictionary of bench name to value, labels in order of their first appearance.
+    """
+    merged = {}
+    for name, values in results.items():
+        for label, value in values.items():
+            merged.setdefault(label, {})[name] = value
+
+    return merged
+
+
+def write_results(filepath, results):
+    """Writes merged `results` of `Orchestrator.run()` to file `filepath` as tab separated table, bench per column."""
+    names = list(results)
+    with open(filepath, 'w') as f:
+        f.write('\t'.join(['measurement'] + names) + '\n')
+        for label, values in merge_results(results).items():
+            f.write('\t'.join([label] + [str(values.get(name, '')).strip() for name in names]) + '\n')
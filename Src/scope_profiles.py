@@ -0,0 +1,202 @@
+"""
+This module describes oscilloscope setups in declarative way as *profiles* instead of long sequences of
+`Oscilloscope.send()` calls.
+
+Profile is a dictionary (or JSON file with the same structure) with the following optional sections:
+
+* `channels` - dictionary of channel number to dictionary of :CHANnel<n>:<setting> values
+* `display` - dictionary of :DISPlay:<setting> values
+* `thresholds` - dictionary of channel number to measurement thresholds in percent (upper, middle, lower)
+* `timebase` - dictionary of :TIMebase:<setting> values
+* `trigger` - dictionary of :TRIGger:<setting> values, written in the order given
+* `acquire` - dictionary of :ACQuire:<setting> values
+* `function` - dictionary of :FUNCtion:<setting> values (MATH waveform)
+* `measure` - list of measurements added after :MEASure:CLEar, e.g. 'VTOP CHANnel1'
+
+Example:
+
+    profile = {
+        'channels': {1: {'DISPlay': 'ON', 'LABel': 'CAN_H', 'SCALe': 0.5}},
+        'timebase': {'SCALe': 0.00000025, 'REFerence': 'CENTer'},
+    }
+
+Profile is checked by `validate_profile()` without any oscilloscope connected and translated to list of commands by
+`compile_profile()`. Compiled profile is applied by `keysight_DSOX2000A_3000A.Oscilloscope.apply_profile()` which
+writes only the commands changing the oscilloscope settings.
+"""
+import json
+
+PROFILE_SECTIONS = ('channels', 'display', 'thresholds', 'timebase', 'trigger', 'acquire', 'function', 'measure')
+"""Allowed profile sections in the order they are compiled."""
+
+SECTION_HEADERS = {
+    'display': ':DISPlay',
+    'timebase': ':TIMebase',
+    'trigger': ':TRIGger',
+    'acquire': ':ACQuire',
+    'function': ':FUNCtion',
+}
+"""Command header prefix of the simple *setting: value* sections."""
+
+CHANNEL_IDS = (1, 2, 3, 4)
+
+I2C_PROFILE = {
+    'channels': {
+        # turn required channels ON, keep others OFF and set proper labels on the ON channels:
+        1: {'DISPlay': 'ON', 'LABel': 'VC_I2C_SCL', 'SCALe': 1, 'OFFSet': 0, 'BWLimit': 'OFF'},
+        2: {'DISPlay': 'ON', 'LABel': 'VC_I2C_SDA', 'SCALe': 1, 'OFFSet': 3.5, 'BWLimit': 'OFF'},
+        3: {'DISPlay': 'OFF'},
+        4: {'DISPlay': 'OFF'},
+    },
+    'display': {'LABel': 'ON'},
+    # make sure lower, middle, upper measurement are 30%, 50%, 70% for each used channel:
+    'thresholds': {1: (70, 50, 30), 2: (70, 50, 30)},
+    'timebase': {
+        'MODE': 'MAIN',                 # timebase mode: MAIN, WINDow, XY, ROLL
+        'SCALe': 0.0000025,             # 100kHz units/div [sec]; main window horizontal scale
+        'REFerence': 'RIGHt',           # options: LEFT | CENTer | RIGHt
+        'POSition': 0,                  # default position, some tests move it
+    },
+    'trigger': {
+        'SWEep': 'NORMal',              # set acquisition mode to NORMAL
+        'EDGE:COUPling': 'DC',          # options AC | DC | LFReject
+        'HFReject': 'OFF',              # options: ON | OFF; interferes with LFReject above
+        'NREJect': 'OFF',               # options: ON | OFF
+    },
+}
+"""Setup used by `keysight_DSOX2000A_3000A.I2C.set_unit_for_i2c()`. CH1 = SCL, CH2 = SDA."""
+
+POWER_V_MEAS_PROFILE = {
+    'channels': {
+        1: {'DISPlay': 'ON', 'LABel': 'V_OUT', 'COUPling': 'DC'},
+        2: {'DISPlay': 'OFF', 'COUPling': 'DC'},
+        3: {'DISPlay': 'OFF', 'COUPling': 'DC'},
+        4: {'DISPlay': 'OFF', 'COUPling': 'DC'},
+    },
+    'display': {'LABel': 'ON'},
+    'timebase': {
+        'MODE': 'MAIN',                 # timebase mode: MAIN, WINDow, XY, ROLL
+        'SCALe': 0.050,                 # units/div [sec]; main window horizontal scale
+        'REFerence': 'LEFT',            # options: LEFT | CENTer | RIGHt
+    },
+    'trigger': {'SWEep': 'AUTO'},       # options: AUTO | NORMal
+    'acquire': {'TYPE': 'HRESolution'},  # options: NORMal | AVERage | HRESolution | PEAK
+}
+"""Setup used by `keysight_DSOX2000A_3000A.Power.set_unit_v_meas()`."""
+
+
+def load_profile(filepath):
+    """
+    Loads profile from JSON file `filepath` and validates it. Channel numbers written as JSON keys (strings) are
+    accepted. Returns the profile dictionary.
+    """
+    with open(filepath, 'r') as f:
+        profile = json.load(f)
+    validate_profile(profile)
+
+    return profile
+
+
+def validate_profile(profile):
+    """
+    Checks `profile` structure without oscilloscope connected. Raises `ValueError` describing the first problem
+    found, returns *None* if the profile is correct.
+    """
+    if not isinstance(profile, dict):
+        raise ValueError('Profile must be a dictionary.')
+
+    for section, settings in profile.items():
+        if section not in PROFILE_SECTIONS:
+            raise ValueError(f'Unknown profile section "{section}". Valid sections: {PROFILE_SECTIONS}.')
+
+        if section == 'measure':
+            if not isinstance(settings, (list, tuple)) or not all(isinstance(m, str) for m in settings):
+                raise ValueError('Section "measure" must be a list of measurement strings.')
+        elif section in ('channels', 'thresholds'):
+            if not isinstance(settings, dict):
+                raise ValueError(f'Section "{section}" must be a dictionary of channel number to settings.')
+            for channel_id, value in settings.items():
+                if to_channel_id(channel_id) not in CHANNEL_IDS:
+                    raise ValueError(f'Invalid channel "{channel_id}" in section "{section}".')
+                if section == 'channels':
+                    check_settings(f'channels/{channel_id}', value)
+                else:
+                    check_thresholds(channel_id, value)
+        else:
+            check_settings(section, settings)
+
+
+def check_settings(section, settings):
+    """Checks dictionary of *setting: value* pairs of profile `section`. Raises `ValueError` if not valid."""
+    if not isinstance(settings, dict):
+        raise ValueError(f'Section "{section}" must be a dictionary of settings.')
+    for setting, value in settings.items():
+        if not isinstance(setting, str) or not setting or ' ' in setting:
+            raise ValueError(f'Invalid setting name "{setting}" in section "{section}".')
+        if not isinstance(value, (str, int, float)):
+            raise ValueError(f'Setting "{setting}" in section "{section}" must be string, number or bool.')
+
+
+def check_thresholds(channel_id, thresholds):
+    """Checks (upper, middle, lower) thresholds in percent of `channel_id`. Raises `ValueError` if not valid."""
+    if (not isinstance(thresholds, (list, tuple)) or len(thresholds) != 3
+            or not all(isinstance(t, (int, float)) for t in thresholds)):
+        raise ValueError(f'Thresholds of channel {channel_id} must be (upper, middle, lower) in percent.')
+    upper, middle, lower = thresholds
+    if not 100 >= upper > middle > lower >= 0:
+        raise ValueError(f'Thresholds of channel {channel_id} must be 100 >= upper > middle > lower >= 0.')
+
+
+def to_channel_id(channel_id):
+    """Returns channel number as integer also for JSON keys like '1'. Returns *None* if not a number."""
+    try:
+        return int(channel_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_value(setting, value, quote_label=False):
+    """
+    Formats profile `value` as SCPI argument: bool as ON/OFF, numbers and strings as they are. Channel labels
+    (`quote_label`) are quoted.
+    """
+    if isinstance(value, bool):
+        return 'ON' if value else 'OFF'
+    if quote_label and setting.upper() == 'LABEL' and not str(value).startswith('"'):
+        return f'"{value}"'
+
+    return str(value)
+
+
+def compile_profile(profile):
+    """
+    Validates `profile` and translates it to list of SCPI commands in the order of `PROFILE_SECTIONS`.
+    Compile the profile once and pass the list to `Oscilloscope.apply_profile()` when it is applied many times.
+    """
+    validate_profile(profile)
+    commands = []
+
+    for section in PROFILE_SECTIONS:
+        settings = profile.get(section)
+        if not settings:
+            continue
+
+        if section == 'channels':
+            for channel_id in sorted(settings, key=to_channel_id):
+                channel = f':CHANnel{to_channel_id(channel_id)}'
+                for setting, value in settings[channel_id].items():
+                    commands.append(f'{channel}:{setting} {format_value(setting, value, quote_label=True)}')
+        elif section == 'thresholds':
+            for channel_id in sorted(settings, key=to_channel_id):
+                upper, middle, lower = settings[channel_id]
+                commands.append(f':MEASure:SOURce CHANnel{to_channel_id(channel_id)}')
+                commands.append(f':MEASure:DEFine THResholds,PERCent,{upper},{middle},{lower}')
+        elif section == 'measure':
+            commands.append(':MEASure:CLEar')
+            for measurement in settings:
+                commands.append(f':MEASure:{measurement}')
+        else:
+            for setting, value in settings.items():
+                commands.append(f'{SECTION_HEADERS[section]}:{setting} {format_value(setting, value)}')
+
+    return commands
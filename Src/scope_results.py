@@ -0,0 +1,183 @@
+"""
+This module provides `ResultsSink`, a buffered writer of typed measurement records for machine-readable results.
+
+One sink is kept open for the whole run and every measurement is written as record with fields `RESULT_FIELDS`:
+test title, parameter (label of the measurement), value as float (*None* if the oscilloscope could not measure it),
+unit derived from the measurement query (see `MEASUREMENT_UNITS`), computer time [s], oscilloscope
+identification and path of the screenshot of the test (stored image of `scope_images.ImageStore`, empty if none).
+Format is given by the file extension:
+
+* `.csv` - comma separated values with header line
+* `.jsonl` - JSON Lines, one record per line
+* `.parquet` - Apache Parquet, written in parts (see below); needs optional package `pyarrow` (`pip install pyarrow`,
+  imported only for this format)
+
+Oscilloscope objects write the results of `Oscilloscope.log_measures()` and `I2C.get_measured_values()` to the sink
+assigned to `Oscilloscope.results_sink` instead of appending them to text files:
+
+    with scope_results.ResultsSink(results_path + 'I2C_Measurements.csv') as sink:
+        measure_i2c.results_sink = sink
+        ...
+
+CSV and JSON Lines files are opened for appending, so a resumed run continues the same file. Parquet file is
+readable only when complete (closed), so it cannot be appended to: records are written to the file or, if it exists,
+to the first free part file `<name>.<n>.parquet` beside it. `ResultsSink.flush()` completes the current part, the
+following records start the next one. All parts are listed by `parquet_parts()`, e.g. to read them at once with
+`pyarrow.parquet.read_table(parquet_parts(filepath))`.
+"""
+import csv
+import json
+import os
+import threading
+from time import time
+
+RESULT_FIELDS = ('test', 'parameter', 'value', 'unit', 'timestamp', 'instrument', 'image')
+"""Fields of the result records in order."""
+
+MEASUREMENT_UNITS = (
+    ('FREQ', 'Hz'), ('COUN', 'Hz'), ('DUTY', '%'), ('NDUT', '%'), ('OVER', '%'), ('PRES', '%'), ('PHAS', 'deg'),
+    ('RIS', 's'), ('FALL', 's'), ('PWID', 's'), ('NWID', 's'), ('PER', 's'), ('DEL', 's'), ('TVAL', 's'),
+    ('TEDG', 's'), ('XMAX', 's'), ('XMIN', 's'), ('BWID', 's'), ('PPUL', ''), ('NPUL', ''), ('PEDG', ''),
+    ('NEDG', ''), ('VRAT', 'dB'), ('V', 'V'), ('AREA', 'Vs'),
+)
+"""Prefixes of :MEASure query short forms with the unit of their results, checked in order."""
+
+INVALID_MEASUREMENT = 9.9e37
+"""Value returned by the oscilloscope when the measurement cannot be done (as
+`keysight_DSOX2000A_3000A.INVALID_MEASUREMENT`), written as *None*."""
+
+SINK_FORMATS = ('.csv', '.jsonl', '.parquet')
+"""Supported file extensions."""
+
+
+def parquet_parts(filepath):
+    """Returns list of existing Parquet files of results `filepath`: the file and its parts in order of writing."""
+    stem, extension = os.path.splitext(filepath)
+    parts = [filepath] if os.path.exists(filepath) else []
+    number = 1
+    while os.path.exists(f'{stem}.{number}{extension}'):
+        parts.append(f'{stem}.{number}{extension}')
+        number += 1
+
+    return parts
+
+
+def measurement_unit(query):
+    """Returns unit of the result of measurement `query`, e.g. 's' for ':MEASure:RISetime? CHANnel1'."""
+    header = query.strip().split(' ')[0].upper().rstrip('?')
+    name = header.split(':')[-1]
+    for prefix, unit in MEASUREMENT_UNITS:
+        if name.startswith(prefix):
+            return unit
+
+    return ''
+
+
+def measurement_value(reply):
+    """Converts measurement `reply` to float, *None* if it is not a valid number."""
+    try:
+        value = float(reply)
+    except (TypeError, ValueError):
+        return None
+
+    return None if abs(value) >= INVALID_MEASUREMENT else value
+
+
+class ResultsSink:
+    """
+    Buffered writer of result records into file `filepath` (format by extension, see module description). Parquet
+    records are written in row groups of `row_group_size` records. Flush the sink to make the records written so
+    far durable, close it (or use it as context manager) to write the buffered records.
+    """
+
+    def __init__(self, filepath, row_group_size=10000):
+        self.filepath = filepath
+        self.format = os.path.splitext(filepath)[1].lower()
+        if self.format not in SINK_FORMATS:
+            raise ValueError(f'Unsupported results format "{self.format}". Valid formats: {SINK_FORMATS}.')
+        self.row_group_size = row_group_size
+        self.count = 0
+        """`count` is number of records written by this sink."""
+        self.rows = []
+        self.lock = threading.Lock()
+        self.file = None
+        self.writer = None
+        self.part_path = None
+        """`part_path` is the Parquet file currently written (*None* between parts)."""
+        if self.format == '.parquet':
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError('Parquet results need pyarrow (pip install pyarrow).') from None
+            self.pa = pyarrow
+            self.schema = pyarrow.schema([('test', pyarrow.string()), ('parameter', pyarrow.string()),
+                                          ('value', pyarrow.float64()), ('unit', pyarrow.string()),
+                                          ('timestamp', pyarrow.float64()), ('instrument', pyarrow.string()),
+                                          ('image', pyarrow.string())])
+        else:
+            new_file = not os.path.exists(filepath) or os.path.getsize(filepath) == 0
+            self.file = open(filepath, 'a', newline='')
+            if self.format == '.csv':
+                self.writer = csv.writer(self.file)
+                if new_file:
+                    self.writer.writerow(RESULT_FIELDS)
+
+    def write(self, test, parameter, value, unit='', timestamp=None, instrument='', image=''):
+        """Writes one record. `value` may be the oscilloscope reply string, it is converted to float."""
+        record = (test, parameter, measurement_value(value), unit, time() if timestamp is None else timestamp,
+                  instrument, image)
+        with self.lock:
+            if self.format == '.csv':
+                self.writer.writerow(['' if field is None else field for field in record])
+            elif self.format == '.jsonl':
+                self.file.write(json.dumps(dict(zip(RESULT_FIELDS, record))) + '\n')
+            else:
+                self.rows.append(record)
+                if len(self.rows) >= self.row_group_size:
+                    self.write_rows()
+            self.count += 1
+
+    def write_rows(self):
+        """Writes buffered Parquet records as one row group, opening next part file if no part is open."""
+        if self.rows:
+            if self.writer is None:
+                parts = parquet_parts(self.filepath)
+                stem, extension = os.path.splitext(self.filepath)
+                self.part_path = f'{stem}.{len(parts)}{extension}' if parts else self.filepath
+                self.writer = self.pa.parquet.ParquetWriter(self.part_path, self.schema)
+            columns = {name: list(column) for name, column in zip(RESULT_FIELDS, zip(*self.rows))}
+            self.writer.write_table(self.pa.table(columns, schema=self.schema))
+            self.rows = []
+
+    def close_part(self):
+        """Writes buffered Parquet records and completes the current part file."""
+        self.write_rows()
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.part_path = None
+
+    def flush(self):
+        """Writes buffered records to the file, so they are kept if the run is interrupted (completes Parquet part)."""
+        with self.lock:
+            if self.format == '.parquet':
+                self.close_part()
+            elif self.file is not None:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+
+    def close(self):
+        """Writes buffered records and closes the file."""
+        with self.lock:
+            if self.format == '.parquet':
+                self.close_part()
+            elif self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
@@ -0,0 +1,708 @@
+"""
+This module provides simulated oscilloscope Keysight DSOX2000A/3000A for runs without hardware, e.g. on CI machines
+or for measuring overhead of the automation itself.
+
+`SimulatedResourceManager` replaces `pyvisa.ResourceManager` and opens `SimulatedScope` resources which understand
+the SCPI subset used by `keysight_DSOX2000A_3000A` (settings of channels, timebase, trigger, measurements, :TER?,
+*OPC?, :SYSTem:ERRor?, :DISPlay:DATA?, :WAVeform:DATA?, segmented memory) and synthesize the signals of a chosen
+model:
+
+* `I2C` - CH1 = SCL, CH2 = SDA, 100 kbit/s transactions with START, repeated START and STOP
+* `CAN` - CH1 = CAN_H, CH2 = CAN_L, 500 kbit/s frames
+* `CAN_LOOP` - CH1 = TxD, CH2 = RxD of a CAN transceiver (RxD delayed)
+* `DC` - DC voltages with ripple on all channels
+
+`keysight_DSOX2000A_3000A.Oscilloscope` uses the simulator for addresses starting with `SIM_PREFIX`. Options can be
+appended to the address as `::<name>=<value>`, for example:
+
+    my_scope = keysight_DSOX2000A_3000A.I2C('SIM::I2C::latency=0.002::points=1000000')
+
+Options (see `SimulatedScope`): `latency` [s] per I/O operation, `transfer_rate` [bytes/s] of binary blocks,
+`points` of the acquisition record, `trigger_delay` [s] from arming to trigger, `acquisition_rate` [1/s],
+`noise` [V] and `unsupported` command prefixes in short form separated with '|', e.g. ':MEAS:STAT|:ACQ:MODE SEGM'
+(the simulated oscilloscope reports `-113,"Undefined header"` for them to test fallbacks for models without
+measurement statistics or segmented memory).
+
+Module depends on NumPy only.
+"""
+import struct
+import zlib
+from time import sleep, time
+import numpy as np
+
+try:
+    from . import waveform_analysis
+except ImportError:     # module used as script from its own directory
+    import waveform_analysis
+
+SIM_PREFIX = 'SIM::'
+"""Resource address prefix of the simulated oscilloscope, e.g. 'SIM::I2C'."""
+
+MODELS = ('I2C', 'CAN', 'CAN_LOOP', 'DC')
+"""Signal models of the simulated oscilloscope."""
+
+IDN = 'KEYSIGHT TECHNOLOGIES,DSO-X 3024A,SIM{model},07.50.2021102830'
+
+INVALID = 9.9e37
+"""Measurement result reported when the measurement cannot be done."""
+
+SCREEN_SIZE = (800, 480)
+"""Width and height of :DISPlay:DATA? images in pixels."""
+
+DEFAULTS = {
+    ':TIM:SCAL': '1.0E-04',
+    ':TIM:POS': '0',
+    ':TIM:REF': 'CENT',
+    ':SAVE:IMAG:FORM': 'BMP24bit',
+    ':SAVE:IMAG:PAL': 'COL',
+    ':WAV:FORM': 'BYTE',
+    ':WAV:POIN': '1000',
+    ':WAV:SOUR': 'CHAN1',
+    ':ACQ:MODE': 'RTIM',
+    ':ACQ:SEGM:COUN': '2',
+    ':ACQ:SEGM:IND': '1',
+    ':MEAS:STAT': 'ON',
+    ':FUNC:OPER': 'ADD',
+    ':FUNC:SOUR1': 'CHAN1',
+    ':FUNC:SOUR2': 'CHAN2',
+    ':FUNC:SCAL': '1.0E+00',
+    ':CHAN1:SCAL': '1.0E+00',
+    ':CHAN2:SCAL': '1.0E+00',
+    ':CHAN3:SCAL': '1.0E+00',
+    ':CHAN4:SCAL': '1.0E+00',
+}
+"""Settings after *RST which are queried by the module (headers normalized by `short_form()`)."""
+
+REFERENCE_DIVISIONS = {'LEFT': 1, 'CENT': 5, 'RIGH': 9}
+"""Horizontal division of the time reference point counted from the left edge of the screen."""
+
+
+def short_form(header):
+    """
+    Normalizes command `header` to upper case short form of every node, so long and short forms of the same command
+    match, e.g. ':CHANnel1:OFFSet' and ':CHAN1:OFFS' give ':CHAN1:OFFS'.
+    """
+    header = header.upper()
+    if not header.startswith((':', '*')):
+        header = ':' + header
+    if header.startswith('*'):
+        return header
+    query = header.endswith('?')
+    nodes = []
+    for node in header.strip(':?').split(':'):
+        name = node.rstrip('0123456789')
+        suffix = node[len(name):]
+        if len(name) > 4:
+            name = name[:3] if name[3] in 'AEIOU' else name[:4]
+        nodes.append(name + suffix)
+
+    return ':' + ':'.join(nodes) + ('?' if query else '')
+
+
+SI_PREFIXES = {'P': 1e-12, 'N': 1e-9, 'U': 1e-6, 'M': 1e-3, 'K': 1e3}
+"""Multipliers of SCPI suffix prefixes (case insensitive, 'M' is milli), e.g. '20mV'."""
+
+
+def to_float(value, default=0.0):
+    """
+    Converts SCPI numeric argument to float, ignoring units like 'V' or 's' and applying prefixes of `SI_PREFIXES`.
+    Returns `default` if not a number.
+    """
+    value = str(value).strip().rstrip('VvSsHzZ')
+    multiplier = SI_PREFIXES.get(value[-1:].upper(), 1.0)
+    if multiplier != 1.0:
+        value = value[:-1]
+    try:
+        return float(value) * multiplier
+    except ValueError:
+        return default
+
+
+def to_source(source):
+    """Normalizes waveform source name: 'CHANnel1', 'CHAN1' or 1 give 'CHAN1', 'FUNCtion' or 'MATH' give 'MATH'."""
+    source = str(source).strip().upper()
+    if source.startswith('CHAN'):
+        return 'CHAN' + source[-1]
+    if source.startswith(('FUNC', 'MATH')):
+        return 'MATH'
+    if source.isdigit():
+        return 'CHAN' + source
+
+    return source
+
+
+def split_commands(cmd_str):
+    """Splits compound command `cmd_str` at ';' outside of quoted strings."""
+    commands = []
+    current = ''
+    quoted = False
+    for char in cmd_str:
+        if char == '"':
+            quoted = not quoted
+        if char == ';' and not quoted:
+            commands.append(current)
+            current = ''
+        else:
+            current += char
+    commands.append(current)
+
+    return [c.strip() for c in commands if c.strip()]
+
+
+def ieee_block(payload):
+    """Returns `payload` bytes as IEEE 488.2 definite length block terminated by new line."""
+    length = str(len(payload)).encode()
+    return b'#' + str(len(length)).encode() + length + payload + b'\n'
+
+
+def screen_image(img_format):
+    """Returns blank screen image in `img_format` (PNG or 24 bit BMP) of `SCREEN_SIZE`."""
+    width, height = SCREEN_SIZE
+    if img_format.upper().startswith('PNG'):
+        def chunk(kind, data):
+            return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+        rows = b''.join(b'\x00' + b'\x20' * width for _ in range(height))
+        return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+                + chunk(b'IDAT', zlib.compress(rows, 1)) + chunk(b'IEND', b''))
+
+    pixels = width * height * 3
+    return (b'BM' + struct.pack('<IHHI', 54 + pixels, 0, 0, 54)
+            + struct.pack('<IiiHHIIiiII', 40, width, height, 1, 24, 0, pixels, 2835, 2835, 0, 0) + bytes(pixels))
+
+
+def model_pattern(model):
+    """
+    Returns one period of the signals of `model` as (segments, trigger_time, rise, fall): `segments` is a list of
+    (duration [s], tuple of voltages of CH1..CH4), `trigger_time` the time within the period placed at the trigger
+    point and `rise`, `fall` the edge time constants [s].
+    """
+    segments = []
+    if model == 'I2C':
+        bit = 10e-6
+        high = 3.3
+
+        def add(duration, scl, sda):
+            segments.append((duration, (scl * high, sda * high, 0.0, 0.0)))
+
+        def byte(value):
+            for i in range(9):
+                b = (value >> (7 - i)) & 1 if i < 8 else 0     # 9th bit is ACK
+                add(bit / 4, 0, b)
+                add(bit / 2, 1, b)
+                add(bit / 4, 0, b)
+
+        add(20e-6, 1, 1)
+        add(bit / 4, 1, 1)
+        add(bit / 4, 1, 0)          # START
+        add(bit / 4, 0, 0)
+        byte(0xA4)
+        byte(0x5A)
+        add(bit / 4, 0, 1)
+        add(bit / 4, 1, 1)
+        add(bit / 4, 1, 0)          # repeated START
+        add(bit / 4, 0, 0)
+        byte(0xA5)
+        add(bit / 4, 0, 0)
+        add(bit / 4, 1, 0)
+        add(bit / 2, 1, 1)          # STOP
+        add(30e-6, 1, 1)
+
+        return segments, 20e-6 + bit / 4, 300e-9, 20e-9
+
+    if model in ('CAN', 'CAN_LOOP'):
+        bit = 2e-6
+        rng = np.random.default_rng(1)
+        # SOF, random identifier and data, recessive delimiters and idle:
+        bits = [0] + list(rng.integers(0, 2, 60)) + [1] * 20
+        for b in bits:
+            if model == 'CAN':
+                segments.append((bit, (2.5, 2.5, 0.0, 0.0) if b else (3.5, 1.5, 0.0, 0.0)))
+            else:
+                segments.append((bit, (3.3 * b, 3.3 * b, 0.0, 0.0)))
+
+        return segments, 0.0, 50e-9, 50e-9
+
+    segments.append((1e-3, (5.0, 3.3, 1.8, 0.0)))
+
+    return segments, 0.0, 1e-6, 1e-6
+
+
+class SimulatedScope:
+    """
+    Simulated DSOX2000A/3000A with the interface of `pyvisa` message based resource used by
+    `keysight_DSOX2000A_3000A`: `write()`, `read()`, `read_bytes()`, `read_raw()`, `query()`,
+    `query_binary_values()`, `read_stb()`, `clear()` and `close()`.
+
+    Replies of queries are buffered like in a real instrument until they are read. Every I/O operation waits
+    `latency` seconds and binary blocks additionally their size divided by `transfer_rate`. Counters of commands,
+    I/O operations and bytes are kept in `io_stats`.
+    """
+
+    def __init__(self, model='I2C', latency=0.0, transfer_rate=None, points=100000, trigger_delay=0.0,
+                 acquisition_rate=50.0, noise=0.005, unsupported=(), seed=0):
+        model = model.upper()
+        if model not in MODELS:
+            raise ValueError(f'Unknown simulated model "{model}". Valid models: {MODELS}.')
+        self.model = model
+        self.latency = latency
+        self.transfer_rate = transfer_rate
+        self.points = int(points)
+        self.trigger_delay = trigger_delay
+        self.acquisition_rate = acquisition_rate
+        self.noise = noise
+        self.unsupported = tuple(u.upper() for u in unsupported)
+        self.rng = np.random.default_rng(int(seed))
+        self.pattern = model_pattern(model)
+        self.timeout = 2000
+        self.chunk_size = 20 * 1024
+        self.io_stats = {'commands': 0, 'writes': 0, 'reads': 0, 'bytes_written': 0, 'bytes_read': 0}
+        self.output = bytearray()
+        self.errors = []
+        self.saved = {}
+        self.closed = False
+        self.reset()
+
+    def reset(self):
+        """Default settings as after *RST; the acquisition is running."""
+        self.settings = {}
+        self.thresholds = {}
+        self.measurements = []
+        self.running = True
+        self.single = False
+        self.armed_at = time()
+        self.ter = False
+        self.stat_reset = time()
+
+    # ---- pyvisa resource interface ----
+
+    def write(self, cmd_str):
+        """Processes (compound) command `cmd_str`. Replies of queries are buffered for `read()`."""
+        if self.closed:
+            raise ConnectionError('Simulated oscilloscope: session is closed.')
+        sleep(self.latency)
+        self.io_stats['writes'] += 1
+        self.io_stats['bytes_written'] += len(cmd_str) + 1
+        replies = []
+        for command in split_commands(cmd_str):
+            self.io_stats['commands'] += 1
+            reply = self.execute(command)
+            if reply is not None:
+                replies.append(reply)
+        if replies:
+            if any(isinstance(r, bytes) for r in replies):
+                self.output += b''.join(r if isinstance(r, bytes) else r.encode() for r in replies)
+            else:
+                self.output += (';'.join(replies) + '\n').encode()
+
+        return len(cmd_str) + 1
+
+    def read_bytes(self, count, chunk_size=None, break_on_termchar=False):
+        """Reads `count` bytes of the buffered reply."""
+        data = self.take(count)
+        self.account_read(data)
+
+        return data
+
+    def read_raw(self, size=None):
+        """Reads whole buffered reply as bytes."""
+        data = bytes(self.output)
+        self.output.clear()
+        self.account_read(data)
+
+        return data
+
+    def read(self):
+        """Reads one line of the buffered reply as string."""
+        end = self.output.find(b'\n')
+        if end < 0:
+            raise TimeoutError('Simulated oscilloscope: nothing to read (query not sent?).')
+        return self.read_bytes(end + 1).decode()
+
+    def query(self, cmd_str):
+        """Writes query `cmd_str` and reads the reply."""
+        self.write(cmd_str)
+        return self.read()
+
+    def query_binary_values(self, cmd_str, datatype='f', is_big_endian=False, container=list, header_fmt='ieee',
+                            expect_termination=True, data_points=None, chunk_size=None):
+        """Writes query `cmd_str` and reads IEEE block reply converted like `pyvisa` does."""
+        self.write(cmd_str)
+        header = self.take(2)
+        digits = int(header[1:2])
+        length = int(self.take(digits))
+        payload = self.take(length)
+        if expect_termination:
+            self.take(1)
+        self.account_read(payload)
+        if datatype == 's':
+            return container(payload)
+        values = np.frombuffer(payload, dtype=('>' if is_big_endian else '<') + datatype)
+
+        return container(values)
+
+    def read_stb(self):
+        """Returns status byte (service requests are not simulated)."""
+        return 0
+
+    def enable_event(self, event_type, mechanism, context=None):
+        """VISA events are not simulated; the module falls back to polling."""
+        raise NotImplementedError('Simulated oscilloscope does not generate VISA events.')
+
+    def clear(self):
+        """Device clear: drops buffered replies."""
+        self.output.clear()
+
+    def close(self):
+        self.closed = True
+
+    def take(self, count):
+        """Removes `count` bytes from the reply buffer and returns them."""
+        if self.closed:
+            raise ConnectionError('Simulated oscilloscope: session is closed.')
+        if len(self.output) < count:
+            raise TimeoutError('Simulated oscilloscope: not enough data to read (query not sent?).')
+        data = bytes(self.output[:count])
+        del self.output[:count]
+
+        return data
+
+    def account_read(self, data):
+        sleep(self.latency)
+        if self.transfer_rate:
+            sleep(len(data) / self.transfer_rate)
+        self.io_stats['reads'] += 1
+        self.io_stats['bytes_read'] += len(data)
+
+    # ---- SCPI ----
+
+    def execute(self, command):
+        """Executes single command. Returns reply (string or bytes with binary block) of queries, else *None*."""
+        header, _, args = command.partition(' ')
+        header = short_form(header)
+        args = ','.join(a.strip() for a in args.split(',')) if args else ''
+        if (header + ' ' + args.upper()).startswith(self.unsupported):
+            self.errors.append('-113,"Undefined header"')
+            return '+0' if header.endswith('?') else None
+
+        self.update_acquisition()
+        if header.endswith('?'):
+            return self.execute_query(header[:-1], args)
+
+        if header in ('*RST', ':SYST:PRES'):
+            self.reset()
+        elif header == '*CLS':
+            self.errors.clear()
+            self.ter = False
+        elif header == '*SAV':
+            self.saved[args] = (dict(self.settings), dict(self.thresholds))
+        elif header == '*RCL':
+            settings, thresholds = self.saved.get(args, ({}, {}))
+            self.settings, self.thresholds = dict(settings), dict(thresholds)
+        elif header == ':RUN':
+            self.running, self.single, self.armed_at = True, False, time()
+        elif header == ':SING':
+            self.running, self.single, self.armed_at = True, True, time()
+        elif header == ':STOP':
+            self.running = False
+        elif header.startswith(':MEAS'):
+            self.measure_command(header, args)
+        else:
+            self.settings[header] = args
+
+        return None
+
+    def execute_query(self, header, args):
+        """Returns reply to query `header` (without '?')."""
+        if header == '*IDN':
+            return IDN.format(model=self.model)
+        if header == '*OPC':
+            return '1'
+        if header in ('*ESR', '*STB'):
+            return '+0'
+        if header == ':SYST:ERR':
+            return self.errors.pop(0) if self.errors else '+0,"No error"'
+        if header == ':TER':
+            triggered, self.ter = self.ter, False
+            return '+1' if triggered else '+0'
+        if header == ':OPER:COND':
+            return '+8' if self.running else '+0'
+        if header == ':DISP:DATA':
+            return ieee_block(screen_image(args.split(',')[0]))
+        if header.startswith(':WAV'):
+            return self.waveform_query(header, args)
+        if header.startswith(':MEAS'):
+            return self.measure_query(header, args)
+        if header.endswith((':SCAL', ':OFFS')):     # numeric settings are reported in NR3 format
+            return f'{to_float(self.settings.get(header, DEFAULTS.get(header, "0"))):+E}'
+
+        return self.settings.get(header, DEFAULTS.get(header, '+0'))
+
+    def update_acquisition(self):
+        """Advances the simulated acquisition: sets the trigger event and completes :SINGle."""
+        if not self.running:
+            return
+        elapsed = time() - self.armed_at
+        segmented = self.settings.get(':ACQ:MODE', '').upper().startswith('SEGM')
+        if self.single:
+            needed = self.trigger_delay
+            if segmented:
+                needed += int(self.settings.get(':ACQ:SEGM:COUN', 2)) / self.acquisition_rate
+            if elapsed >= needed:
+                self.running = False
+                self.ter = True
+        elif elapsed >= self.trigger_delay:
+            self.ter = True
+            self.armed_at = time()
+
+    # ---- signals ----
+
+    def time_axis(self, points):
+        """Returns sample times [s] of the record of `points` samples relative to the trigger."""
+        scale = to_float(self.settings.get(':TIM:SCAL', DEFAULTS[':TIM:SCAL']))
+        position = to_float(self.settings.get(':TIM:POS', 0))
+        reference = self.settings.get(':TIM:REF', 'CENT').upper()[:4]
+        start = position - REFERENCE_DIVISIONS.get(reference, 5) * scale
+
+        return start + np.arange(points) * (10 * scale / points)
+
+    def signal(self, source, t):
+        """Synthesizes waveform of `source` ('CHAN1'..'CHAN4', 'MATH') at times `t` with noise."""
+        if source == 'MATH':
+            a = self.signal(to_source(self.settings.get(':FUNC:SOUR1', 'CHAN1')), t)
+            b = self.signal(to_source(self.settings.get(':FUNC:SOUR2', 'CHAN2')), t)
+            operation = self.settings.get(':FUNC:OPER', 'ADD').upper()
+            if operation.startswith('SUBT'):
+                return a - b
+            if operation.startswith('MULT'):
+                return a * b
+            return a + b
+
+        channel = int(source[-1]) - 1
+        segments, trigger_time, rise, fall = self.pattern
+        durations = np.array([d for d, _ in segments])
+        levels = np.array([v[channel] for _, v in segments])
+        starts = np.concatenate(([0.0], np.cumsum(durations)[:-1]))
+        period = durations.sum()
+        delay = 140e-9 if self.model == 'CAN_LOOP' and channel == 1 else 0.0     # RxD after TxD
+
+        phase = np.mod(t - delay + trigger_time, period)
+        i = np.searchsorted(starts, phase, side='right') - 1
+        since = phase - starts[i]
+        previous = levels[i - 1]    # index -1 wraps to the last segment of the previous period
+        tau = np.where(levels[i] > previous, rise, fall) / 2.2
+        x = levels[i] + (previous - levels[i]) * np.exp(-since / tau)
+        if self.model == 'DC':
+            x = x + 0.01 * np.sin(2 * np.pi * 100e3 * t)     # switching ripple
+
+        return x + self.rng.normal(0, self.noise, len(t))
+
+    def waveform_query(self, header, args):
+        """Replies :WAVeform queries: PREamble, DATA, SEGMented:COUNt, SEGMented:TTAG and settings."""
+        word = self.settings.get(':WAV:FORM', 'BYTE').upper().startswith('WORD')
+        requested = self.settings.get(':WAV:POIN', DEFAULTS[':WAV:POIN']).upper()
+        points = self.points if requested.startswith('MAX') else min(int(to_float(requested, 1000)), self.points)
+        source = to_source(self.settings.get(':WAV:SOUR', 'CHAN1'))
+        node = self.source_node(source)
+        scale = to_float(self.settings.get(node + ':SCAL', 1.0), 1.0)
+        offset = to_float(self.settings.get(node + ':OFFS', 0.0))
+        codes = 65536 if word else 256
+        y_increment = 10 * scale / codes
+        t = self.time_axis(points)
+        segments = int(self.settings.get(':ACQ:SEGM:COUN', 2)) \
+            if self.settings.get(':ACQ:MODE', '').upper().startswith('SEGM') else 1
+
+        if header == ':WAV:PRE':
+            return f'{1 if word else 0},0,{points},1,{t[1] - t[0]:E},{t[0]:E},0,{y_increment:E},{offset:E},' \
+                   f'{codes // 2}'
+        if header == ':WAV:DATA':
+            all_segments = self.settings.get(':WAV:SEGM:ALL', 'OFF').upper() in ('ON', '1')
+            x = np.concatenate([self.signal(source, t) for _ in range(segments if all_segments else 1)])
+            data = np.clip(np.round((x - offset) / y_increment + codes // 2), 0, codes - 1)
+            return ieee_block(data.astype('>u2' if word else 'u1').tobytes())
+        if header == ':WAV:SEGM:COUN':
+            return f'+{segments}'
+        if header == ':WAV:SEGM:TTAG':
+            index = int(self.settings.get(':ACQ:SEGM:IND', 1))
+            return f'{(index - 1) / self.acquisition_rate:+E}'
+
+        return self.settings.get(header, DEFAULTS.get(header, '+0'))
+
+    @staticmethod
+    def source_node(source):
+        """Returns header node of `source` ('CHAN1'..'CHAN4', 'MATH') holding its vertical settings."""
+        return ':FUNC' if source == 'MATH' else f':CHAN{source[-1]}'
+
+    def min_amplitude(self, source):
+        """Returns minimal amplitude [V] of `source` signal with levels and edges, as the oscilloscope object uses."""
+        scale = to_float(self.settings.get(self.source_node(source) + ':SCAL', 1.0), 1.0)
+
+        return scale * waveform_analysis.MIN_AMPLITUDE_DIVISIONS
+
+    # ---- measurements ----
+
+    def measure_sources(self, args=''):
+        """Returns measurement sources given in `args` (e.g. 'DISPlay,DC,CHANnel1') or the :MEASure:SOURce ones."""
+        sources = [to_source(a) for a in args.split(',') if a.upper().startswith(('CHAN', 'FUNC', 'MATH'))]
+        if sources:
+            return sources
+        current = self.settings.get(':MEAS:SOUR', 'CHAN1')
+
+        return [to_source(s) for s in current.split(',') if s.upper() != 'NONE']
+
+    def select_sources(self, args):
+        """Like `measure_sources()`, sources given in `args` become the current measurement sources."""
+        sources = self.measure_sources(args)
+        self.settings[':MEAS:SOUR'] = ','.join(sources)
+
+        return sources
+
+    def measure_command(self, header, args):
+        """Handles :MEASure commands: sources, thresholds, statistics and installing measurements."""
+        name = header.split(':')[-1]
+        if name == 'SOUR':
+            self.settings[':MEAS:SOUR'] = args
+        elif name == 'DEF':
+            kind, _, values = args.partition(',')
+            if kind.upper().startswith('THR'):
+                self.thresholds[self.measure_sources()[0]] = values
+            else:
+                self.settings[':MEAS:DEF ' + kind.upper()[:3]] = values
+        elif header == ':MEAS:STAT:RES':
+            self.stat_reset = time()
+        elif name == 'STAT':
+            self.settings[':MEAS:STAT'] = args
+        elif name == 'CLE':
+            self.measurements = []
+        else:
+            self.measurements.append((name, self.select_sources(args)))
+            self.measurements = self.measurements[-4:]   # oscilloscope shows up to 4 measurements
+
+    def measure_query(self, header, args):
+        """Replies :MEASure queries: single measurements, RESults, SOURce and DEFine settings."""
+        name = header.split(':')[-1]
+        if name == 'SOUR':
+            return ','.join((self.measure_sources() + ['NONE'])[:2])
+        if name == 'DEF':
+            if args.upper().startswith('THR'):
+                values = self.thresholds.get(self.measure_sources()[0], 'PERCent,90,50,10').split(',', 1)
+                return f'{values[0].upper()[:4]},{values[1]}'
+            return self.settings.get(':MEAS:DEF ' + args.upper()[:3], '+1,+1')
+        if name == 'STAT':
+            return self.settings.get(':MEAS:STAT', 'ON')
+        if name == 'RES':
+            return self.results()
+
+        values = self.measure(name, self.select_sources(args), args)
+        return f'{values[0] if len(values) else INVALID:+E}'
+
+    def results(self):
+        """Reply of :MEASure:RESults? (label, current, min, max, mean, std dev, count with statistics ON)."""
+        statistics = self.settings.get(':MEAS:STAT', 'ON').upper() != 'OFF'
+        end = time() if self.running else self.armed_at
+        count = int(max(0.0, end - self.stat_reset) * self.acquisition_rate) + 1
+        fields = []
+        for name, sources in self.measurements:
+            values = self.measure(name, sources)
+            if not len(values):
+                values = np.array([INVALID])
+            if statistics:
+                label = f'{name}({"-".join(s[-1] if s.startswith("CHAN") else "M" for s in sources)})'
+                fields += [label, f'{values[0]:+E}', f'{np.min(values):+E}',
+                           f'{np.max(values):+E}', f'{np.mean(values):+E}', f'{np.std(values):+E}', f'+{count}']
+            else:
+                fields.append(f'{values[0]:+E}')
+
+        return ','.join(fields)
+
+    def source_thresholds(self, source, x):
+        """Returns (upper, middle, lower) threshold voltages of `source` for signal `x`."""
+        mode, *values = self.thresholds.get(source, 'PERCent,90,50,10').split(',')
+        values = [to_float(v) for v in values]
+        if mode.upper().startswith('ABS'):
+            return tuple(values)
+
+        return tuple(waveform_analysis.percent_level(x, p, self.min_amplitude(source)) for p in values)
+
+    def measure(self, name, sources, args=''):
+        """Computes measurement `name` (upper case header) of `sources` on the screen record. Returns all values."""
+        t = self.time_axis(10000)
+        a = self.signal(sources[0], t)
+        upper, middle, lower = self.source_thresholds(sources[0], a)
+        hysteresis = upper - lower
+        top, base = waveform_analysis.signal_levels(a, min_amplitude=self.min_amplitude(sources[0]))
+        measurements = {
+            'VPP': lambda: [np.ptp(a)],
+            'VMAX': lambda: [np.max(a)],
+            'VMIN': lambda: [np.min(a)],
+            'VTOP': lambda: [top],
+            'VBAS': lambda: [base],
+            'VAMP': lambda: [top - base],
+            'VAV': lambda: [np.mean(a)],
+            'VRMS': lambda: [np.std(a) if ',AC' in args.upper() else np.sqrt(np.mean(a ** 2))],
+            'FREQ': lambda: 1 / waveform_analysis.periods(t, a, middle, hysteresis),
+            'PER': lambda: waveform_analysis.periods(t, a, middle, hysteresis),
+            'PWID': lambda: waveform_analysis.pulse_widths(t, a, middle, hysteresis, True),
+            'NWID': lambda: waveform_analysis.pulse_widths(t, a, middle, hysteresis, False),
+            'RIS': lambda: waveform_analysis.rise_times(waveform_analysis.find_edges(t, a, lower, upper)),
+            'FALL': lambda: waveform_analysis.fall_times(waveform_analysis.find_edges(t, a, lower, upper)),
+            'DEL': lambda: self.delays(t, a, sources, middle, hysteresis),
+        }
+        for short, compute in measurements.items():
+            if name.startswith(short):
+                values = np.asarray(compute(), dtype=float)
+                return values[~np.isnan(values)]     # levels of signal without edges cannot be measured
+
+        return np.array([])
+
+    def delays(self, t, a, sources, middle, hysteresis):
+        """Delays between edges of the two `sources` as defined by :MEASure:DEFine DELay."""
+        b = self.signal(sources[-1], t)
+        middle_b = self.source_thresholds(sources[-1], b)[1]
+        edges = self.settings.get(':MEAS:DEF DEL', '+1,+1').split(',')
+
+        return waveform_analysis.edge_delays(t, a, b, middle, middle_b, int(edges[0]) > 0, int(edges[-1]) > 0,
+                                             hysteresis)
+
+
+class SimulatedResourceManager:
+    """
+    Replacement of `pyvisa.ResourceManager` opening `SimulatedScope` resources for addresses like
+    'SIM::I2C::latency=0.001'. Keyword arguments are default options of all opened resources; options in the
+    address take precedence.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+        self.resources = {}
+
+    def open_resource(self, address, **kwargs):
+        """
+        Opens simulated oscilloscope described by `address` (see module description). Opening the same address again
+        reconnects to the same simulated instrument, its settings are kept.
+        """
+        if not address.upper().startswith(SIM_PREFIX):
+            raise ValueError(f'Simulated resource address must start with "{SIM_PREFIX}", got "{address}".')
+        if address in self.resources:
+            resource = self.resources[address]
+            resource.closed = False
+            resource.clear()
+            return resource
+        parts = address[len(SIM_PREFIX):].split('::')
+        options = dict(self.options)
+        for part in parts[1:]:
+            name, _, value = part.partition('=')
+            if name == 'unsupported':
+                options[name] = tuple(value.split('|'))
+            else:
+                options[name] = float(value)
+        resource = SimulatedScope(parts[0] or 'I2C', **options)
+        self.resources[address] = resource
+
+        return resource
+
+    def list_resources(self, query='?*::INSTR'):
+        return tuple(SIM_PREFIX + model for model in MODELS)
+
+    def close(self):
+        for resource in self.resources.values():
+            resource.close()
@@ -0,0 +1,198 @@
+"""
+This module runs supply voltage sweeps with a remote controlled power supply and oscilloscope objects of
+`keysight_DSOX2000A_3000A`.
+
+`VoltageSweep` sets the PSU (any object with methods `set_voltage(volts)` and `get_voltage()`, e.g.
+`ea_psu_controller.PsuEA`) to every voltage of the sweep and measures with the oscilloscope at each of them. Instead of
+fixed sleeps the output is considered settled when the voltage measured by the PSU is stable and close to the set
+voltage (see `wait_settled()`). The PSU is driven by its own thread, so the oscilloscope works at the same time:
+
+* the PSU ramps to the next voltage as soon as the last acquisition of the previous voltage is captured (triggered
+  and its screenshot taken), while its results are logged and analysed and the screenshots are written by the
+  background worker of the oscilloscope (see `Oscilloscope.get_screen()`)
+* `prepare` function sets up the oscilloscope for the next voltage while the PSU ramps
+* the oscilloscope waits for the settled PSU output before the next trigger
+
+PSU with true attribute `interactive` (e.g. `ManualPsu` asking the operator) is set by the calling thread after the
+measurement of the previous voltage is finished, without overlap, so its prompts are not mixed with the output of the
+measurement.
+
+Measurement at each voltage is a function `measure(scope, voltage, path)` or list of test plan steps run by
+`scope_testplan.TestPlanRunner`. The next ramp starts after the trigger and screenshot of the last step of the plan
+when the step waits for a trigger (`trigger` or `wait` key), so the oscilloscope is stopped and the logged results
+still belong to the measured voltage; otherwise, and for measurement function, it starts after the measurement.
+
+Results path and the `screen` and `log` file names of the steps may contain `{voltage}` replaced by the voltage of the
+point, e.g. `VAC_{voltage}V.png`, or results path `os.path.join(results_path, '{voltage}V', '')` writing each voltage
+to its own directory. Example:
+
+    steps = [{'name': 'V_AC', 'setup': 'set_unit_v_meas', 'measure': 'set_meas_ac', 'wait': True,
+              'screen': 'VAC_{voltage}V.png', 'log': 'SMPS_Measurements.txt'}]
+    sweep = VoltageSweep(psu, measure_ps, [10, 28, 32], steps, results_path)
+    sweep.run()
+
+For multi-temperature tests run the sweep for every temperature with its own results path.
+
+**Note:** the PSU output must be on, otherwise the measured voltage never reaches the set one and `TimeoutError` is
+raised.
+"""
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+try:
+    from . import scope_testplan
+except ImportError:     # module used as script from its own directory
+    import scope_testplan
+
+SWEEP_PHASES = ('prepare', 'ramp', 'wait', 'measure')
+"""Phases of a sweep point in the report: `ramp` is run by the PSU thread (started after the last capture of the
+previous point), `wait` is the time the oscilloscope waited for the settled PSU output before measuring (ramp not
+overlapped by logging, analysis and screenshot writing of the previous point or by `prepare`)."""
+
+SweepPoint = namedtuple('SweepPoint', ['voltage', 'measured', 'path', 'values', 'timings'])
+"""Result of one sweep point: set voltage, settled voltage measured by the PSU, results path, values returned by the
+measurement (dictionary of step name to logged values for test plan steps) and dictionary of phase to duration [s]."""
+
+
+def wait_settled(read, target=None, tolerance=0.05, samples=3, timeout=10.0, poll_min=0.02, poll_max=0.1):
+    """
+    Polls function `read()` (e.g. `psu.get_voltage`) until `samples` consecutive readings differ by no more than
+    `tolerance` and, if `target` is given, the last one is within `tolerance` from `target`. Returns the last reading.
+    `TimeoutError` is raised after `timeout` seconds (see `scope_testplan.wait_until()`).
+    """
+    readings = []
+
+    def settled():
+        readings.append(float(read()))
+        last = readings[-samples:]
+        if len(last) < samples or max(last) - min(last) > tolerance:
+            return False
+        return target is None or abs(last[-1] - target) <= tolerance
+
+    scope_testplan.wait_until(settled, timeout, poll_min, poll_max)
+
+    return readings[-1]
+
+
+class ManualPsu:
+    """
+    Power supply without remote control: asks the operator to set the voltage and reports the set voltage as
+    measured.
+    """
+    interactive = True
+    """`interactive` PSU is not set while the oscilloscope measures (see module description)."""
+
+    def __init__(self):
+        self.voltage = 0.0
+
+    def set_voltage(self, voltage):
+        input(f'Set PSU to {voltage} V and press Enter.')
+        self.voltage = voltage
+
+    def get_voltage(self):
+        return self.voltage
+
+
+class VoltageSweep:
+    """
+    Sweep of `psu` through `voltages` measuring with oscilloscope object `scope` at each of them, see module
+    description. `measure` is function `measure(scope, voltage, path)` or list of test plan steps, `path` is the
+    results path (may contain `{voltage}`). `prepare(scope, voltage)` is optional function setting up the oscilloscope
+    while the PSU ramps. `tolerance` [V], `samples` and `settle_timeout` [s] tune the settling detection (see
+    `wait_settled()`).
+    """
+
+    def __init__(self, psu, scope, voltages, measure, path, prepare=None, tolerance=0.05, samples=3,
+                 settle_timeout=10.0):
+        self.psu = psu
+        self.scope = scope
+        self.voltages = list(voltages)
+        self.measure = measure
+        self.path = path
+        self.prepare = prepare
+        self.tolerance = tolerance
+        self.samples = samples
+        self.settle_timeout = settle_timeout
+        self.points = []
+        """`points` is list of `SweepPoint` of the voltages measured."""
+        self.duration = 0.0
+        """`duration` is duration of the last sweep [s]."""
+
+    def run(self):
+        """Runs the sweep and returns list of `SweepPoint`."""
+        self.points = []
+        start = perf_counter()
+        interactive = getattr(self.psu, 'interactive', False)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='psu') as executor:
+            ramp = None if interactive else executor.submit(self.set_point, self.voltages[0])
+            for i, voltage in enumerate(self.voltages):
+                timings = {}
+                lap = perf_counter()
+                if self.prepare is not None:
+                    self.prepare(self.scope, voltage)
+                    self.scope.flush()
+                lap = scope_testplan.TestPlanRunner.lap(timings, 'prepare', lap)
+                measured, timings['ramp'] = self.set_point(voltage) if ramp is None else ramp.result()
+                lap = scope_testplan.TestPlanRunner.lap(timings, 'wait', lap)
+                print(f'PSU: {voltage} V set, {measured:.3f} V measured.')
+
+                path = self.path.format(voltage=voltage)
+                os.makedirs(path, exist_ok=True)
+                next_ramp = []
+
+                def ramp_next():
+                    if not interactive and not next_ramp and i + 1 < len(self.voltages):
+                        next_ramp.append(executor.submit(self.set_point, self.voltages[i + 1]))
+
+                values = self.measure_point(voltage, path, ramp_next)
+                ramp_next()
+                ramp = next_ramp[0] if next_ramp else None
+                scope_testplan.TestPlanRunner.lap(timings, 'measure', lap)
+                self.points.append(SweepPoint(voltage, measured, path, values, timings))
+        if getattr(self.scope, 'pending_images', None):
+            self.scope.wait_images()
+        self.duration = perf_counter() - start
+        self.report()
+
+        return self.points
+
+    def set_point(self, voltage):
+        """Sets the PSU to `voltage` and waits until settled. Returns measured voltage and duration [s]."""
+        start = perf_counter()
+        self.psu.set_voltage(voltage)
+        measured = wait_settled(self.psu.get_voltage, voltage, self.tolerance, self.samples, self.settle_timeout)
+
+        return measured, perf_counter() - start
+
+    def measure_point(self, voltage, path, ramp_next):
+        """
+        Runs the measurement at `voltage` writing results to `path`. Function `ramp_next()` starting the ramp to the
+        next voltage is called after the last capture of the test plan (see module description). Returns the measured
+        values.
+        """
+        if callable(self.measure):
+            return self.measure(self.scope, voltage, path)
+        steps = [dict(step, **{key: step[key].format(voltage=voltage) for key in ('screen', 'log')
+                               if isinstance(step.get(key), str)}) for step in self.measure]
+
+        def captured(step):
+            if step is last and (scope_testplan.as_list(step.get('trigger')) or step.get('wait')):
+                ramp_next()
+
+        runner = scope_testplan.TestPlanRunner(self.scope, path, background=True, captured=captured)
+        last = runner.schedule(steps)[-1]
+        runner.run(steps)
+
+        return {result.name: result.values for result in runner.results}
+
+    def report(self):
+        """Prints table of durations of the sweep points in milliseconds."""
+        print(f'{"voltage":>8}{"measured":>10}' + ''.join(f'{phase:>10}' for phase in SWEEP_PHASES))
+        for point in self.points:
+            print(f'{point.voltage:>8}{point.measured:>10.3f}'
+                  + ''.join(f'{point.timings.get(phase, 0.0) * 1000:>10.1f}' for phase in SWEEP_PHASES))
+        overlap = sum(point.timings['ramp'] - point.timings['wait'] for point in self.points)
+        print(f'Sweep of {len(self.points)} points: {self.duration:.2f} s, PSU ramps overlapped with the oscilloscope '
+              f'for {max(overlap, 0.0):.2f} s.')
@@ -0,0 +1,321 @@
+"""
+This module runs declarative test plans on oscilloscope objects of `keysight_DSOX2000A_3000A`.
+
+Test plan is a list of steps, every step is a dictionary with the keys (all optional except `name`):
+
+* `name` - test name used in the report
+* `setup` - action(s) preparing the oscilloscope, e.g. 'set_unit_for_i2c'
+* `profile` - profile applied after `setup` (see `scope_profiles`), e.g. {'timebase': {'SCALe': 0.0001}}
+* `measure` - action(s) adding the measurements, e.g. ('set_meas_signal_levels', 'master')
+* `trigger` - action(s) setting the trigger, e.g. 'set_trig_i2c_start'; the step waits for the trigger
+* `wait` - *True* waits for the trigger set by other actions (e.g. `measure`) in a step without `trigger`
+* `before` - action(s) after the settings are applied and before the trigger, e.g. turning on the DUT
+* `wait_for` - condition waited for before the trigger, replacing fixed sleeps (see `wait_until()`)
+* `timeout` - maximal wait for the trigger in seconds (default *None* waits forever), `single` arms single capture
+* `screen` - image file name of the screenshot (see `Oscilloscope.get_screen()`)
+* `log` - log file name of the measurement results (see `Oscilloscope.log_measures()`)
+* `analysis` - action(s) processing the capture, e.g. computing and logging waveform analysis
+* `after` - action(s) at the end of the step, e.g. turning off the DUT
+* `wait_after` - condition waited for at the end of the step
+
+Action is a method name of the oscilloscope object, tuple of method name and its arguments or function called with
+the oscilloscope object (and the `TestPlanRunner` for conditions). Example:
+
+    steps = [
+        {'name': 'SCL frequency', 'setup': 'set_unit_for_i2c', 'measure': 'set_meas_scl_freq_duty',
+         'trigger': 'set_trig_i2c_sda_bit', 'screen': 'I2C_SCL_Frequency.png', 'log': 'I2C_Measurements.txt'},
+        ...
+    ]
+    runner = TestPlanRunner(measure_i2c, results_path)
+    runner.run(steps)
+
+`TestPlanRunner.schedule()` reorders the steps so that steps sharing trigger and timebase settings run one after
+another and the oscilloscope is reconfigured less (with the deferred reset of `Oscilloscope.init()` only the changed
+settings are written). Duration of every phase of every step is reported by `TestPlanRunner.report()`.
+
+**Checkpoints:** with `checkpoint` file given, the runner writes the file after every completed step (its results are
+logged and the screenshot is written by then) with the step hash, logged values, screenshot path and hash of the
+oscilloscope setup. Rerun of the plan skips the completed steps whose definition did not change and resumes at the
+first incomplete one; as every step applies its own setup, only the setups of the remaining steps are applied. With
+`recall_setups` the setups are cached in the oscilloscope registers (see `Oscilloscope.use_setup()`), so a resumed
+step recalls its setup with single *RCL. Delete the checkpoint file to run the whole plan again. Results sink of the
+oscilloscope (see `scope_results.ResultsSink`) is flushed before every checkpoint, so the records of the completed
+steps are on the disk, and a sink reopened on the same file by the resumed run appends to it.
+
+**Note:** a step interrupted after its log was written but before the checkpoint is run again on resume, so its
+results appear twice in the text log and the results sink.
+"""
+import hashlib
+import json
+import os
+from collections import namedtuple
+from time import perf_counter, sleep, time
+
+STEP_KEYS = ('name', 'setup', 'profile', 'measure', 'trigger', 'wait', 'before', 'wait_for', 'timeout', 'single',
+             'screen', 'log', 'analysis', 'after', 'wait_after')
+"""Keys allowed in test plan steps."""
+
+STEP_PHASES = ('setup', 'before', 'wait', 'trigger', 'screen', 'log', 'analysis', 'after')
+"""Timed phases of a step in the order they run."""
+
+StepResult = namedtuple('StepResult', ['name', 'status', 'timings', 'values', 'screen', 'setup_hash', 'error'])
+"""Result of one step: `status` ('done', 'failed' or 'skipped' when completed by earlier run), dictionary of phase to
+duration [s], logged measurement values, path of the screenshot, hash of the oscilloscope setup and the exception of
+a failed step (*None* otherwise)."""
+
+
+def wait_until(condition, timeout=30.0, poll_min=0.01, poll_max=0.5):
+    """
+    Polls function `condition()` until it returns true value and returns the value. Polling interval starts at
+    `poll_min` seconds and doubles up to `poll_max`. `TimeoutError` is raised after `timeout` seconds.
+    """
+    start = perf_counter()
+    interval = poll_min
+    while True:
+        value = condition()
+        if value:
+            return value
+        if perf_counter() - start > timeout:
+            raise TimeoutError(f'Condition not met within {timeout} s.')
+        sleep(interval)
+        interval = min(2 * interval, poll_max)
+
+
+def as_list(actions):
+    """Returns step entry `actions` as list of actions (single action may be given without list)."""
+    if actions is None:
+        return []
+    if isinstance(actions, list):
+        return actions
+
+    return [actions]
+
+
+def step_hash(step):
+    """Returns hash of `step` definition; functions are represented by their names."""
+    text = json.dumps(step, sort_keys=True, default=lambda o: getattr(o, '__qualname__', repr(o)))
+
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def validate_step(step):
+    """Checks keys of test plan `step`. Raises `ValueError` if the step is not valid."""
+    if 'name' not in step:
+        raise ValueError(f'Test plan step without name: {step}')
+    unknown = [key for key in step if key not in STEP_KEYS]
+    if unknown:
+        raise ValueError(f'Step "{step["name"]}": unknown keys {unknown}. Valid keys: {STEP_KEYS}.')
+    if not isinstance(step.get('wait', False), bool):
+        raise ValueError(f'Step "{step["name"]}": wait must be True or False, got {step["wait"]!r}.')
+
+
+class TestPlanRunner:
+    """
+    Runs test plan steps on oscilloscope object `scope`, writing screenshots and logs to directory `path`. With
+    `reorder` the steps are scheduled to minimize reconfiguration (see `schedule()`), `stop_on_error` stops the plan
+    at the first failed step instead of continuing with the next one. `checkpoint` is path of the checkpoint file
+    and `recall_setups` caches the setups in the oscilloscope (see module description). With `background` the
+    screenshots are written by the background worker of the oscilloscope (see `Oscilloscope.get_screen()`).
+    `captured(step)` is optional function called after the trigger and screenshot phases of every step, before its
+    results are logged (e.g. `scope_sweep.VoltageSweep` starts the next PSU ramp there).
+    """
+
+    def __init__(self, scope, path, reorder=True, stop_on_error=False, checkpoint=None, recall_setups=False,
+                 background=False, captured=None):
+        self.scope = scope
+        self.path = path
+        self.reorder = reorder
+        self.stop_on_error = stop_on_error
+        self.background = background
+        self.captured = captured
+        self.checkpoint = checkpoint
+        self.recall_setups = recall_setups
+        self.completed = {}
+        """`completed` is dictionary of step name to checkpoint record of the steps completed."""
+        self.results = []
+        """`results` is list of `StepResult` of the steps run."""
+
+    def call(self, action, *args):
+        """Calls one action of a step (see module description) and returns its result."""
+        if callable(action):
+            return action(self.scope, *args)
+        if isinstance(action, str):
+            return getattr(self.scope, action)()
+        name, *arguments = action
+
+        return getattr(self.scope, name)(*arguments)
+
+    @staticmethod
+    def group_key(step):
+        """Returns key of settings shared by steps run together: trigger action(s) and timebase of the profile."""
+        trigger = repr(as_list(step.get('trigger')))
+        timebase = json.dumps((step.get('profile') or {}).get('timebase', {}), sort_keys=True, default=str)
+
+        return trigger, timebase
+
+    def schedule(self, steps):
+        """
+        Returns `steps` in the order they are run: steps with the same `group_key()` are moved after the first step
+        of their group, otherwise the plan order is kept. Without `reorder` the plan order is returned.
+        """
+        if not self.reorder:
+            return list(steps)
+        groups = {}
+        for step in steps:
+            groups.setdefault(self.group_key(step), []).append(step)
+
+        return [step for group in groups.values() for step in group]
+
+    def run(self, steps):
+        """
+        Validates and runs `steps` in the scheduled order, skipping the steps completed according to the checkpoint.
+        Returns list of `StepResult`.
+        """
+        for step in steps:
+            validate_step(step)
+        names = [step['name'] for step in steps]
+        if self.checkpoint is not None and len(set(names)) != len(names):
+            raise ValueError(f'Step names must be unique to use checkpoints, got {names}.')
+        self.load_checkpoint()
+        for step in self.schedule(steps):
+            record = self.completed.get(step['name'])
+            if record is not None and record['hash'] == step_hash(step):
+                print(f'Step: {step["name"]} completed by earlier run, skipped.')
+                self.results.append(StepResult(step['name'], 'skipped', {}, record['values'], record['screen'],
+                                               record['setup_hash'], None))
+                continue
+            result = self.run_step(step)
+            self.results.append(result)
+            if result.error is not None:
+                if self.stop_on_error:
+                    break
+            else:
+                self.save_checkpoint(step, result)
+        self.report()
+
+        return self.results
+
+    def load_checkpoint(self):
+        """Reads the completed steps from the checkpoint file if it exists and belongs to the same oscilloscope."""
+        self.completed = {}
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return
+        with open(self.checkpoint, 'r') as f:
+            saved = json.load(f)
+        if saved.get('instrument') != getattr(self.scope, 'idn', None):
+            print(f'Checkpoint {self.checkpoint} was written for other oscilloscope ({saved.get("instrument")}), '
+                  f'running all steps.')
+            return
+        self.completed = saved['steps']
+        print(f'Resuming from checkpoint {self.checkpoint}: {len(self.completed)} steps completed.')
+
+    def save_checkpoint(self, step, result):
+        """Records completed `step` with its `result` in the checkpoint file (written atomically)."""
+        if self.checkpoint is None:
+            return
+        # results and images must be on the disk before the step counts as completed (flush completes Parquet part):
+        if getattr(self.scope, 'results_sink', None) is not None:
+            self.scope.results_sink.flush()
+        if getattr(self.scope, 'pending_images', None):
+            self.scope.wait_images()
+        screen = result.screen.result() if hasattr(result.screen, 'result') else result.screen   # background write
+        self.completed[step['name']] = {'hash': step_hash(step), 'values': result.values, 'screen': screen,
+                                        'setup_hash': result.setup_hash, 'time': time()}
+        temp_path = self.checkpoint + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'instrument': getattr(self.scope, 'idn', None), 'steps': self.completed}, f, indent=4)
+        os.replace(temp_path, self.checkpoint)
+
+    def apply_setup(self, step):
+        """Applies setup, profile, measurements and trigger of `step`. Returns hash of the setup."""
+        def build():
+            for action in as_list(step.get('setup')):
+                self.call(action)
+            if step.get('profile'):
+                self.scope.apply_profile(step['profile'])
+            for action in as_list(step.get('measure')) + as_list(step.get('trigger')):
+                self.call(action)
+
+        if self.recall_setups:
+            return self.scope.use_setup(step['name'], build)
+        build()
+        self.scope.flush()
+        settings = json.dumps(sorted(self.scope.state.items()))
+
+        return hashlib.sha1(settings.encode()).hexdigest()
+
+    def run_step(self, step):
+        """Runs one step and returns its `StepResult`. Errors are printed and returned in the result."""
+        timings = {}
+        values = None
+        screen = None
+        setup_hash = None
+        phase = 'setup'
+        print(f'Step: {step["name"]}')
+        start = perf_counter()
+        try:
+            setup_hash = self.apply_setup(step)
+            start = self.lap(timings, phase, start)
+
+            phase = 'before'
+            for action in as_list(step.get('before')):
+                self.call(action)
+            start = self.lap(timings, phase, start)
+
+            phase = 'wait'
+            if step.get('wait_for') is not None:
+                wait_until(lambda: self.call(step['wait_for'], self))
+            start = self.lap(timings, phase, start)
+
+            phase = 'trigger'
+            if as_list(step.get('trigger')) or step.get('wait'):
+                self.scope.get_trigger(timeout=step.get('timeout'), single=step.get('single', False))
+            start = self.lap(timings, phase, start)
+
+            phase = 'screen'
+            if step.get('screen'):
+                screen = self.scope.get_screen(step['screen'], self.path, background=self.background)
+            if self.captured is not None:
+                self.captured(step)
+            start = self.lap(timings, phase, start)
+
+            phase = 'log'
+            if step.get('log') and getattr(self.scope, 'results', None):
+                values = self.scope.log_measures(step['log'], self.path, self.scope.results)
+            start = self.lap(timings, phase, start)
+
+            phase = 'analysis'
+            for action in as_list(step.get('analysis')):
+                self.call(action)
+            start = self.lap(timings, phase, start)
+
+            phase = 'after'
+            for action in as_list(step.get('after')):
+                self.call(action)
+            if step.get('wait_after') is not None:
+                wait_until(lambda: self.call(step['wait_after'], self))
+            self.lap(timings, phase, start)
+        except Exception as e:
+            self.lap(timings, phase, start)
+            print(f'Step "{step["name"]}" failed in phase {phase}: {type(e).__name__}: {e}')
+            if getattr(self.scope, 'results', None):
+                self.scope.results.clear()  # do not log queries of the failed step with the next one
+            return StepResult(step['name'], 'failed', timings, values, screen, setup_hash, e)
+
+        return StepResult(step['name'], 'done', timings, values, screen, setup_hash, None)
+
+    @staticmethod
+    def lap(timings, phase, start):
+        """Adds time elapsed from `start` to `phase` in `timings` and returns the current time."""
+        now = perf_counter()
+        timings[phase] = timings.get(phase, 0.0) + now - start
+
+        return now
+
+    def report(self):
+        """Prints table of step durations per phase in milliseconds."""
+        print(f'{"step":<32}{"status":>8}' + ''.join(f'{phase:>10}' for phase in STEP_PHASES) + f'{"total":>10}')
+        for result in self.results:
+            print(f'{result.name[:31]:<32}{result.status:>8}'
+                  + ''.join(f'{result.timings.get(phase, 0.0) * 1000:>10.1f}' for phase in STEP_PHASES)
+                  + f'{sum(result.timings.values()) * 1000:>10.1f}')
@@ -0,0 +1,80 @@
+"""
+Tests of the shadow cache of `keysight_DSOX2000A_3000A.Oscilloscope` on the simulated oscilloscope (see
+`scope_simulator`). Run with `python -m pytest` from this directory.
+"""
+import keysight_DSOX2000A_3000A
+
+
+def new_scope():
+    scope = keysight_DSOX2000A_3000A.Oscilloscope('SIM::DC')
+    scope.init()
+    scope.flush()
+
+    return scope
+
+
+def test_short_form_after_long_form():
+    scope = new_scope()
+    assert scope.send(':TIMebase:SCALe 0.001')
+    scope.flush()
+    assert not scope.send(':TIM:SCAL 1E-3')     # same setting and value in short form
+    assert scope.send(':TIM:SCAL 0.002')
+    scope.flush()
+    assert scope.send(':TIMebase:SCALe 0.001')
+    scope.flush()
+    assert list(scope.state).count(':TIM:SCAL') == 1
+    assert float(scope.query(':TIMebase:SCALe?')) == 0.001
+
+
+def test_numeric_and_keyword_arguments_compared_by_value():
+    scope = new_scope()
+    assert scope.send(':CHANnel1:DISPlay 1')
+    assert not scope.send(':CHAN1:DISP 1.0')
+    assert scope.send(':MEASure:SOURce CHANnel1')
+    assert not scope.send(':MEAS:SOUR CHAN1')
+
+
+def test_thresholds_kept_once_per_source():
+    scope = new_scope()
+    scope.send(':MEASure:SOURce CHANnel1')
+    assert scope.send(':MEASure:DEFine THResholds,PERCent,90,50,10')
+    scope.send(':MEAS:SOUR CHAN1')
+    assert not scope.send(':MEAS:DEF THR,PERC,90,50,10')
+    assert [key for key in scope.state if key.startswith(':MEAS:DEF')] == [':MEAS:DEF THR CHAN1']
+
+
+def reset_written(scope):
+    scope.enable_trace()
+    scope.init()
+    scope.flush()
+
+    return any(record['command'].startswith('*RST') for record in scope.trace)
+
+
+def test_deferred_init_updates_cached_settings():
+    scope = new_scope()
+    scope.send(':TIMebase:SCALe 0.001')
+    scope.flush()
+    scope.enable_trace()
+    scope.init()
+    scope.send(':TIM:SCAL 0.001')
+    scope.flush()
+    assert not any(record['command'].startswith('*RST') for record in scope.trace)
+
+
+def test_deferred_init_resets_uncovered_settings():
+    scope = new_scope()
+    scope.send(':MEASure:STATistics ON')
+    scope.send(':MEASure:DEFine DELay,+1,-1')
+    scope.flush()
+    assert reset_written(scope)
+    assert not reset_written(scope)
+
+
+def test_deferred_init_resets_uncached_settings():
+    scope = new_scope()
+    scope.send(':WAVeform:POINts:MODE MAXimum')
+    scope.flush()
+    assert ':WAV:POIN:MODE' not in scope.state
+    assert reset_written(scope)
+    assert not scope.uncached_settings
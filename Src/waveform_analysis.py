@@ -0,0 +1,271 @@
+"""
+This module provides measurements done on the computer from waveform samples fetched with
+`keysight_DSOX2000A_3000A.Oscilloscope.get_waveform()` / `get_waveforms()` instead of on-scope :MEASure commands.
+
+All functions work on NumPy arrays and process a whole record in a single vectorized pass, so one deep-memory capture
+gives the measured parameter for every edge/bit in the record instead of one value per trigger.
+
+Shared kernels `edge_indices()`, `find_edges()` and `crossings()` (hysteresis-qualified edge detection with
+interpolation between samples) are the base of the generic measurements `rise_times()`, `fall_times()`,
+`pulse_widths()`, `periods()` and `edge_delays()` and of the protocol specific `i2c_timing()`. Run
+`analysis_benchmark.py` to check they process 4 Mpts records within the time limit.
+
+Signals with amplitude below `min_amplitude` (e.g. idle bus or disconnected probe, where only noise is captured) have
+no levels and no edges, like the oscilloscope reports no result for them. Oscilloscope objects pass
+`MIN_AMPLITUDE_DIVISIONS` of the vertical scale of the channel.
+
+Module does not depend on PyVisa and can be used offline on stored waveforms.
+"""
+from collections import namedtuple
+import numpy as np
+
+Edges = namedtuple('Edges', ['rising', 'falling'])
+"""Result of `find_edges()`. Both `rising` and `falling` are arrays of shape (n, 2): column 0 holds the times the
+edges cross the low threshold and column 1 the times they cross the high threshold."""
+
+MIN_AMPLITUDE_DIVISIONS = 0.5
+"""Minimal amplitude (top - base) of signal with levels and edges in vertical divisions of its channel."""
+
+I2C_TIMING = ('I2C SCL t(r)', 'I2C SDA t(r)', 'I2C SCL t(f)', 'I2C SDA t(f)', 'I2C SCL Frequency',
+              'I2C SCL High Time tHIGH', 'I2C SCL Low Time tLOW', 'I2C SDA Setup Time tSU;DAT',
+              'I2C SDA Hold Time tHD;DAT', 'I2C ReStart Setup Time tSU;STA', 'I2C (Re)Start Hold Time tHD;STA',
+              'I2C Stop Setup Time tSU;STO', 'I2C Bus Free Time tBUF')
+"""Parameters returned by `i2c_timing()`, named as the results of `keysight_DSOX2000A_3000A.I2C` set_meas methods."""
+
+
+def signal_levels(x, bins=256, min_amplitude=0.0):
+    """
+    Returns (top, base) levels of signal `x` as the most frequent value in the upper and in the lower half of the
+    signal range (histogram method, like VTOP/VBASe of the oscilloscope). Both levels are NaN if the amplitude is
+    below `min_amplitude` [V] (signal is only noise), thresholds derived from NaN levels find no edges.
+    """
+    x_min, x_max = float(np.min(x)), float(np.max(x))
+    if x_max == x_min:
+        top, base = x_max, x_min
+    else:
+        counts, bin_edges = np.histogram(x, bins=bins, range=(x_min, x_max))
+        centers = (bin_edges[:-1] + bin_edges[1:]) / 2
+        half = bins // 2
+        top, base = centers[half + np.argmax(counts[half:])], centers[np.argmax(counts[:half])]
+    if top - base < min_amplitude:
+        return np.nan, np.nan
+
+    return top, base
+
+
+def percent_level(x, percent, min_amplitude=0.0):
+    """Returns voltage at `percent` between base (0%) and top (100%) of signal `x` (NaN below `min_amplitude`)."""
+    top, base = signal_levels(x, min_amplitude=min_amplitude)
+
+    return base + (top - base) * percent / 100
+
+
+def thresholds(x, lower=30, upper=70, min_amplitude=0.0):
+    """
+    Returns (low, high) threshold voltages at `lower` and `upper` percent between base and top of signal `x` (NaN
+    below `min_amplitude`).
+    """
+    top, base = signal_levels(x, min_amplitude=min_amplitude)
+    amplitude = top - base
+
+    return base + amplitude * lower / 100, base + amplitude * upper / 100
+
+
+def interpolate(t, x, i, level):
+    """Returns times signal `x` crosses `level` between samples `i` and `i + 1` (linear interpolation)."""
+    return t[i] + (level - x[i]) * (t[i + 1] - t[i]) / (x[i + 1] - x[i])
+
+
+def edge_indices(x, low, high):
+    """
+    Hysteresis kernel of the module. A rising edge is where signal `x` goes from below `low` to above `high`, falling
+    edge the other way round; noise within the band does not create edges.
+
+    Returns arrays (p, k, rising) with one entry per edge: `p` is index of the last sample beyond the near threshold,
+    `k` index of the first sample beyond the far threshold (samples in between are inside the band) and `rising`
+    tells the edge direction.
+    """
+    state = np.full(len(x), -1, dtype=np.int8)
+    state[x <= low] = 0
+    state[x >= high] = 1
+    # index of the last sample outside the threshold band for each sample:
+    last = np.maximum.accumulate(np.where(state >= 0, np.arange(len(x)), -1))
+    level = np.where(last >= 0, state[np.maximum(last, 0)], -1)
+
+    k = np.flatnonzero((level[1:] != level[:-1]) & (level[:-1] >= 0)) + 1
+
+    return last[k - 1], k, level[k] == 1
+
+
+def find_edges(t, x, low, high):
+    """
+    Finds all edges of signal `x` sampled at times `t` with hysteresis between `low` and `high` (see
+    `edge_indices()`). Crossing times of both thresholds are interpolated between samples. Returns `Edges`.
+    """
+    p, k, rising = edge_indices(x, low, high)
+
+    return Edges(np.column_stack((interpolate(t, x, p[rising], low), interpolate(t, x, k[rising] - 1, high))),
+                 np.column_stack((interpolate(t, x, k[~rising] - 1, low), interpolate(t, x, p[~rising], high))))
+
+
+def crossings(t, x, level, hysteresis=0.0):
+    """
+    Returns (rising, falling) arrays of times signal `x` crosses `level`, exactly one per edge. Edges are qualified by
+    hysteresis band `hysteresis` [V] wide centered at `level`; if noise crosses the level several times within the
+    band the last crossing before the signal leaves the band is taken.
+    """
+    p, k, rising = edge_indices(x, level - hysteresis / 2, level + hysteresis / 2)
+    segments = np.flatnonzero((x[:-1] < level) != (x[1:] < level))
+    j = np.maximum(segments[np.maximum(np.searchsorted(segments, k) - 1, 0)], p)
+    times = interpolate(t, x, j, level)
+
+    return times[rising], times[~rising]
+
+
+def rise_times(edges):
+    """Returns rise time of every rising edge in `edges` found by `find_edges()`."""
+    return edges.rising[:, 1] - edges.rising[:, 0]
+
+
+def fall_times(edges):
+    """Returns fall time of every falling edge in `edges` found by `find_edges()`."""
+    return edges.falling[:, 0] - edges.falling[:, 1]
+
+
+def pulse_widths(t, x, level, hysteresis=0.0, positive=True):
+    """
+    Returns width of every positive (or negative if `positive` is *False*) pulse of signal `x` measured at `level`,
+    like :MEASure:PWIDth / :MEASure:NWIDth.
+    """
+    rising, falling = crossings(t, x, level, hysteresis)
+    if positive:
+        return valid(following(rising, falling) - rising)
+
+    return valid(following(falling, rising) - falling)
+
+
+def periods(t, x, level, hysteresis=0.0):
+    """Returns every period of signal `x` measured between consecutive rising crossings of `level`."""
+    return np.diff(crossings(t, x, level, hysteresis)[0])
+
+
+def edge_delays(t, a, b, level_a, level_b, rising_a=True, rising_b=True, hysteresis=0.0):
+    """
+    Returns delay from every edge of signal `a` to the next edge of signal `b`, like :MEASure:DELay with
+    :MEASure:DEFine DELay,<edge a>,<edge b>. Edge direction is selected by `rising_a`/`rising_b`, crossing levels by
+    `level_a`/`level_b`. Both signals must be sampled at the same times `t`.
+    """
+    edges_a = crossings(t, a, level_a, hysteresis)[0 if rising_a else 1]
+    edges_b = crossings(t, b, level_b, hysteresis)[0 if rising_b else 1]
+
+    return valid(following(edges_a, edges_b) - edges_a)
+
+
+def previous(times, events):
+    """Returns index of the last of sorted `events` before each of `times` (-1 if there is none)."""
+    return np.searchsorted(events, times) - 1
+
+
+def is_high(times, edges):
+    """Tells for each of `times` if the signal described by `edges` is high (after rising edge crossed the high
+    threshold and before falling edge crossed it)."""
+    last_rise = np.nan_to_num(preceding(times, edges.rising[:, 1]), nan=-np.inf)
+    last_fall = np.nan_to_num(preceding(times, edges.falling[:, 1]), nan=-np.inf)
+    # before the first edge the signal is high if the first edge is falling:
+    initially_high = len(edges.falling) > 0 and (len(edges.rising) == 0
+                                                 or edges.falling[0, 1] < edges.rising[0, 1])
+
+    return np.where(np.isinf(last_rise) & np.isinf(last_fall), initially_high, last_rise > last_fall)
+
+
+def following(times, events):
+    """Returns the first of sorted `events` after each of `times`, NaN if there is none."""
+    if len(events) == 0:
+        return np.full(np.shape(times), np.nan)
+    i = np.searchsorted(events, times)
+    return np.where(i < len(events), events[np.minimum(i, len(events) - 1)], np.nan)
+
+
+def preceding(times, events):
+    """Returns the last of sorted `events` before each of `times`, NaN if there is none."""
+    if len(events) == 0:
+        return np.full(np.shape(times), np.nan)
+    i = previous(times, events)
+    return np.where(i >= 0, events[np.maximum(i, 0)], np.nan)
+
+
+def contains(events, begin, end):
+    """Tells for each interval `begin` -> `end` if any of sorted `events` lies inside."""
+    return np.searchsorted(events, begin) != np.searchsorted(events, np.nan_to_num(end, nan=np.inf))
+
+
+def valid(values):
+    """Drops NaN values (parameters that cannot be measured at the start or end of the record)."""
+    return values[~np.isnan(values)]
+
+
+def i2c_timing(t, scl, sda, lower=30, upper=70, min_amplitude=(0.0, 0.0)):
+    """
+    Computes I2C timing parameters for every bit in a capture of SCL and SDA sampled at times `t`.
+    Thresholds are at `lower`/`upper` percent of each line amplitude, 30%/70% as per I2C specification. Lines with
+    amplitude below `min_amplitude` [V] (for SCL and SDA) have no edges.
+
+    Definitions (rising edge crosses 30% then 70%, falling edge 70% then 30%):
+    * t(r), t(f) - rise/fall time of every SCL and SDA edge
+    * frequency - 1 / period of consecutive SCL rising edges within transfer (no START/STOP in between)
+    * tHIGH - SCL rising 70% -> SCL falling 70%, tLOW - SCL falling 30% -> SCL rising 30%
+    * tSU;DAT - SDA edge (70% rising, 30% falling) -> SCL rising 30%
+    * tHD;DAT - SCL falling 30% -> SDA edge (30% rising, 70% falling)
+    * tSU;STA - SCL rising 70% -> SDA falling 70% at repeated START
+    * tHD;STA - SDA falling 30% at (repeated) START -> SCL falling 70%
+    * tSU;STO - SCL rising 70% -> SDA rising 30% at STOP
+    * tBUF - SDA rising 70% at STOP -> SDA falling 70% at next START
+
+    Returns dictionary of parameter name (see `I2C_TIMING`) to NumPy array with one value per occurrence in [s],
+    frequency in [Hz].
+    """
+    scl_edges = find_edges(t, scl, *thresholds(scl, lower, upper, min_amplitude[0]))
+    sda_edges = find_edges(t, sda, *thresholds(sda, lower, upper, min_amplitude[1]))
+    scl_rise, scl_fall = scl_edges
+    sda_rise, sda_fall = sda_edges
+
+    # SDA changing while SCL is high are START (falling) and STOP (rising) conditions, others are data bits:
+    start_cond = is_high(sda_fall[:, 1], scl_edges)
+    stop_cond = is_high(sda_rise[:, 0], scl_edges)
+    starts, data_fall = sda_fall[start_cond], sda_fall[~start_cond]
+    stops, data_rise = sda_rise[stop_cond], sda_rise[~stop_cond]
+
+    # SCL periods and high times containing START or STOP are not bit periods:
+    conditions = np.sort(np.concatenate((starts[:, 1], stops[:, 0])))
+    periods = np.diff(scl_rise[:, 0])
+    bit_periods = ~contains(conditions, scl_rise[:-1, 0], scl_rise[1:, 0])
+    high_end = following(scl_rise[:, 1], scl_fall[:, 1])
+    bit_highs = ~contains(conditions, scl_rise[:, 1], high_end)
+
+    # START is repeated if SCL was released after the previous START without STOP in between:
+    last_scl_rise = preceding(starts[:, 1], scl_rise[:, 1])
+    last_start = np.concatenate(([-np.inf], starts[:-1, 1]))
+    last_stop = preceding(starts[:, 1], stops[:, 1])
+    repeated = (last_scl_rise > last_start) & ~(last_stop > last_start)
+
+    # SDA changes while SCL is low are data bits unless they prepare START or STOP in the following SCL high:
+    data_start = np.concatenate((data_rise[:, 0], data_fall[:, 1]))
+    data_end = np.concatenate((data_rise[:, 1], data_fall[:, 0]))
+    data_clock = following(data_end, scl_rise[:, 0])
+    data_bits = ~contains(conditions, data_clock, following(data_clock, scl_fall[:, 1]))
+
+    return {
+        'I2C SCL t(r)': rise_times(scl_edges),
+        'I2C SDA t(r)': rise_times(sda_edges),
+        'I2C SCL t(f)': fall_times(scl_edges),
+        'I2C SDA t(f)': fall_times(sda_edges),
+        'I2C SCL Frequency': 1 / periods[bit_periods],
+        'I2C SCL High Time tHIGH': valid(high_end[bit_highs] - scl_rise[bit_highs, 1]),
+        'I2C SCL Low Time tLOW': valid(following(scl_fall[:, 0], scl_rise[:, 0]) - scl_fall[:, 0]),
+        'I2C SDA Setup Time tSU;DAT': valid(data_clock[data_bits] - data_end[data_bits]),
+        'I2C SDA Hold Time tHD;DAT': valid(data_start - preceding(data_start, scl_fall[:, 0])),
+        'I2C ReStart Setup Time tSU;STA': valid(starts[repeated, 1] - last_scl_rise[repeated]),
+        'I2C (Re)Start Hold Time tHD;STA': valid(following(starts[:, 0], scl_fall[:, 1]) - starts[:, 0]),
+        'I2C Stop Setup Time tSU;STO': valid(stops[:, 0] - preceding(stops[:, 0], scl_rise[:, 1])),
+        'I2C Bus Free Time tBUF': valid(following(stops[:, 1], starts[:, 1]) - stops[:, 1]),
+    }